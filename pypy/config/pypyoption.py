@@ -227,10 +227,20 @@ pypy_optiondescription = OptionDescription("objspace", "Object Space Options", [
                    "use specialised tuples",
                    default=False),
 
+        BoolOption("withunboxedtuple",
+                   "store the items of tuples of ints, floats or strings "
+                   "unwrapped",
+                   default=False),
+
         BoolOption("withliststrategies",
                    "enable optimized ways to store lists of primitives ",
                    default=True),
 
+        BoolOption("withsharedkeysdict",
+                   "share the keys of the dicts which get the same string "
+                   "keys in the same order",
+                   default=False),
+
         BoolOption("withmethodcachecounter",
                    "try to cache methods and provide a counter in __pypy__. "
                    "for testing purposes only.",
@@ -281,6 +291,8 @@ def set_pypy_opt_level(config, level):
     if level == 'mem':
         config.objspace.std.suggest(withprebuiltint=True)
         config.objspace.std.suggest(withliststrategies=True)
+        config.objspace.std.suggest(withsharedkeysdict=True)
+        config.objspace.std.suggest(withunboxedtuple=True)
         if not IS_64_BITS:
             config.objspace.std.suggest(withsmalllong=True)
 
@@ -136,6 +136,43 @@ min_jitdriver = jit.JitDriver(name='min',
 max_jitdriver = jit.JitDriver(name='max',
         greens=['has_key', 'has_item', 'w_type'], reds='auto')
 
+@specialize.arg(2)
+def min_max_unboxed(space, w_sequence, implementation_of):
+    """Fast path for lists (or sets) of ints and lists of floats: compare
+    the unwrapped items directly.  Returns None if there is no fast path,
+    or if the sequence is empty."""
+    intlist = space.listview_int(w_sequence)
+    if intlist is not None:
+        if len(intlist) == 0:
+            return None
+        intresult = intlist[0]
+        for i in range(1, len(intlist)):
+            intval = intlist[i]
+            if implementation_of == "max":
+                if intval > intresult:
+                    intresult = intval
+            else:
+                if intval < intresult:
+                    intresult = intval
+        return space.newint(intresult)
+    floatlist = space.listview_float(w_sequence)
+    if floatlist is not None:
+        if len(floatlist) == 0:
+            return None
+        # same comparisons in the same order as the general loop, so that
+        # NaNs and negative zeroes give the same result
+        floatresult = floatlist[0]
+        for i in range(1, len(floatlist)):
+            floatval = floatlist[i]
+            if implementation_of == "max":
+                if floatval > floatresult:
+                    floatresult = floatval
+            else:
+                if floatval < floatresult:
+                    floatresult = floatval
+        return space.newfloat(floatresult)
+    return None
+
 @specialize.arg(3)
 def min_max_sequence(space, w_sequence, w_key, implementation_of):
     if implementation_of == "max":
@@ -144,6 +181,10 @@ def min_max_sequence(space, w_sequence, w_key, implementation_of):
     else:
         compare = space.lt
         jitdriver = min_jitdriver
+    if w_key is None:
+        w_result = min_max_unboxed(space, w_sequence, implementation_of)
+        if w_result is not None:
+            return w_result
     w_iter = space.iter(w_sequence)
     w_type = space.type(w_iter)
     has_key = w_key is not None
@@ -573,3 +614,67 @@ class W_XRangeStepOneIterator(W_XRangeIterator):
 
     def get_remaining(self):
         return self.stop - self.current
+
+
+sum_jitdriver = jit.JitDriver(name='sum', greens=['w_type'], reds='auto')
+
+def sum_unboxed(space, w_sequence, w_start):
+    """Fast path for lists (or sets) of ints and lists of floats with an
+    int or float start value: add the unwrapped items directly.  Returns
+    None if there is no fast path, or if an int sum overflows."""
+    if space.is_w(space.type(w_start), space.w_int):
+        start_is_float = False
+    elif space.is_w(space.type(w_start), space.w_float):
+        start_is_float = True
+    else:
+        return None
+    intlist = space.listview_int(w_sequence)
+    if intlist is not None:
+        if start_is_float:
+            floatresult = space.float_w(w_start)
+            for intval in intlist:
+                floatresult += float(intval)
+            return space.newfloat(floatresult)
+        intresult = space.int_w(w_start)
+        try:
+            for intval in intlist:
+                intresult = rarithmetic.ovfcheck(intresult + intval)
+        except OverflowError:
+            return None
+        return space.newint(intresult)
+    floatlist = space.listview_float(w_sequence)
+    if floatlist is not None:
+        # added one by one from the left, like the general loop
+        floatresult = space.float_w(w_start)
+        for floatval in floatlist:
+            floatresult += floatval
+        return space.newfloat(floatresult)
+    return None
+
+@unwrap_spec(w_start=WrappedDefault(0))
+def sum(space, w_sequence, w_start):
+    """sum(sequence[, start]) -> value
+
+Returns the sum of a sequence of numbers (NOT strings) plus the value
+of parameter 'start' (which defaults to 0).  When the sequence is
+empty, returns start."""
+    if space.isinstance_w(w_start, space.w_basestring):
+        raise oefmt(space.w_TypeError, "sum() can't sum strings")
+    w_result = sum_unboxed(space, w_sequence, w_start)
+    if w_result is not None:
+        return w_result
+    w_iter = space.iter(w_sequence)
+    w_type = space.type(w_iter)
+    w_last = w_start
+    while True:
+        sum_jitdriver.jit_merge_point(w_type=w_type)
+        try:
+            w_item = space.next(w_iter)
+        except OperationError as e:
+            if not e.match(space, space.w_StopIteration):
+                raise
+            break
+        # Very intentionally *not* inplace_add, that would have different
+        # semantics if start was a mutable type, such as a list
+        w_last = space.add(w_last, w_item)
+    return w_last
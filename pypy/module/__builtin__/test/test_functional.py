@@ -357,6 +357,59 @@ class AppTestMinMax:
         assert max(["100", "50", "30", "-200"], key=int) == "100"
         assert max("100", "50", "30", "-200", key=int) == "100"
 
+    def test_min_max_unboxed(self):
+        import __pypy__
+        l = [5, -3, 12, 7]
+        assert __pypy__.strategy(l) == "IntegerListStrategy"
+        assert min(l) == -3
+        assert max(l) == 12
+        assert max(range(10)) == 9
+        assert min(set([4, 2, 8])) == 2
+        l = [2.5, -1.5, 7.0]
+        assert __pypy__.strategy(l) == "FloatListStrategy"
+        assert min(l) == -1.5
+        assert max(l) == 7.0
+        # NaNs and zeroes give the same result as comparing in order
+        nan = float("nan")
+        x = max([nan, 1.0, 2.0])
+        assert x != x
+        assert max([1.0, nan, 2.0]) == 2.0
+        assert str(min([-0.0, 0.0])) == "-0.0"
+        assert str(max([0.0, -0.0])) == "0.0"
+        raises(ValueError, max, [1, 2][:0])
+
+
+class AppTestSum:
+    def test_sum_unboxed(self):
+        import sys
+        assert sum([1, 2, 3]) == 6
+        assert type(sum([1, 2, 3])) is int
+        assert sum([1, 2, 3], 10) == 16
+        assert sum([1, 2, 3], 0.5) == 6.5
+        assert sum([0.5, 1.5], 1) == 3.0
+        assert type(sum([0.5, 1.5], 1)) is float
+        assert sum([0.1] * 10) == 0.1 + 0.1 + 0.1 + 0.1 + 0.1 + \
+                                  0.1 + 0.1 + 0.1 + 0.1 + 0.1
+        assert sum(set([1, 2])) == 3
+        assert sum(range(101)) == 5050
+        assert sum([sys.maxint, 1]) == sys.maxint + 1
+        assert sum([-sys.maxint, -2]) == -sys.maxint - 2
+        assert sum([1, 2], 1L) == 4L
+        assert type(sum([1, 2], 1L)) is long
+        x = sum([float("nan"), 1.0])
+        assert x != x
+
+    def test_sum_generic(self):
+        assert sum([[1], [2]], []) == [1, 2]
+        start = []
+        assert sum([[1]], start) == [1]
+        assert start == []
+        assert sum(x for x in [1, 2.5]) == 3.5
+        assert sum([], 5) == 5
+        assert sum([1, 2], start=3) == 6
+        raises(TypeError, sum, ["a", "b"], "")
+        raises(TypeError, sum, [1, "a"])
+
 
 try:
     from hypothesis import given, strategies, example
@@ -132,6 +132,8 @@ class Module(MixedModule):
                                  'interp_magic.reset_method_cache_counter')
             self.extra_interpdef('mapdict_cache_counter',
                                  'interp_magic.mapdict_cache_counter')
+            self.extra_interpdef('attr_cache_counter',
+                                 'interp_magic.attr_cache_counter')
         PYC_MAGIC = get_pyc_magic(self.space)
         self.extra_interpdef('PYC_MAGIC', 'space.wrap(%d)' % PYC_MAGIC)
         try:
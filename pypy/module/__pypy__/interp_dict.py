@@ -19,6 +19,10 @@ def newdict(space, type):
                  in a function, optimized for passing around
 
     * "strdict" - string-key only dict. This one should be chosen automatically
+
+    * "sharedkeys" - string-key dict which shares its keys with the other
+                     dicts which get the same keys in the same order, for
+                     many dicts of the same shape
     """
     if type == 'module':
         return space.newdict(module=True)
@@ -28,6 +32,8 @@ def newdict(space, type):
         return space.newdict(kwargs=True)
     elif type == 'strdict':
         return space.newdict(strdict=True)
+    elif type == 'sharedkeys':
+        return space.newdict(sharedkeys=True)
     else:
         raise oefmt(space.w_TypeError, "unknown type of dict %s", type)
 
@@ -8,7 +8,7 @@ from pypy.objspace.std.dictmultiobject import W_DictMultiObject
 from pypy.objspace.std.listobject import W_ListObject
 from pypy.objspace.std.setobject import W_BaseSetObject
 from pypy.objspace.std.typeobject import MethodCache
-from pypy.objspace.std.mapdict import MapAttrCache
+from pypy.objspace.std.mapdict import MapAttrCache, InlineCacheCounters
 from rpython.rlib import rposix, rgc, rstack
 
 
@@ -40,6 +40,9 @@ def reset_method_cache_counter(space):
     cache = space.fromcache(MapAttrCache)
     cache.misses = {}
     cache.hits = {}
+    counters = space.fromcache(InlineCacheCounters)
+    counters.misses = {}
+    counters.hits = {}
 
 @unwrap_spec(name='text')
 def mapdict_cache_counter(space, name):
@@ -50,6 +53,15 @@ def mapdict_cache_counter(space, name):
     return space.newtuple([space.newint(cache.hits.get(name, 0)),
                            space.newint(cache.misses.get(name, 0))])
 
+@unwrap_spec(name='text')
+def attr_cache_counter(space, name):
+    """Return a tuple (hits, misses) for the caches of the opcodes which
+    read, write or call the attribute with the given name."""
+    assert space.config.objspace.std.withmethodcachecounter
+    counters = space.fromcache(InlineCacheCounters)
+    return space.newtuple([space.newint(counters.hits.get(name, 0)),
+                           space.newint(counters.misses.get(name, 0))])
+
 def builtinify(space, w_func):
     """To implement at app-level modules that are, in CPython,
     implemented in C: this decorator protects a function from being ever
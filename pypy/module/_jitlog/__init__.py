@@ -9,5 +9,8 @@ class Module(MixedModule):
     interpleveldefs = {
         'enable': 'interp_jitlog.enable',
         'disable': 'interp_jitlog.disable',
+        'record_decisions': 'interp_jitlog.record_decisions',
+        'replay_decisions': 'interp_jitlog.replay_decisions',
+        'stop_decisions': 'interp_jitlog.stop_decisions',
         'JitlogError': 'space.fromcache(interp_jitlog.Cache).w_JitlogError',
     }
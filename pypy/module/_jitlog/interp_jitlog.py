@@ -26,3 +26,30 @@ def enable(space, fileno):
 def disable(space):
     """ Disable PyPy's logging facility. """
     rjitlog.disable_jitlog()
+
+@unwrap_spec(fileno=int)
+@jit.dont_look_inside
+def record_decisions(space, fileno):
+    """ Write the decisions of the JIT (where it traces, aborts, stops
+    inlining...) to the file descriptor 'fileno', which must stay open. """
+    try:
+        rjitlog.record_decisions(fileno)
+    except rjitlog.JitlogError, e:
+        raise JitlogError(space, e)
+
+@unwrap_spec(fileno=int)
+@jit.dont_look_inside
+def replay_decisions(space, fileno):
+    """ Read the decisions written by record_decisions() from the file
+    descriptor 'fileno', and from now on trace loops and stop inlining
+    functions only where they say.  This can be combined with
+    record_decisions(). """
+    try:
+        rjitlog.replay_decisions(fileno)
+    except rjitlog.JitlogError, e:
+        raise JitlogError(space, e)
+
+@jit.dont_look_inside
+def stop_decisions(space):
+    """ Stop recording and replaying the decisions of the JIT. """
+    rjitlog.stop_decisions()
@@ -48,3 +48,19 @@ class AppTestJitLog(object):
                 assert opnum in self.resops
                 # the name must equal
                 assert self.resops[opnum] == opname
+
+    def test_record_and_replay_decisions(self):
+        import _jitlog
+        with open(self.tmpfilename, 'wb') as f:
+            _jitlog.record_decisions(f.fileno())
+            _jitlog.stop_decisions()
+        with open(self.tmpfilename, 'rb') as f:
+            assert f.read(1) == self.mark_header
+            assert f.read(2) == self.version
+        with open(self.tmpfilename, 'rb') as f:
+            _jitlog.replay_decisions(f.fileno())
+            _jitlog.stop_decisions()
+        with open(self.tmpfilename, 'wb') as f:
+            f.write(b'garbage')
+        with open(self.tmpfilename, 'rb') as f:
+            raises(_jitlog.JitlogError, _jitlog.replay_decisions, f.fileno())
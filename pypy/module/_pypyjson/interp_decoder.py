@@ -299,6 +299,10 @@ class JSONDecoder(object):
 
     def _create_dict(self, d):
         from pypy.objspace.std.dictmultiobject import from_unicode_key_dict
+        from pypy.objspace.std.sharedkeysdict import (
+            from_unicode_key_dict_shared)
+        if self.space.config.objspace.std.withsharedkeysdict:
+            return from_unicode_key_dict_shared(self.space, d)
         return from_unicode_key_dict(self.space, d)
 
     def decode_string(self, i):
@@ -14,6 +14,7 @@ class Module(MixedModule):
         'enable': 'interp_vmprof.enable',
         'disable': 'interp_vmprof.disable',
         'is_enabled': 'interp_vmprof.is_enabled',
+        'get_perf_event': 'interp_vmprof.get_perf_event',
         'get_profile_path': 'interp_vmprof.get_profile_path',
         'stop_sampling': 'interp_vmprof.stop_sampling',
         'start_sampling': 'interp_vmprof.start_sampling',
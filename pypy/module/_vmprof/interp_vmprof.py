@@ -51,22 +51,34 @@ def VMProfError(space, e):
     return OperationError(w_VMProfError, space.newtext(e.msg))
 
 
-@unwrap_spec(fileno=int, period=float, memory=int, lines=int, native=int, real_time=int)
-def enable(space, fileno, period, memory, lines, native, real_time):
+@unwrap_spec(fileno=int, period=float, memory=int, lines=int, native=int,
+             real_time=int, perf_event='text', perf_period=int)
+def enable(space, fileno, period, memory, lines, native, real_time,
+           perf_event='', perf_period=0):
     """Enable vmprof.  Writes go to the given 'fileno', a file descriptor
     opened for writing.  *The file descriptor must remain open at least
     until disable() is called.*
 
     'interval' is a float representing the sampling interval, in seconds.
     Must be smaller than 1.0
+
+    'perf_event' can be 'instructions', 'cache-misses' or 'branch-misses'
+    to take a sample every 'perf_period' such hardware events instead
+    (Linux only).  If the event is not available, the interval is used;
+    get_perf_event() tells which one is used.
     """
+    try:
+        perf_kind = rvmprof.PERF_EVENT_NAMES.index(perf_event)
+    except ValueError:
+        raise oefmt(space.w_ValueError, "unknown perf_event '%s'", perf_event)
     w_modules = space.sys.get('modules')
     #if space.contains_w(w_modules, space.newtext('_continuation')):
     #    space.warn(space.newtext("Using _continuation/greenlet/stacklet together "
     #                             "with vmprof will crash"),
     #               space.w_RuntimeWarning)
     try:
-        rvmprof.enable(fileno, period, memory, native, real_time)
+        rvmprof.enable(fileno, period, memory, native, real_time,
+                       perf_kind, perf_period)
     except rvmprof.VMProfError as e:
         raise VMProfError(space, e)
 
@@ -82,6 +94,14 @@ def disable(space):
 def is_enabled(space):
     return space.newbool(rvmprof.is_enabled())
 
+def get_perf_event(space):
+    """Return the name of the hardware event which triggers the samples,
+    or None if it is the timer."""
+    kind = rvmprof.get_perf_event()
+    if kind == rvmprof.PERF_EVENT_NONE:
+        return space.w_None
+    return space.newtext(rvmprof.PERF_EVENT_NAMES[kind])
+
 def get_profile_path(space):
     path = rvmprof.get_profile_path(space)
     if path is None:
@@ -108,6 +108,22 @@ class AppTestVMProf(object):
         _vmprof.disable()
         assert _vmprof.is_enabled() is False
 
+    def test_perf_event(self):
+        import _vmprof
+        tmpfile = open(self.tmpfilename, 'wb')
+        raises(ValueError, _vmprof.enable, tmpfile.fileno(), 0.01, 0, 0, 0, 0,
+               'cache-hits')
+        raises(_vmprof.VMProfError, _vmprof.enable, tmpfile.fileno(), 0.01,
+               0, 0, 0, 0, 'cache-misses', -1)
+        assert _vmprof.is_enabled() is False
+        assert _vmprof.get_perf_event() is None
+        # falls back to the timer if there are no hardware counters
+        _vmprof.enable(tmpfile.fileno(), 0.01, 0, 0, 0, 0, 'cache-misses')
+        assert _vmprof.is_enabled() is True
+        assert _vmprof.get_perf_event() in ('cache-misses', None)
+        _vmprof.disable()
+        assert _vmprof.get_perf_event() is None
+
     @py.test.mark.xfail(sys.platform.startswith('freebsd'), reason = "not implemented")
     def test_get_profile_path(self):
         import _vmprof
@@ -37,5 +37,8 @@ class Module(MixedModule):
                 'GcRef': 'referents.W_GcRef',
                 'hooks': 'space.fromcache(hook.W_AppLevelHooks)',
                 'GcCollectStepStats': 'hook.W_GcCollectStepStats',
+                'start_alloc_profiling': 'allocprofile.start_alloc_profiling',
+                'stop_alloc_profiling': 'allocprofile.stop_alloc_profiling',
+                'get_alloc_profile': 'allocprofile.get_alloc_profile',
                 })
         MixedModule.__init__(self, space, w_name)
@@ -0,0 +1,164 @@
+"""
+Sampling allocation profiler.
+
+The GC calls the hooks on_gc_alloc_sample() and on_gc_alloc_sample_promoted()
+(see LowLevelGcHooks) roughly every 'interval' bytes allocated in the
+nursery.  They can't allocate, so each sample is written into a raw buffer
+which is allocated when the profiling starts:
+
+    [sample_id, size, promoted, traceback_length, traceback...]
+
+where the traceback is the vmprof-like traceback of the Python frames
+doing the allocation.  It is only available if the _vmprof module is
+enabled; otherwise it is always empty.
+"""
+
+from rpython.rlib import rgc
+from rpython.rlib.rarithmetic import ovfcheck
+from rpython.rlib.rvmprof import traceback
+from rpython.rtyper.lltypesystem import lltype, rffi
+from pypy.interpreter.gateway import unwrap_spec
+from pypy.interpreter.error import oefmt
+from pypy.interpreter.pycode import PyCode
+
+HEADER_WORDS = 4
+MAX_BUFFER_WORDS = 32 * 1024 * 1024
+
+
+def buffer_words(max_samples, max_depth):
+    """Return the size in words of the buffer for 'max_samples' samples of
+    at most 'max_depth' frames.  Raises OverflowError if it is too large.
+    """
+    traceback_size = ovfcheck(max_depth * 2)
+    sample_words = ovfcheck(traceback_size + (HEADER_WORDS + 4))
+    words = ovfcheck(max_samples * sample_words)
+    if words > MAX_BUFFER_WORDS:
+        raise OverflowError
+    return words
+
+
+class AllocProfiler(object):
+    """
+    This is expected to be a singleton, created by space.fromcache.
+    """
+
+    def __init__(self, space):
+        self.space = space
+        self.interval = 0
+        self.buffer = lltype.nullptr(rffi.SIGNEDP.TO)
+        self.traceback_size = 0
+        self.sample_words = 0
+        self.max_samples = 0
+        self.num_samples = 0
+        self.first_sample_id = -1
+
+    def with_traceback(self):
+        return self.space.config.objspace.usemodules._vmprof
+
+    def start(self, interval, max_samples, max_depth):
+        self.free_buffer()
+        self.traceback_size = max_depth * 2 + 4
+        self.sample_words = HEADER_WORDS + self.traceback_size
+        self.buffer = lltype.malloc(rffi.SIGNEDP.TO,
+                                    buffer_words(max_samples, max_depth),
+                                    flavor='raw', track_allocation=False)
+        self.max_samples = max_samples
+        self.num_samples = 0
+        self.first_sample_id = -1
+        # the GC reads the new interval after the next minor collection
+        self.interval = interval
+
+    def stop(self):
+        self.interval = 0
+
+    def free_buffer(self):
+        if self.buffer:
+            lltype.free(self.buffer, flavor='raw', track_allocation=False)
+            self.buffer = lltype.nullptr(rffi.SIGNEDP.TO)
+        self.max_samples = 0
+        self.num_samples = 0
+
+    @rgc.no_collect
+    def record_sample(self, sample_id, size):
+        if self.interval == 0:
+            return
+        if self.num_samples >= self.max_samples:
+            return
+        if self.first_sample_id < 0:
+            self.first_sample_id = sample_id
+        p = rffi.ptradd(self.buffer, self.num_samples * self.sample_words)
+        p[0] = sample_id
+        p[1] = size
+        p[2] = 0
+        length = 0
+        if self.with_traceback():
+            length = traceback.fill_traceback(
+                rffi.ptradd(p, HEADER_WORDS), self.traceback_size)
+        p[3] = length
+        self.num_samples += 1
+
+    @rgc.no_collect
+    def mark_promoted(self, sample_id):
+        index = sample_id - self.first_sample_id
+        if self.first_sample_id < 0 or not (0 <= index < self.num_samples):
+            return
+        p = rffi.ptradd(self.buffer, index * self.sample_words)
+        if p[0] == sample_id:
+            p[2] = 1
+
+
+class TracebackCollector(object):
+    def __init__(self):
+        self.codes_w = []
+
+def _collect_code(pycode, loc, collector):
+    collector.codes_w.append(pycode)
+
+
+@unwrap_spec(interval=int, max_samples=int, max_depth=int)
+def start_alloc_profiling(space, interval=512*1024, max_samples=10000,
+                          max_depth=32):
+    """Start sampling the allocations: roughly every 'interval' bytes
+    allocated, record the size of the allocation and the Python traceback
+    (at most 'max_depth' frames) which did it, and if the object survives
+    the next minor collection.  At most 'max_samples' samples are recorded.
+    Previous samples are discarded.
+    """
+    if interval <= 0 or max_samples <= 0 or max_depth < 0:
+        raise oefmt(space.w_ValueError,
+                    "interval and max_samples must be > 0, "
+                    "and max_depth must be >= 0")
+    try:
+        buffer_words(max_samples, max_depth)
+    except OverflowError:
+        raise oefmt(space.w_ValueError,
+                    "max_samples and max_depth are too large")
+    space.fromcache(AllocProfiler).start(interval, max_samples, max_depth)
+
+def stop_alloc_profiling(space):
+    """Stop sampling the allocations.  The samples recorded so far are
+    still returned by get_alloc_profile().
+    """
+    space.fromcache(AllocProfiler).stop()
+
+def get_alloc_profile(space):
+    """Return the list of samples recorded since start_alloc_profiling()
+    as tuples (size, promoted, codes), where 'promoted' is True if the
+    object survived a minor collection, and 'codes' is the list of code
+    objects of the traceback, innermost first (empty if the _vmprof module
+    is not available).
+    """
+    profiler = space.fromcache(AllocProfiler)
+    result_w = []
+    for i in range(profiler.num_samples):
+        p = rffi.ptradd(profiler.buffer, i * profiler.sample_words)
+        collector = TracebackCollector()
+        if profiler.with_traceback():
+            traceback.walk_traceback(PyCode, _collect_code, collector,
+                                     rffi.ptradd(p, HEADER_WORDS), p[3])
+        codes_w = [space.w_None if pycode is None else pycode
+                   for pycode in collector.codes_w]
+        result_w.append(space.newtuple([space.newint(p[1]),
+                                        space.newbool(p[2] != 0),
+                                        space.newlist(codes_w)]))
+    return space.newlist(result_w)
@@ -7,6 +7,7 @@ from pypy.interpreter.gateway import interp2app, unwrap_spec, WrappedDefault
 from pypy.interpreter.baseobjspace import W_Root
 from pypy.interpreter.typedef import TypeDef, interp_attrproperty, GetSetProperty
 from pypy.interpreter.executioncontext import AsyncAction
+from pypy.module.gc.allocprofile import AllocProfiler
 
 inf = float("inf")
 
@@ -24,6 +25,7 @@ class LowLevelGcHooks(GcHooks):
     def __init__(self, space):
         self.space = space
         self.w_hooks = space.fromcache(W_AppLevelHooks)
+        self.alloc_profiler = space.fromcache(AllocProfiler)
 
     def is_gc_minor_enabled(self):
         return self.w_hooks.gc_minor_enabled
@@ -34,6 +36,9 @@ class LowLevelGcHooks(GcHooks):
     def is_gc_collect_enabled(self):
         return self.w_hooks.gc_collect_enabled
 
+    def get_alloc_sample_interval(self):
+        return self.alloc_profiler.interval
+
     def on_gc_minor(self, duration, total_memory_used, pinned_objects):
         action = self.w_hooks.gc_minor
         action.count += 1
@@ -68,6 +73,12 @@ class LowLevelGcHooks(GcHooks):
         action.rawmalloc_bytes_after = rawmalloc_bytes_after
         action.fire()
 
+    def on_gc_alloc_sample(self, sample_id, size):
+        self.alloc_profiler.record_sample(sample_id, size)
+
+    def on_gc_alloc_sample_promoted(self, sample_id):
+        self.alloc_profiler.mark_promoted(sample_id)
+
 
 class W_AppLevelHooks(W_Root):
 
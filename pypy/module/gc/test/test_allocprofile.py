@@ -0,0 +1,68 @@
+import pytest
+from pypy.module.gc.hook import LowLevelGcHooks
+from pypy.interpreter.baseobjspace import ObjSpace
+from pypy.interpreter.gateway import interp2app, unwrap_spec
+
+class AppTestAllocProfile(object):
+
+    def setup_class(cls):
+        if cls.runappdirect:
+            pytest.skip("these tests cannot work with -A")
+        space = cls.space
+        gchooks = space.fromcache(LowLevelGcHooks)
+
+        @unwrap_spec(ObjSpace)
+        def get_interval(space):
+            return space.newint(gchooks.get_alloc_sample_interval())
+
+        @unwrap_spec(ObjSpace, int, int)
+        def fire_sample(space, sample_id, size):
+            gchooks.fire_gc_alloc_sample(sample_id, size)
+
+        @unwrap_spec(ObjSpace, int)
+        def fire_promoted(space, sample_id):
+            gchooks.fire_gc_alloc_sample_promoted(sample_id)
+
+        cls.w_get_interval = space.wrap(interp2app(get_interval))
+        cls.w_fire_sample = space.wrap(interp2app(fire_sample))
+        cls.w_fire_promoted = space.wrap(interp2app(fire_promoted))
+
+    def test_start_stop(self):
+        import gc
+        assert self.get_interval() == 0
+        gc.start_alloc_profiling(interval=1000)
+        assert self.get_interval() == 1000
+        gc.stop_alloc_profiling()
+        assert self.get_interval() == 0
+        raises(ValueError, gc.start_alloc_profiling, interval=0)
+        raises(ValueError, gc.start_alloc_profiling, max_samples=-1)
+        import sys
+        raises(ValueError, gc.start_alloc_profiling, max_samples=sys.maxint)
+        raises(ValueError, gc.start_alloc_profiling,
+               max_samples=sys.maxint // 8)
+        raises(ValueError, gc.start_alloc_profiling, max_depth=sys.maxint)
+        raises(ValueError, gc.start_alloc_profiling, max_samples=10**7)
+        assert self.get_interval() == 0
+
+    def test_samples(self):
+        import gc
+        self.fire_sample(1, 16)       # not profiling, ignored
+        gc.start_alloc_profiling(interval=1000, max_samples=3)
+        self.fire_sample(2, 24)
+        self.fire_sample(3, 48)
+        self.fire_promoted(1)
+        self.fire_promoted(3)
+        self.fire_sample(4, 32)
+        self.fire_sample(5, 64)       # buffer full, ignored
+        self.fire_promoted(5)
+        gc.stop_alloc_profiling()
+        self.fire_sample(6, 16)       # not profiling any more, ignored
+        res = gc.get_alloc_profile()
+        assert [(size, promoted) for (size, promoted, codes) in res] == [
+            (24, False), (48, True), (32, False)]
+        for size, promoted, codes in res:
+            assert isinstance(codes, list)
+        #
+        gc.start_alloc_profiling()
+        assert gc.get_alloc_profile() == []
+        gc.stop_alloc_profiling()
@@ -364,7 +364,7 @@ class TestNumpyJit(LLJitMixin):
     def test_conversion(self):
         result = self.run("conversion")
         assert result == sum(range(30)) + sum(range(30))
-        self.check_vectorized(4, 2) # only sum and astype(int) succeed
+        self.check_vectorized(4, 2) # only the int sum and astype(int) succeed
 
     def define_sum():
         return """
@@ -374,7 +374,7 @@ class TestNumpyJit(LLJitMixin):
     def test_sum(self):
         result = self.run("sum")
         assert result == sum(range(30))
-        self.check_vectorized(1, 0)
+        self.check_vectorized(1, 1) # float sums are vectorized too
 
     def define_sum_int():
         return """
@@ -398,7 +398,7 @@ class TestNumpyJit(LLJitMixin):
     def test_sum_multi(self):
         result = self.run("sum_multi")
         assert result == sum(range(30)) + sum(range(60))
-        self.check_vectorized(1, 0)
+        self.check_vectorized(1, 1)
 
     def define_sum_float_to_int16():
         return """
@@ -2,6 +2,8 @@ from pypy.interpreter.mixedmodule import MixedModule
 
 class Module(MixedModule):
     appleveldefs = {
+        'save_warmup_state': 'app_warmup.save_warmup_state',
+        'load_warmup_state': 'app_warmup.load_warmup_state',
     }
 
     interpleveldefs = {
@@ -17,6 +19,14 @@ class Module(MixedModule):
         'set_trace_too_long_hook': 'interp_resop.set_trace_too_long_hook',
         'get_stats_snapshot': 'interp_resop.get_stats_snapshot',
         'get_stats_asmmemmgr': 'interp_resop.get_stats_asmmemmgr',
+        'enable_guard_stats': 'interp_resop.enable_guard_stats',
+        'disable_guard_stats': 'interp_resop.disable_guard_stats',
+        'get_guard_stats': 'interp_resop.get_guard_stats',
+        'prepare_for_fork': 'interp_resop.prepare_for_fork',
+        'compile_deferred_loops': 'interp_resop.compile_deferred_loops',
+        'start_warmup_recording': 'warmup.start_warmup_recording',
+        '_get_warmup_state': 'warmup.get_warmup_state',
+        '_set_warmup_state': 'warmup.set_warmup_state',
         # those things are disabled because they have bugs, but if
         # they're found to be useful, fix test_ztranslation_jit_stats
         # in the backend first. get_stats_snapshot still produces
@@ -0,0 +1,25 @@
+import marshal
+
+MAGIC = 'pypyjit-warmup-1'
+
+def save_warmup_state(filename):
+    """Save into 'filename' the places where the JIT compiled loops since
+    start_warmup_recording() or load_warmup_state() was called."""
+    import pypyjit
+    entries = pypyjit._get_warmup_state()
+    with open(filename, 'wb') as f:
+        marshal.dump((MAGIC, entries), f)
+
+def load_warmup_state(filename):
+    """Load a file written by save_warmup_state().  The places it lists
+    are traced as soon as they run once, in the code objects created
+    from now on: call this early, before the modules are imported.  This
+    also starts recording, so that save_warmup_state() can be called
+    again at the end of the run."""
+    import pypyjit
+    with open(filename, 'rb') as f:
+        data = marshal.load(f)
+    if (not isinstance(data, tuple) or len(data) != 2 or
+            data[0] != MAGIC):
+        raise ValueError("%r is not a JIT warmup file" % (filename,))
+    pypyjit._set_warmup_state(data[1])
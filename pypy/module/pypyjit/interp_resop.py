@@ -390,13 +390,75 @@ def get_stats_snapshot(space):
     space.setitem_str(w_counter_times, 'BACKEND', space.newfloat(b_time))
     return W_JitInfoSnapshot(space, w_times, w_counters, w_counter_times)
 
-def get_stats_asmmemmgr(space):
+@unwrap_spec(evictions=bool)
+def get_stats_asmmemmgr(space, evictions=False):
     """Returns the raw memory currently used by the JIT backend,
-    as a pair (total_memory_allocated, memory_in_use)."""
+    as a pair (total_memory_allocated, memory_in_use).  If 'evictions'
+    is True, two more items are returned: the number of loops freed so
+    far because of the 'loop_memory_limit' JIT parameter, and the total
+    size of their machine code."""
     m1 = jit_hooks.stats_asmmemmgr_allocated(None)
     m2 = jit_hooks.stats_asmmemmgr_used(None)
+    if evictions:
+        n = jit_hooks.stats_memmgr_evicted_loops(None)
+        m3 = jit_hooks.stats_memmgr_evicted_bytes(None)
+        return space.newtuple([space.newint(m1), space.newint(m2),
+                               space.newint(n), space.newint(m3)])
     return space.newtuple([space.newint(m1), space.newint(m2)])
 
+def enable_guard_stats(space):
+    """Start counting the failures of the guards, and the bridges
+    attached to them, in the loops and bridges compiled from now on.
+    See get_guard_stats().
+    """
+    jit_hooks.stats_set_guard_stats(None, True)
+
+def disable_guard_stats(space):
+    """Stop counting the failures of the guards, and forget the
+    counts collected so far.
+    """
+    jit_hooks.stats_set_guard_stats(None, False)
+
+def get_guard_stats(space):
+    """Return a list of tuples (hash, loop_no, failures, bridges,
+    location), one for every guard compiled since enable_guard_stats()
+    and not freed yet.  'hash' is the same as GuardOp.hash, 'loop_no' is
+    the JitLoopInfo.loop_no of the loop which contains the guard or
+    one of its bridges, 'failures' counts the failures which did not
+    go to a bridge, 'bridges' counts the bridges attached to the guard,
+    and 'location' is the position in the source code of the guard.
+    """
+    ll_stats = jit_hooks.stats_get_guard_stats(None)
+    result_w = []
+    for i in range(len(ll_stats)):
+        stat = ll_stats[i]
+        result_w.append(space.newtuple([space.newint(stat.hash),
+                                        space.newint(stat.loop_no),
+                                        space.newint(stat.failures),
+                                        space.newint(stat.bridges),
+                                        space.newtext(hlstr(stat.location))]))
+    return space.newlist(result_w)
+
+def prepare_for_fork(space):
+    """Call this before forking worker processes which keep running the
+    code already compiled by the JIT.  The machine code is then left
+    untouched by the compilations that follow, so that its pages stay
+    shared copy-on-write between all the workers.  The counters of the
+    JIT are kept in a separate table, which each worker updates on its
+    own; they are not reset, so the workers start with everything the
+    parent process learned.
+    """
+    jit_hooks.cpu_prepare_for_fork(None)
+
+def compile_deferred_loops(space):
+    """Compile now the loops that were traced but not compiled yet,
+    because the 'deferred_compile' parameter is set.  Call this when
+    the program is idle, e.g. between two requests in a server, so that
+    the JIT compilation doesn't delay the next request.  Without this
+    call, each loop is compiled when it gets hot a second time.
+    """
+    jit_hooks.metainterp_compile_deferred_loops(None)
+
 def enable_debug(space):
     """ Set the jit debugging - completely necessary for some stats to work,
     most notably assembler counters.
@@ -0,0 +1,154 @@
+import py
+from pypy.interpreter.gateway import interp2app, unwrap_spec
+from pypy.interpreter.pycode import CodeHookCache
+from rpython.jit.metainterp.history import (JitCellToken, ConstInt, ConstPtr,
+    BasicFailDescr)
+from rpython.jit.metainterp.logger import Logger
+from rpython.rtyper.annlowlevel import cast_instance_to_base_ptr
+from rpython.rtyper.lltypesystem import lltype, llmemory
+from rpython.rlib.jit import JitDebugInfo
+from rpython.tool.udir import udir
+from pypy.module.pypyjit import warmup
+from pypy.module.pypyjit.hooks import pypy_hooks
+from pypy.module.pypyjit.test.test_jit_hook import MockJitDriverSD, MockSD
+
+
+def test_code_key(space):
+    w_code = space.appexec([], """():
+        def f(x):
+            return x + 1
+        return f.__code__
+    """)
+    key = warmup.code_key(w_code)
+    assert key.startswith('%s:f:' % (w_code.co_filename,))
+    w_code2 = space.appexec([], """():
+        def f(x):
+            return x * 1
+        return f.__code__
+    """)
+    assert warmup.code_key(w_code2) != key
+
+
+class AppTestWarmup(object):
+    spaceconfig = dict(usemodules=('pypyjit',))
+
+    def setup_class(cls):
+        if cls.runappdirect:
+            py.test.skip("Can't run this test with -A")
+        space = cls.space
+        cls.traced = []
+
+        @unwrap_spec(next_instr=int, is_bridge=int)
+        def interp_on_compile(w_code, next_instr, is_bridge):
+            ll_code = cast_instance_to_base_ptr(w_code)
+            code_gcref = lltype.cast_opaque_ptr(llmemory.GCREF, ll_code)
+            greenkey = [ConstInt(next_instr), ConstInt(0),
+                        ConstPtr(code_gcref)]
+            logger = Logger(MockSD())
+            if is_bridge:
+                di = JitDebugInfo(MockJitDriverSD, logger, JitCellToken(), [],
+                                  'bridge', fail_descr=BasicFailDescr())
+                if pypy_hooks.are_hooks_enabled():
+                    pypy_hooks.after_compile_bridge(di)
+            else:
+                di = JitDebugInfo(MockJitDriverSD, logger, JitCellToken(), [],
+                                  'loop', greenkey)
+                if pypy_hooks.are_hooks_enabled():
+                    pypy_hooks.after_compile(di)
+
+        def interp_traced():
+            return space.newlist([space.newtuple([w_code,
+                                                  space.newint(next_instr)])
+                                  for next_instr, w_code in cls.traced])
+
+        def interp_is_replaying():
+            cache = space.fromcache(CodeHookCache)
+            return space.newbool(cache._jit_warmup is not None)
+
+        def fake_trace_next_iteration(space, next_instr, is_being_profiled,
+                                      w_pycode):
+            cls.traced.append((next_instr, w_pycode))
+
+        cls.orig_trace_next_iteration = warmup.trace_next_iteration
+        warmup.trace_next_iteration = fake_trace_next_iteration
+        cls.w_on_compile = space.wrap(interp2app(interp_on_compile))
+        cls.w_tmpdir = space.wrap(str(udir.ensure('test_warmup', dir=1)))
+        cls.w_traced = space.wrap(interp2app(interp_traced))
+        cls.w_is_replaying = space.wrap(interp2app(interp_is_replaying))
+
+    def teardown_class(cls):
+        warmup.trace_next_iteration = cls.orig_trace_next_iteration
+        state = cls.space.fromcache(warmup.WarmupState)
+        state.recording = False
+        state.compiled_loops = {}
+        state.pending = {}
+        state.pending_names = {}
+        cls.space.fromcache(CodeHookCache)._jit_warmup = None
+
+    def test_save_load(self):
+        import pypyjit
+        src = "def f():\n    for i in range(10):\n        pass\n"
+        d = {}
+        exec(compile(src, 'warmup_test.py', 'exec'), d)
+        self.on_compile(d['f'].__code__, 6, True)
+        assert pypyjit._get_warmup_state() == []
+        self.on_compile(d['f'].__code__, 6, False)
+        assert pypyjit._get_warmup_state() == []  # not recording yet
+        pypyjit.start_warmup_recording()
+        self.on_compile(d['f'].__code__, 6, False)
+        self.on_compile(d['f'].__code__, 6, False)
+        self.on_compile(d['f'].__code__, 6, True)
+        state = pypyjit._get_warmup_state()
+        assert len(state) == 1
+        key, next_instr, is_being_profiled = state[0]
+        assert 'warmup_test.py:f:1:' in key
+        assert next_instr == 6
+        assert is_being_profiled is False
+        #
+        import os
+        filename = os.path.join(self.tmpdir, 'warmup')
+        pypyjit.save_warmup_state(filename)
+        assert self.traced() == []
+        pypyjit.load_warmup_state(filename)
+        d2 = {}
+        exec(compile(src, 'warmup_test.py', 'exec'), d2)
+        src2 = src.replace('pass', 'i += 1')
+        exec(compile(src2, 'warmup_test.py', 'exec'), {})
+        traced = self.traced()
+        assert len(traced) == 1
+        assert traced[0][0] is d2['f'].__code__
+        assert traced[0][1] == 6
+        assert self.is_replaying()
+
+    def test_same_key_traced_each_time(self):
+        import pypyjit
+        src = ("def g():\n    for i in range(10):\n        pass\n"
+               "    return 42\n")
+        d = {}
+        exec(compile(src, 'warmup_test2.py', 'exec'), d)
+        pypyjit.start_warmup_recording()
+        self.on_compile(d['g'].__code__, 6, False)
+        state = [entry for entry in pypyjit._get_warmup_state()
+                 if 'warmup_test2.py' in entry[0]]
+        assert len(state) == 1
+        pypyjit._set_warmup_state(state)
+        before = len(self.traced())
+        codes = []
+        for i in range(3):
+            # e.g. a function defined in a loop: the code objects have all
+            # got the same key
+            d = {}
+            exec(compile(src, 'warmup_test2.py', 'exec'), d)
+            codes.append(d['g'].__code__)
+        traced = self.traced()[before:]
+        assert len(traced) == 3
+        for (code, next_instr), expected in zip(traced, codes):
+            assert code is expected
+            assert next_instr == 6
+
+    def test_load_invalid(self):
+        import pypyjit, os, marshal
+        filename = os.path.join(self.tmpdir, 'not_warmup')
+        with open(filename, 'wb') as f:
+            marshal.dump((1, 2), f)
+        raises(ValueError, pypyjit.load_warmup_state, filename)
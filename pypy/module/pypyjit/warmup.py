@@ -0,0 +1,114 @@
+"""
+Warm-start of the JIT.
+
+The machine code and the traces refer to objects of the process in which
+they were made, so they cannot be reused by another process.  What we
+save instead is the list of the places where loops were compiled.  A new
+process which loads this list asks the JIT to trace these places on
+their next iteration, instead of waiting for their counters to reach the
+threshold.  The places are identified by the file name, name, first line
+number and a checksum of the bytecode of the code objects, so that they
+no longer match if the source code changes.
+"""
+
+from rpython.rlib import rmd5
+from rpython.rtyper.lltypesystem import lltype
+from rpython.rtyper.annlowlevel import cast_base_ptr_to_instance
+from rpython.rtyper.rclass import OBJECT
+from pypy.interpreter.pycode import PyCode, CodeHookCache
+from pypy.module.pypyjit.interp_jit import trace_next_iteration
+
+
+def code_name_key(pycode):
+    return '%s:%s:%d' % (pycode.co_filename, pycode.co_name,
+                         pycode.co_firstlineno)
+
+def code_key(pycode):
+    return '%s:%s' % (code_name_key(pycode),
+                      rmd5.RMD5(pycode.co_code).hexdigest())
+
+def _name_key_of(key):
+    # the code_name_key() part of a code_key()
+    end = key.rfind(':')
+    assert end >= 0
+    return key[:end]
+
+
+class WarmupState(object):
+    """
+    This is expected to be a singleton, created by space.fromcache.
+    """
+
+    def __init__(self, space):
+        self.space = space
+        self.recording = False
+        # (key of the code object, next_instr, is_being_profiled) -> None,
+        # so that a place where loops are compiled again is only kept once
+        self.compiled_loops = {}
+        # key of the code objects -> list of (next_instr, is_being_profiled).
+        # The entries are kept for the whole process, since several code
+        # objects can have the same key (e.g. a function defined in a loop)
+        self.pending = {}
+        # the code_name_key() of the keys in 'pending', to compute the
+        # checksum of the bytecode only for the code objects which may match
+        self.pending_names = {}
+
+    def record_loop(self, jitdriver, greenkey):
+        # called by the JIT hooks after compiling a loop
+        if greenkey is None or jitdriver.name != 'pypyjit':
+            return
+        next_instr = greenkey[0].getint()
+        is_being_profiled = bool(greenkey[1].getint())
+        ll_code = lltype.cast_opaque_ptr(lltype.Ptr(OBJECT),
+                                         greenkey[2].getref_base())
+        pycode = cast_base_ptr_to_instance(PyCode, ll_code)
+        place = (code_key(pycode), next_instr, is_being_profiled)
+        self.compiled_loops[place] = None
+
+    def new_code(self, pycode):
+        # called by PyCode.new_code_hook() for all the code objects created
+        # after a warmup state was loaded
+        if code_name_key(pycode) not in self.pending_names:
+            return
+        locations = self.pending.get(code_key(pycode), None)
+        if locations is not None:
+            for next_instr, is_being_profiled in locations:
+                trace_next_iteration(self.space, next_instr,
+                                     is_being_profiled, pycode)
+
+
+def start_warmup_recording(space):
+    """Start recording the places where the JIT compiles loops, for
+    save_warmup_state()."""
+    space.fromcache(WarmupState).recording = True
+
+def get_warmup_state(space):
+    """Return the list of places where loops were compiled since the
+    recording started, as (code_key, next_instr, is_being_profiled)."""
+    state = space.fromcache(WarmupState)
+    result_w = []
+    for key, next_instr, is_being_profiled in state.compiled_loops:
+        result_w.append(space.newtuple([
+            space.newtext(key), space.newint(next_instr),
+            space.newbool(is_being_profiled)]))
+    return space.newlist(result_w)
+
+def set_warmup_state(space, w_entries):
+    """Set the list of places, as returned by get_warmup_state(), that
+    are traced on their next iteration in code objects created from now
+    on.  This also starts the recording."""
+    state = space.fromcache(WarmupState)
+    pending = {}
+    for w_entry in space.listview(w_entries):
+        w_key, w_next_instr, w_is_being_profiled = space.fixedview(w_entry, 3)
+        key = space.text_w(w_key)
+        location = (space.int_w(w_next_instr),
+                    space.is_true(w_is_being_profiled))
+        pending.setdefault(key, []).append(location)
+    state.pending = pending
+    state.pending_names = {}
+    for key in pending:
+        state.pending_names[_name_key_of(key)] = None
+    state.recording = True
+    if pending:
+        space.fromcache(CodeHookCache)._jit_warmup = state
@@ -55,7 +55,7 @@ class W_DictMultiObject(W_Root):
     @staticmethod
     def allocate_and_init_instance(space, w_type=None, module=False,
                                    instance=False, strdict=False,
-                                   kwargs=False):
+                                   kwargs=False, sharedkeys=False):
         if module:
             from pypy.objspace.std.celldict import ModuleDictStrategy
             assert w_type is None
@@ -76,6 +76,11 @@ class W_DictMultiObject(W_Root):
             assert w_type is None
             from pypy.objspace.std.kwargsdict import EmptyKwargsDictStrategy
             strategy = space.fromcache(EmptyKwargsDictStrategy)
+        elif sharedkeys:
+            assert w_type is None
+            from pypy.objspace.std.sharedkeysdict import (
+                EmptySharedKeysDictStrategy)
+            strategy = space.fromcache(EmptySharedKeysDictStrategy)
         else:
             strategy = space.fromcache(EmptyDictStrategy)
         if w_type is None:
@@ -651,13 +656,23 @@ class EmptyDictStrategy(DictStrategy):
             self.switch_to_object_strategy(w_dict)
 
     def switch_to_bytes_strategy(self, w_dict):
-        strategy = self.space.fromcache(BytesDictStrategy)
+        if self.space.config.objspace.std.withsharedkeysdict:
+            from pypy.objspace.std.sharedkeysdict import (
+                BytesSharedKeysDictStrategy)
+            strategy = self.space.fromcache(BytesSharedKeysDictStrategy)
+        else:
+            strategy = self.space.fromcache(BytesDictStrategy)
         storage = strategy.get_empty_storage()
         w_dict.set_strategy(strategy)
         w_dict.dstorage = storage
 
     def switch_to_unicode_strategy(self, w_dict):
-        strategy = self.space.fromcache(UnicodeDictStrategy)
+        if self.space.config.objspace.std.withsharedkeysdict:
+            from pypy.objspace.std.sharedkeysdict import (
+                UnicodeSharedKeysDictStrategy)
+            strategy = self.space.fromcache(UnicodeSharedKeysDictStrategy)
+        else:
+            strategy = self.space.fromcache(UnicodeDictStrategy)
         storage = strategy.get_empty_storage()
         w_dict.set_strategy(strategy)
         w_dict.dstorage = storage
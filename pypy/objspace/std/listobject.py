@@ -303,6 +303,10 @@ class W_ListObject(W_Root):
         """Find w_item in list[start:end]. If not found, raise ValueError"""
         return self.strategy.find(self, w_item, start, end)
 
+    def count(self, w_item):
+        """Return the number of items of the list equal to w_item"""
+        return self.strategy.count(self, w_item)
+
     def append(self, w_item):
         """L.append(object) -- append object to end"""
         self.strategy.append(self, w_item)
@@ -633,14 +637,7 @@ class W_ListObject(W_Root):
     def descr_count(self, space, w_value):
         '''L.count(value) -> integer -- return number of
         occurrences of value'''
-        # needs to be safe against eq_w() mutating the w_list behind our back
-        count = 0
-        i = 0
-        while i < self.length():
-            if space.eq_w(self.getitem(i), w_value):
-                count += 1
-            i += 1
-        return space.newint(count)
+        return space.newint(self.count(w_value))
 
     @unwrap_spec(index=int)
     def descr_insert(self, space, index, w_value):
@@ -796,6 +793,17 @@ class ListStrategy(object):
             i += 1
         raise ValueError
 
+    def count(self, w_list, w_item):
+        space = self.space
+        # needs to be safe against eq_w() mutating the w_list behind our back
+        count = 0
+        i = 0
+        while i < w_list.length():
+            if space.eq_w(w_list.getitem(i), w_item):
+                count += 1
+            i += 1
+        return count
+
     def length(self, w_list):
         raise NotImplementedError
 
@@ -1390,6 +1398,23 @@ class AbstractUnwrappedStrategy(object):
                 return i
         raise ValueError
 
+    def count(self, w_list, w_obj):
+        if self.is_correct_type(w_obj):
+            return self._safe_count(w_list, self.unwrap(w_obj))
+        return ListStrategy.count(self, w_list, w_obj)
+
+    def _safe_count(self, w_list, obj):
+        # uses _safe_find() to compare the items like list.index() does
+        count = 0
+        i = 0
+        while True:
+            try:
+                i = self._safe_find(w_list, obj, i, sys.maxint)
+            except ValueError:
+                return count
+            count += 1
+            i += 1
+
     def length(self, w_list):
         return len(self.unerase(w_list.lstorage))
 
@@ -959,22 +959,34 @@ class MapDictIteratorItems(BaseItemIterator):
 # ____________________________________________________________
 # Magic caching
 
+# every name of a code object has a small polymorphic cache: a chain of
+# entries, the most recently filled one first.  An entry is used by
+# LOAD_ATTR, LOOKUP_METHOD or STORE_ATTR, depending on its kind, and there
+# are at most MAX_CACHE_ENTRIES entries of each kind, so that these opcodes
+# don't trash each other's entries.  When a site sees more maps than that,
+# the entries of its kind collapse into a single megamorphic entry, which
+# is refilled in place on every miss, like the original monomorphic cache.
+MAX_CACHE_ENTRIES = 4
+
+KIND_LOAD = 0
+KIND_METHOD = 1
+KIND_STORE = 2
+
 class CacheEntry(object):
     version_tag = None
     storageindex = 0
     w_method = None # for callmethod
+    kind = KIND_LOAD
+    megamorphic = False
+    next = None
     success_counter = 0
     failure_counter = 0
 
-    def is_valid_for_obj(self, w_obj):
-        map = w_obj._get_mapdict_map()
-        return self.is_valid_for_map(map)
-
     @jit.dont_look_inside
-    def is_valid_for_map(self, map):
+    def is_valid_for_map(self, map, kind):
         # note that 'map' can be None here
         mymap = self.map_wref()
-        if mymap is not None and mymap is map:
+        if mymap is not None and mymap is map and self.kind == kind:
             version_tag = map.terminator.w_cls.version_tag()
             if version_tag is self.version_tag:
                 # everything matches, it's incredibly fast
@@ -985,35 +997,144 @@ class CacheEntry(object):
 
 _invalid_cache_entry_map = objectmodel.instantiate(AbstractAttribute)
 _invalid_cache_entry_map.terminator = None
+_invalid_cache_entry_wref = weakref.ref(_invalid_cache_entry_map)
 INVALID_CACHE_ENTRY = CacheEntry()
-INVALID_CACHE_ENTRY.map_wref = weakref.ref(_invalid_cache_entry_map)
+INVALID_CACHE_ENTRY.map_wref = _invalid_cache_entry_wref
                                  # different from any real map ^^^
 
+class InlineCacheCounters(object):
+    """Hits and misses of the caches of LOAD_ATTR, LOOKUP_METHOD and
+    STORE_ATTR, by attribute name.  Only with withmethodcachecounter."""
+    def __init__(self, space):
+        self.hits = {}
+        self.misses = {}
+
+def _count_cache_lookup(pycode, nameindex, hit):
+    space = pycode.space
+    name = space.text_w(pycode.co_names_w[nameindex])
+    counters = space.fromcache(InlineCacheCounters)
+    if hit:
+        counters.hits[name] = counters.hits.get(name, 0) + 1
+    else:
+        counters.misses[name] = counters.misses.get(name, 0) + 1
+
 def init_mapdict_cache(pycode):
     num_entries = len(pycode.co_names_w)
     pycode._mapdict_caches = [INVALID_CACHE_ENTRY] * num_entries
 
 @jit.dont_look_inside
-def _fill_cache(pycode, nameindex, map, version_tag, storageindex, w_method=None):
+def _find_cache_entry(pycode, nameindex, map, kind):
+    entry = pycode._mapdict_caches[nameindex]
+    while entry is not None:
+        if entry.is_valid_for_map(map, kind):
+            if pycode.space.config.objspace.std.withmethodcachecounter:
+                _count_cache_lookup(pycode, nameindex, True)
+            return entry
+        entry = entry.next
+    return None
+
+@jit.dont_look_inside
+def _fill_cache(pycode, nameindex, map, version_tag, storageindex,
+                w_method=None, kind=KIND_LOAD):
     if not pycode.space._side_effects_ok():
         return
-    entry = pycode._mapdict_caches[nameindex]
-    if entry is INVALID_CACHE_ENTRY:
-        entry = CacheEntry()
-        pycode._mapdict_caches[nameindex] = entry
-    entry.map_wref = weakref.ref(map)
+    # look for the entry of the same map and kind, or for the megamorphic
+    # entry of this kind; remember an entry whose map died, to recycle it,
+    # and the least recently filled entry of this kind
+    first = pycode._mapdict_caches[nameindex]
+    entry = None
+    dead = None
+    oldest = None
+    count = 0
+    current = first
+    while current is not None and current is not INVALID_CACHE_ENTRY:
+        mymap = current.map_wref()
+        if current.kind == kind:
+            if current.megamorphic or mymap is map:
+                entry = current
+                break
+            if mymap is not None:
+                count += 1
+                oldest = current
+        if mymap is None and dead is None:
+            dead = current
+        current = current.next
+    drop_kind = False
+    if entry is None:
+        if count >= MAX_CACHE_ENTRIES:
+            # too many maps: keep a single entry of this kind from now on
+            entry = oldest
+            entry.megamorphic = True
+            drop_kind = True
+        elif dead is not None:
+            entry = dead
+            entry.megamorphic = False
+        else:
+            entry = CacheEntry()
+            entry.map_wref = _invalid_cache_entry_wref
+    if entry.map_wref() is not map:
+        entry.map_wref = weakref.ref(map)
     entry.version_tag = version_tag
     entry.storageindex = storageindex
     entry.w_method = w_method
+    entry.kind = kind
     if pycode.space.config.objspace.std.withmethodcachecounter:
         entry.failure_counter += 1
+    # put it first, followed by the other entries in the same order
+    if first is INVALID_CACHE_ENTRY:
+        first = None
+    last = entry
+    current = first
+    while current is not None:
+        nextentry = current.next
+        if current is not entry and not (drop_kind and current.kind == kind):
+            last.next = current
+            last = current
+        current = nextentry
+    last.next = None
+    pycode._mapdict_caches[nameindex] = entry
+
+def _find_attr_for_name(space, map, w_type, version_tag, name):
+    """Return the attribute of 'map' that 'obj.name' reads or writes, if
+    the class doesn't interfere; otherwise return None."""
+    # We need to care for obscure cases in which the w_descr is
+    # a MutableCell, which may change without changing the version_tag
+    _, w_descr = w_type._pure_lookup_where_with_method_cache(
+        name, version_tag)
+    #
+    attrname, index = ("", INVALID)
+    if w_descr is None:
+        attrname, index = (name, DICT) # common case: no such attr in the class
+    elif isinstance(w_descr, MutableCell):
+        pass              # we have a MutableCell in the class: give up
+    elif space.is_data_descr(w_descr):
+        # we have a data descriptor, which means the dictionary value
+        # (if any) has no relevance.
+        from pypy.interpreter.typedef import Member
+        if isinstance(w_descr, Member):    # it is a slot -- easy case
+            attrname, index = ("slot", SLOTS_STARTING_FROM + w_descr.index)
+    else:
+        # There is a non-data descriptor in the class.  If there is
+        # also a dict attribute, use the latter, caching its storageindex.
+        # If not, we loose.  We could do better in this case too,
+        # but we don't care too much; the common case of a method
+        # invocation is handled by LOOKUP_METHOD_xxx below.
+        attrname = name
+        index = DICT
+    #
+    if index == INVALID:
+        return None
+    # Note that if map.terminator is a DevolvedDictTerminator
+    # or the class provides its own dict, not using mapdict, then:
+    # map.find_map_attr will always return None if index==DICT.
+    return map.find_map_attr(attrname, index)
 
 def LOAD_ATTR_caching(pycode, w_obj, nameindex):
     # this whole mess is to make the interpreter quite a bit faster; it's not
     # used if we_are_jitted().
-    entry = pycode._mapdict_caches[nameindex]
     map = w_obj._get_mapdict_map()
-    if entry.is_valid_for_map(map) and entry.w_method is None:
+    entry = _find_cache_entry(pycode, nameindex, map, KIND_LOAD)
+    if entry is not None:
         # everything matches, it's incredibly fast
         return w_obj._mapdict_read_storage(entry.storageindex)
     return LOAD_ATTR_slowpath(pycode, w_obj, nameindex, map)
@@ -1022,6 +1143,8 @@ LOAD_ATTR_caching._always_inline_ = True
 def LOAD_ATTR_slowpath(pycode, w_obj, nameindex, map):
     space = pycode.space
     w_name = pycode.co_names_w[nameindex]
+    if space.config.objspace.std.withmethodcachecounter:
+        _count_cache_lookup(pycode, nameindex, False)
     if map is not None:
         w_type = map.terminator.w_cls
         w_descr = w_type.getattribute_if_not_from_object()
@@ -1030,53 +1153,63 @@ def LOAD_ATTR_slowpath(pycode, w_obj, nameindex, map):
         version_tag = w_type.version_tag()
         if version_tag is not None:
             name = space.text_w(w_name)
-            # We need to care for obscure cases in which the w_descr is
-            # a MutableCell, which may change without changing the version_tag
-            _, w_descr = w_type._pure_lookup_where_with_method_cache(
-                name, version_tag)
-            #
-            attrname, index = ("", INVALID)
-            if w_descr is None:
-                attrname, index = (name, DICT) # common case: no such attr in the class
-            elif isinstance(w_descr, MutableCell):
-                pass              # we have a MutableCell in the class: give up
-            elif space.is_data_descr(w_descr):
-                # we have a data descriptor, which means the dictionary value
-                # (if any) has no relevance.
-                from pypy.interpreter.typedef import Member
-                if isinstance(w_descr, Member):    # it is a slot -- easy case
-                    attrname, index = ("slot", SLOTS_STARTING_FROM + w_descr.index)
-            else:
-                # There is a non-data descriptor in the class.  If there is
-                # also a dict attribute, use the latter, caching its storageindex.
-                # If not, we loose.  We could do better in this case too,
-                # but we don't care too much; the common case of a method
-                # invocation is handled by LOOKUP_METHOD_xxx below.
-                attrname = name
-                index = DICT
-            #
-            if index != INVALID:
-                attr = map.find_map_attr(attrname, index)
-                if attr is not None:
-                    # Note that if map.terminator is a DevolvedDictTerminator
-                    # or the class provides its own dict, not using mapdict, then:
-                    # map.find_map_attr will always return None if index==DICT.
-                    _fill_cache(pycode, nameindex, map, version_tag, attr.storageindex)
-                    return w_obj._mapdict_read_storage(attr.storageindex)
+            attr = _find_attr_for_name(space, map, w_type, version_tag, name)
+            if attr is not None:
+                _fill_cache(pycode, nameindex, map, version_tag, attr.storageindex)
+                return w_obj._mapdict_read_storage(attr.storageindex)
     if space.config.objspace.std.withmethodcachecounter:
         INVALID_CACHE_ENTRY.failure_counter += 1
     return space.getattr(w_obj, w_name)
 LOAD_ATTR_slowpath._dont_inline_ = True
 
+def STORE_ATTR_caching(pycode, w_obj, nameindex, w_value):
+    # same as LOAD_ATTR_caching, for writing an attribute which the object
+    # already has; not used if we_are_jitted().
+    map = w_obj._get_mapdict_map()
+    entry = _find_cache_entry(pycode, nameindex, map, KIND_STORE)
+    if entry is not None:
+        w_obj._mapdict_write_storage(entry.storageindex, w_value)
+        return
+    STORE_ATTR_slowpath(pycode, w_obj, nameindex, map, w_value)
+STORE_ATTR_caching._always_inline_ = True
+
+def STORE_ATTR_slowpath(pycode, w_obj, nameindex, map, w_value):
+    from pypy.objspace.descroperation import object_setattr
+    space = pycode.space
+    w_name = pycode.co_names_w[nameindex]
+    if space.config.objspace.std.withmethodcachecounter:
+        _count_cache_lookup(pycode, nameindex, False)
+    space.setattr(w_obj, w_name, w_value)
+    # cache only the writes that don't change the map
+    if map is None or w_obj._get_mapdict_map() is not map:
+        return
+    w_type = map.terminator.w_cls
+    version_tag = w_type.version_tag()
+    if version_tag is None:
+        return
+    name = space.text_w(w_name)
+    attr = _find_attr_for_name(space, map, w_type, version_tag, name)
+    # the fast path doesn't set 'ever_mutated', the write above did it
+    if attr is None or not attr.ever_mutated:
+        return
+    _, w_setattr = w_type._pure_lookup_where_with_method_cache(
+        '__setattr__', version_tag)
+    if w_setattr is not object_setattr(space):
+        return
+    _fill_cache(pycode, nameindex, map, version_tag, attr.storageindex,
+                kind=KIND_STORE)
+STORE_ATTR_slowpath._dont_inline_ = True
+
 def LOOKUP_METHOD_mapdict(f, nameindex, w_obj):
     pycode = f.getcode()
-    entry = pycode._mapdict_caches[nameindex]
-    if entry.is_valid_for_obj(w_obj):
-        w_method = entry.w_method
-        if w_method is not None:
-            f.pushvalue(w_method)
-            f.pushvalue(w_obj)
-            return True
+    map = w_obj._get_mapdict_map()
+    entry = _find_cache_entry(pycode, nameindex, map, KIND_METHOD)
+    if entry is not None:
+        f.pushvalue(entry.w_method)
+        f.pushvalue(w_obj)
+        return True
+    if pycode.space.config.objspace.std.withmethodcachecounter:
+        _count_cache_lookup(pycode, nameindex, False)
     return False
 
 def LOOKUP_METHOD_mapdict_fill_cache_method(space, pycode, name, nameindex,
@@ -1095,8 +1228,5 @@ def LOOKUP_METHOD_mapdict_fill_cache_method(space, pycode, name, nameindex,
     map = w_obj._get_mapdict_map()
     if map is None or isinstance(map.terminator, DevolvedDictTerminator):
         return
-    _fill_cache(pycode, nameindex, map, version_tag, -1, w_method)
-
-# XXX fix me: if a function contains a loop with both LOAD_ATTR and
-# XXX LOOKUP_METHOD on the same attribute name, it keeps trashing and
-# XXX rebuilding the cache
+    _fill_cache(pycode, nameindex, map, version_tag, -1, w_method,
+                kind=KIND_METHOD)
@@ -4,11 +4,14 @@ from pypy.interpreter.error import OperationError, oefmt
 from pypy.interpreter.signature import Signature
 from pypy.interpreter.typedef import TypeDef
 from pypy.objspace.std.bytesobject import W_BytesObject
+from pypy.objspace.std.floatobject import W_FloatObject
 from pypy.objspace.std.intobject import W_IntObject
+from pypy.objspace.std.tupleobject import W_AbstractTupleObject
 from pypy.objspace.std.unicodeobject import W_UnicodeObject
 from pypy.objspace.std.util import IDTAG_SPECIAL, IDTAG_SHIFT
 
-from rpython.rlib.objectmodel import r_dict
+from rpython.rlib.longlong2float import float2longlong
+from rpython.rlib.objectmodel import r_dict, compute_hash
 from rpython.rlib.objectmodel import iterkeys_with_hash, contains_with_hash
 from rpython.rlib.objectmodel import setitem_with_hash, delitem_with_hash
 from rpython.rlib.rarithmetic import intmask, r_uint
@@ -797,6 +800,10 @@ class EmptySetStrategy(SetStrategy):
             strategy = self.space.fromcache(BytesSetStrategy)
         elif type(w_key) is W_UnicodeObject:
             strategy = self.space.fromcache(UnicodeSetStrategy)
+        elif type(w_key) is W_FloatObject:
+            strategy = self.space.fromcache(FloatSetStrategy)
+        elif _is_int_pair(self.space, w_key):
+            strategy = self.space.fromcache(IntPairSetStrategy)
         elif self.space.type(w_key).compares_by_identity():
             strategy = self.space.fromcache(IdentitySetStrategy)
         else:
@@ -1246,6 +1253,10 @@ class BytesSetStrategy(AbstractUnwrappedSetStrategy, SetStrategy):
             return False
         elif strategy is self.space.fromcache(IdentitySetStrategy):
             return False
+        elif strategy is self.space.fromcache(FloatSetStrategy):
+            return False
+        elif strategy is self.space.fromcache(IntPairSetStrategy):
+            return False
         return True
 
     def unwrap(self, w_item):
@@ -1285,6 +1296,10 @@ class UnicodeSetStrategy(AbstractUnwrappedSetStrategy, SetStrategy):
             return False
         elif strategy is self.space.fromcache(IdentitySetStrategy):
             return False
+        elif strategy is self.space.fromcache(FloatSetStrategy):
+            return False
+        elif strategy is self.space.fromcache(IntPairSetStrategy):
+            return False
         return True
 
     def unwrap(self, w_item):
@@ -1326,6 +1341,8 @@ class IntegerSetStrategy(AbstractUnwrappedSetStrategy, SetStrategy):
             return False
         elif strategy is self.space.fromcache(IdentitySetStrategy):
             return False
+        elif strategy is self.space.fromcache(IntPairSetStrategy):
+            return False
         return True
 
     def unwrap(self, w_item):
@@ -1338,6 +1355,101 @@ class IntegerSetStrategy(AbstractUnwrappedSetStrategy, SetStrategy):
         return IntegerIteratorImplementation(self.space, self, w_set)
 
 
+def _float_eq(x, y):
+    # like space.eq_w() on two floats: a NaN is equal to itself
+    return x == y or float2longlong(x) == float2longlong(y)
+
+def _float_hash(x):
+    return compute_hash(x)
+
+class FloatSetStrategy(AbstractUnwrappedSetStrategy, SetStrategy):
+    erase, unerase = rerased.new_erasing_pair("float")
+    erase = staticmethod(erase)
+    unerase = staticmethod(unerase)
+
+    intersect_jmp = jit.JitDriver(greens = [], reds = 'auto',
+                                  name='set(float).intersect')
+
+    def get_empty_storage(self):
+        return self.erase(self.get_empty_dict())
+
+    def get_empty_dict(self):
+        return r_dict(_float_eq, _float_hash)
+
+    def is_correct_type(self, w_key):
+        return type(w_key) is W_FloatObject
+
+    def may_contain_equal_elements(self, strategy):
+        if strategy is self.space.fromcache(BytesSetStrategy):
+            return False
+        elif strategy is self.space.fromcache(UnicodeSetStrategy):
+            return False
+        elif strategy is self.space.fromcache(EmptySetStrategy):
+            return False
+        elif strategy is self.space.fromcache(IdentitySetStrategy):
+            return False
+        elif strategy is self.space.fromcache(IntPairSetStrategy):
+            return False
+        return True
+
+    def unwrap(self, w_item):
+        return self.space.float_w(w_item)
+
+    def wrap(self, item):
+        return self.space.newfloat(item)
+
+    def iter(self, w_set):
+        return FloatIteratorImplementation(self.space, self, w_set)
+
+
+def _is_int_pair(space, w_key):
+    if not space.is_w(space.type(w_key), space.w_tuple):
+        return False
+    assert isinstance(w_key, W_AbstractTupleObject)
+    if w_key.length() != 2:
+        return False
+    return (type(w_key.getitem(space, 0)) is W_IntObject and
+            type(w_key.getitem(space, 1)) is W_IntObject)
+
+class IntPairSetStrategy(AbstractUnwrappedSetStrategy, SetStrategy):
+    """Sets of (int, int) tuples, e.g. the edges of a graph.  The elements
+    are stored as pairs of machine ints; the tuples are rebuilt when they
+    are read back, like the ints of IntegerSetStrategy."""
+    erase, unerase = rerased.new_erasing_pair("intpair")
+    erase = staticmethod(erase)
+    unerase = staticmethod(unerase)
+
+    intersect_jmp = jit.JitDriver(greens = [], reds = 'auto',
+                                  name='set(intpair).intersect')
+
+    def get_empty_storage(self):
+        return self.erase({})
+
+    def get_empty_dict(self):
+        return {}
+
+    def is_correct_type(self, w_key):
+        return _is_int_pair(self.space, w_key)
+
+    def may_contain_equal_elements(self, strategy):
+        if strategy is self.space.fromcache(ObjectSetStrategy):
+            return True
+        return False
+
+    def unwrap(self, w_item):
+        space = self.space
+        assert isinstance(w_item, W_AbstractTupleObject)
+        return (space.int_w(w_item.getitem(space, 0)),
+                space.int_w(w_item.getitem(space, 1)))
+
+    def wrap(self, item):
+        space = self.space
+        return space.newtuple([space.newint(item[0]), space.newint(item[1])])
+
+    def iter(self, w_set):
+        return IntPairIteratorImplementation(self.space, self, w_set)
+
+
 class ObjectSetStrategy(AbstractUnwrappedSetStrategy, SetStrategy):
     erase, unerase = rerased.new_erasing_pair("object")
     erase = staticmethod(erase)
@@ -1413,6 +1525,10 @@ class IdentitySetStrategy(AbstractUnwrappedSetStrategy, SetStrategy):
             return False
         if strategy is self.space.fromcache(UnicodeSetStrategy):
             return False
+        if strategy is self.space.fromcache(FloatSetStrategy):
+            return False
+        if strategy is self.space.fromcache(IntPairSetStrategy):
+            return False
         return True
 
     def unwrap(self, w_item):
@@ -1514,6 +1630,30 @@ class IntegerIteratorImplementation(IteratorImplementation):
         else:
             return None
 
+class FloatIteratorImplementation(IteratorImplementation):
+    def __init__(self, space, strategy, w_set):
+        IteratorImplementation.__init__(self, space, strategy, w_set)
+        d = strategy.unerase(w_set.sstorage)
+        self.iterator = d.iterkeys()
+
+    def next_entry(self):
+        for key in self.iterator:
+            return self.space.newfloat(key)
+        else:
+            return None
+
+class IntPairIteratorImplementation(IteratorImplementation):
+    def __init__(self, space, strategy, w_set):
+        IteratorImplementation.__init__(self, space, strategy, w_set)
+        d = strategy.unerase(w_set.sstorage)
+        self.iterator = d.iterkeys()
+
+    def next_entry(self):
+        for key in self.iterator:
+            return self.strategy.wrap(key)
+        else:
+            return None
+
 class IdentityIteratorImplementation(IteratorImplementation):
     def __init__(self, space, strategy, w_set):
         IteratorImplementation.__init__(self, space, strategy, w_set)
@@ -1605,6 +1745,13 @@ def set_strategy_and_setdata(space, w_set, w_iterable):
         w_set.sstorage = strategy.get_storage_from_unwrapped_list(intlist)
         return
 
+    floatlist = space.listview_float(w_iterable)
+    if floatlist is not None:
+        strategy = space.fromcache(FloatSetStrategy)
+        w_set.strategy = strategy
+        w_set.sstorage = strategy.get_storage_from_unwrapped_list(floatlist)
+        return
+
     length_hint = space.length_hint(w_iterable, 0)
 
     if jit.isconstant(length_hint):
@@ -1644,6 +1791,24 @@ def _pick_correct_strategy_unroll(space, w_set, w_iterable):
         w_set.sstorage = w_set.strategy.get_storage_from_list(iterable_w)
         return
 
+    # check for floats
+    for w_item in iterable_w:
+        if type(w_item) is not W_FloatObject:
+            break
+    else:
+        w_set.strategy = space.fromcache(FloatSetStrategy)
+        w_set.sstorage = w_set.strategy.get_storage_from_list(iterable_w)
+        return
+
+    # check for (int, int) tuples
+    for w_item in iterable_w:
+        if not _is_int_pair(space, w_item):
+            break
+    else:
+        w_set.strategy = space.fromcache(IntPairSetStrategy)
+        w_set.sstorage = w_set.strategy.get_storage_from_list(iterable_w)
+        return
+
     # check for compares by identity
     for w_item in iterable_w:
         if not space.type(w_item).compares_by_identity():
@@ -0,0 +1,384 @@
+"""dict implementation which shares its keys with the other dicts that got
+the same string keys in the same order.
+
+Like the maps of mapdict: a layout is a chain of keys, shared between all
+the dicts which have these keys, and each dict only stores a list of
+values.  The dict devolves to the BytesDictStrategy or UnicodeDictStrategy
+when a key is deleted, or when a new key doesn't fit in a layout (too many
+keys, or too many different keys after the same ones).
+"""
+
+from rpython.rlib import jit, rerased
+from rpython.rlib.objectmodel import import_from_mixin
+
+from pypy.objspace.std.dictmultiobject import (
+    BytesDictStrategy, DictStrategy, EmptyDictStrategy, ObjectDictStrategy,
+    UnicodeDictStrategy, W_DictObject, _never_equal_to_string,
+    create_iterator_classes)
+from pypy.objspace.std.kwargsdict import ZipItemsWithHash
+
+
+# the maximum number of keys of a layout
+LIMIT_KEYS = 32
+# the maximum number of different keys which can follow the same layout
+LIMIT_TRANSITIONS = 16
+# the maximum number of layouts which start with the same first key
+LIMIT_CHAIN_LAYOUTS = 1000
+
+
+class AbstractKeysLayout(object):
+    """A layout only stores its last key, the others are found by following
+    'back', like the attributes of mapdict."""
+    _immutable_fields_ = ['back', 'key', 'length', 'first']
+
+    def __init__(self, back, key):
+        self.back = back
+        self.transitions = None
+        self.num_layouts = 0     # only used on the first layout of a chain
+        if back is None:
+            self.length = 0
+            self.first = None
+        else:
+            assert key is not None
+            self.key = key
+            self.length = back.length + 1
+            if back.back is None:
+                self.first = self
+                self.num_layouts = 1
+            else:
+                self.first = back.first
+
+    @jit.elidable
+    def find_index(self, key):
+        layout = self
+        while layout.back is not None:
+            if layout.key == key:
+                return layout.length - 1
+            layout = layout.back
+        return -1
+
+    def get_keys(self):
+        """Return a new list of the keys of the layout, in order."""
+        keys = []
+        layout = self
+        while layout.back is not None:
+            keys.append(layout.key)
+            layout = layout.back
+        keys.reverse()
+        return keys
+
+    @jit.elidable
+    def _get_next_layout(self, key):
+        if self.transitions is None:
+            return None
+        return self.transitions.get(key, None)
+
+    def get_next_layout(self, strategy, key):
+        """Return the layout with 'key' added, or None if it would be
+        one layout too many."""
+        layout = self._get_next_layout(key)
+        if layout is None:
+            layout = self._add_next_layout(strategy, key)
+        return layout
+
+    def _add_next_layout(self, strategy, key):
+        if self.transitions is None:
+            self.transitions = {}
+        first = self.first
+        if (self.length >= LIMIT_KEYS or
+                len(self.transitions) >= LIMIT_TRANSITIONS or
+                (first is not None and
+                     first.num_layouts >= LIMIT_CHAIN_LAYOUTS) or
+                not strategy.space._side_effects_ok()):
+            return None
+        layout = strategy.KeysLayout(self, key)
+        self.transitions[key] = layout
+        if first is not None:
+            first.num_layouts += 1
+        return layout
+
+
+class AbstractSharedKeysStorage(object):
+    def __init__(self, layout, values_w):
+        self.layout = layout
+        self.values_w = values_w
+
+
+class AbstractSharedKeysDictStrategy(object):
+    def __init__(self, space):
+        DictStrategy.__init__(self, space)
+        self.root = self.KeysLayout(None, None)
+
+    def get_empty_storage(self):
+        return self.erase(self.Storage(self.root, []))
+
+    def new_storage(self, keys, values_w):
+        """Return the (unerased) storage of a dict with these keys and
+        values, or None if they don't fit in a layout."""
+        layout = self.root
+        for key in keys:
+            layout = layout.get_next_layout(self, key)
+            if layout is None:
+                return None
+        return self.Storage(layout, values_w)
+
+    def setitem(self, w_dict, w_key, w_value):
+        if self.is_correct_type(w_key):
+            self.setitem_unwrapped(w_dict, self.unwrap(w_key), w_value)
+        else:
+            self.switch_to_object_strategy(w_dict)
+            w_dict.setitem(w_key, w_value)
+
+    def setitem_str(self, w_dict, key, w_value):
+        self.setitem(w_dict, self.space.newtext(key), w_value)
+
+    def setitem_unwrapped(self, w_dict, key, w_value):
+        storage = self.unerase(w_dict.dstorage)
+        layout = storage.layout
+        index = layout.find_index(key)
+        if index >= 0:
+            storage.values_w[index] = w_value
+            return
+        layout = layout.get_next_layout(self, key)
+        if layout is None:
+            self.switch_to_devolved_strategy(w_dict)
+            w_dict.setitem(self.wrap(key), w_value)
+            return
+        storage.layout = layout
+        storage.values_w.append(w_value)
+
+    def setdefault(self, w_dict, w_key, w_default):
+        if self.is_correct_type(w_key):
+            key = self.unwrap(w_key)
+            w_result = self.getitem_unwrapped(w_dict, key)
+            if w_result is not None:
+                return w_result
+            self.setitem_unwrapped(w_dict, key, w_default)
+            return w_default
+        else:
+            self.switch_to_object_strategy(w_dict)
+            return w_dict.setdefault(w_key, w_default)
+
+    def delitem(self, w_dict, w_key):
+        if self.is_correct_type(w_key):
+            self.switch_to_devolved_strategy(w_dict)
+        else:
+            self.switch_to_object_strategy(w_dict)
+        w_dict.delitem(w_key)
+
+    def length(self, w_dict):
+        return len(self.unerase(w_dict.dstorage).values_w)
+
+    def getitem_str(self, w_dict, key):
+        return self.getitem(w_dict, self.space.newtext(key))
+
+    def getitem_unwrapped(self, w_dict, key):
+        storage = self.unerase(w_dict.dstorage)
+        index = storage.layout.find_index(key)
+        if index >= 0:
+            return storage.values_w[index]
+        return None
+
+    def getitem(self, w_dict, w_key):
+        space = self.space
+        if self.is_correct_type(w_key):
+            return self.getitem_unwrapped(w_dict, self.unwrap(w_key))
+        elif self._never_equal_to(space.type(w_key)):
+            return None
+        else:
+            self.switch_to_object_strategy(w_dict)
+            return w_dict.getitem(w_key)
+
+    def w_keys(self, w_dict):
+        keys = self.unerase(w_dict.dstorage).layout.get_keys()
+        return self.space.newlist([self.wrap(key) for key in keys])
+
+    def values(self, w_dict):
+        return self.unerase(w_dict.dstorage).values_w[:]
+
+    def items(self, w_dict):
+        space = self.space
+        storage = self.unerase(w_dict.dstorage)
+        keys = storage.layout.get_keys()
+        values_w = storage.values_w
+        return [space.newtuple([self.wrap(keys[i]), values_w[i]])
+                for i in range(len(values_w))]
+
+    def popitem(self, w_dict):
+        # removing the last key goes back to the previous layout
+        storage = self.unerase(w_dict.dstorage)
+        layout = storage.layout
+        if layout.back is None:
+            raise KeyError
+        key = layout.key
+        w_value = storage.values_w.pop()
+        storage.layout = layout.back
+        return self.wrap(key), w_value
+
+    def clear(self, w_dict):
+        w_dict.dstorage = self.get_empty_storage()
+
+    def switch_to_object_strategy(self, w_dict):
+        strategy = self.space.fromcache(ObjectDictStrategy)
+        storage = self.unerase(w_dict.dstorage)
+        keys = storage.layout.get_keys()
+        values_w = storage.values_w
+        d_new = strategy.unerase(strategy.get_empty_storage())
+        for i in range(len(values_w)):
+            d_new[self.wrap(keys[i])] = values_w[i]
+        w_dict.set_strategy(strategy)
+        w_dict.dstorage = strategy.erase(d_new)
+
+    def switch_to_devolved_strategy(self, w_dict):
+        strategy = self.space.fromcache(self.DevolvedStrategy)
+        storage = self.unerase(w_dict.dstorage)
+        keys = storage.layout.get_keys()
+        values_w = storage.values_w
+        new_storage = strategy.get_empty_storage()
+        d_new = strategy.unerase(new_storage)
+        for i in range(len(values_w)):
+            d_new[keys[i]] = values_w[i]
+        w_dict.set_strategy(strategy)
+        w_dict.dstorage = new_storage
+
+    def getiterkeys(self, w_dict):
+        return iter(self.unerase(w_dict.dstorage).layout.get_keys())
+
+    def getitervalues(self, w_dict):
+        return iter(self.unerase(w_dict.dstorage).values_w)
+
+    def getiteritems_with_hash(self, w_dict):
+        storage = self.unerase(w_dict.dstorage)
+        return self.ZipItemsWithHash(storage.layout.get_keys(),
+                                     storage.values_w)
+
+
+class BytesKeysLayout(object):
+    import_from_mixin(AbstractKeysLayout)
+
+class BytesSharedKeysStorage(object):
+    import_from_mixin(AbstractSharedKeysStorage)
+
+class BytesZipItemsWithHash(object):
+    import_from_mixin(ZipItemsWithHash,
+                      special_methods=['__init__', '__iter__'])
+
+class BytesSharedKeysDictStrategy(DictStrategy):
+    import_from_mixin(AbstractSharedKeysDictStrategy)
+
+    erase, unerase = rerased.new_erasing_pair("sharedkeys-bytes")
+    erase = staticmethod(erase)
+    unerase = staticmethod(unerase)
+
+    KeysLayout = BytesKeysLayout
+    Storage = BytesSharedKeysStorage
+    ZipItemsWithHash = BytesZipItemsWithHash
+    DevolvedStrategy = BytesDictStrategy
+
+    def wrap(self, unwrapped):
+        return self.space.newbytes(unwrapped)
+
+    def unwrap(self, wrapped):
+        return self.space.bytes_w(wrapped)
+
+    def is_correct_type(self, w_obj):
+        space = self.space
+        return space.is_w(space.type(w_obj), space.w_bytes)
+
+    def _never_equal_to(self, w_lookup_type):
+        return _never_equal_to_string(self.space, w_lookup_type)
+
+    def setitem_str(self, w_dict, key, w_value):
+        assert key is not None
+        self.setitem_unwrapped(w_dict, key, w_value)
+
+    def getitem_str(self, w_dict, key):
+        assert key is not None
+        return self.getitem_unwrapped(w_dict, key)
+
+    def listview_bytes(self, w_dict):
+        return self.unerase(w_dict.dstorage).layout.get_keys()
+
+    def w_keys(self, w_dict):
+        return self.space.newlist_bytes(self.listview_bytes(w_dict))
+
+    def view_as_kwargs(self, w_dict):
+        storage = self.unerase(w_dict.dstorage)
+        return storage.layout.get_keys(), storage.values_w[:]
+
+    def wrapkey(space, key):
+        return space.newbytes(key)
+
+create_iterator_classes(BytesSharedKeysDictStrategy)
+
+
+class UnicodeKeysLayout(object):
+    import_from_mixin(AbstractKeysLayout)
+
+class UnicodeSharedKeysStorage(object):
+    import_from_mixin(AbstractSharedKeysStorage)
+
+class UnicodeZipItemsWithHash(object):
+    import_from_mixin(ZipItemsWithHash,
+                      special_methods=['__init__', '__iter__'])
+
+class UnicodeSharedKeysDictStrategy(DictStrategy):
+    import_from_mixin(AbstractSharedKeysDictStrategy)
+
+    erase, unerase = rerased.new_erasing_pair("sharedkeys-unicode")
+    erase = staticmethod(erase)
+    unerase = staticmethod(unerase)
+
+    KeysLayout = UnicodeKeysLayout
+    Storage = UnicodeSharedKeysStorage
+    ZipItemsWithHash = UnicodeZipItemsWithHash
+    DevolvedStrategy = UnicodeDictStrategy
+
+    def wrap(self, unwrapped):
+        return self.space.newunicode(unwrapped)
+
+    def unwrap(self, wrapped):
+        return self.space.unicode_w(wrapped)
+
+    def is_correct_type(self, w_obj):
+        space = self.space
+        return space.is_w(space.type(w_obj), space.w_unicode)
+
+    def _never_equal_to(self, w_lookup_type):
+        return _never_equal_to_string(self.space, w_lookup_type)
+
+    def listview_unicode(self, w_dict):
+        return self.unerase(w_dict.dstorage).layout.get_keys()
+
+    def wrapkey(space, key):
+        return space.newunicode(key)
+
+create_iterator_classes(UnicodeSharedKeysDictStrategy)
+
+
+class EmptySharedKeysDictStrategy(EmptyDictStrategy):
+    """The strategy of an empty dict which gets the shared-keys strategy
+    when its first key is a string."""
+
+    def switch_to_bytes_strategy(self, w_dict):
+        strategy = self.space.fromcache(BytesSharedKeysDictStrategy)
+        storage = strategy.get_empty_storage()
+        w_dict.set_strategy(strategy)
+        w_dict.dstorage = storage
+
+    def switch_to_unicode_strategy(self, w_dict):
+        strategy = self.space.fromcache(UnicodeSharedKeysDictStrategy)
+        storage = strategy.get_empty_storage()
+        w_dict.set_strategy(strategy)
+        w_dict.dstorage = storage
+
+
+def from_unicode_key_dict_shared(space, d):
+    """Like from_unicode_key_dict(), but shares the keys of 'd' if
+    possible."""
+    from pypy.objspace.std.dictmultiobject import from_unicode_key_dict
+    strategy = space.fromcache(UnicodeSharedKeysDictStrategy)
+    storage = strategy.new_storage(d.keys(), d.values())
+    if storage is None:
+        return from_unicode_key_dict(space, d)
+    return W_DictObject(space, strategy, strategy.erase(storage))
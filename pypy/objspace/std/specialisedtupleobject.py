@@ -1,7 +1,10 @@
 from pypy.interpreter.error import oefmt
-from pypy.objspace.std.tupleobject import W_AbstractTupleObject
+from pypy.objspace.std.tupleobject import (W_AbstractTupleObject,
+    UNROLL_CUTOFF, _unroll_condition, _unroll_condition_cmp)
 from pypy.objspace.std.util import negate
-from rpython.rlib.objectmodel import specialize
+from rpython.rlib import jit
+from rpython.rlib.debug import make_sure_not_resized
+from rpython.rlib.objectmodel import specialize, compute_hash
 from rpython.rlib.rarithmetic import intmask
 from rpython.rlib.unroll import unrolling_iterable
 from rpython.tool.sourcetools import func_with_new_name
@@ -159,6 +162,150 @@ def makespecialisedtuple(space, list_w):
     else:
         raise NotSpecialised
 
+# --------------------------------------------------
+# Tuples of any length whose items are all ints, all floats or all
+# strings: the items are stored unwrapped in a fixed-size list, like the
+# list strategies do.  This takes less memory than a list of boxes and
+# the hash is computed directly from the unwrapped values.
+
+def make_unboxed_class(typ):
+    if typ == int:
+        wrap = lambda space, x: space.newint(x)
+    elif typ == float:
+        wrap = lambda space, x: space.newfloat(x)
+    elif typ == str:
+        wrap = lambda space, x: space.newbytes(x)
+    else:
+        assert 0
+
+    def hash_value(space, value):
+        if typ == int:
+            from pypy.objspace.std.intobject import _hash_int
+            return _hash_int(value)
+        elif typ == float:
+            from pypy.objspace.std.floatobject import _hash_float
+            return _hash_float(space, value)
+        else:
+            # same as W_BytesObject.descr_hash()
+            x = compute_hash(value)
+            x -= (x == -1)
+            return x
+
+    class cls(W_AbstractTupleObject):
+        _immutable_fields_ = ['values[*]']
+
+        def __init__(self, space, values):
+            make_sure_not_resized(values)
+            self.space = space
+            self.values = values
+
+        def length(self):
+            return len(self.values)
+
+        def tolist(self):
+            values = self.values
+            list_w = [None] * len(values)
+            for i in range(len(values)):
+                list_w[i] = wrap(self.space, values[i])
+            return list_w
+
+        # same source code, but builds and returns a resizable list
+        getitems_copy = jit.look_inside_iff(_unroll_condition)(
+            func_with_new_name(tolist, 'getitems_copy'))
+        tolist = jit.look_inside_iff(_unroll_condition)(tolist)
+
+        @jit.look_inside_iff(lambda self, space: _unroll_condition(self))
+        def descr_hash(self, space):
+            mult = 1000003
+            x = 0x345678
+            z = len(self.values)
+            for value in self.values:
+                y = hash_value(space, value)
+                x = (x ^ y) * mult
+                z -= 1
+                mult += 82520 + z + z
+            x += 97531
+            return space.newint(intmask(x))
+
+        def descr_eq(self, space, w_other):
+            if not isinstance(w_other, W_AbstractTupleObject):
+                return space.w_NotImplemented
+            if not isinstance(w_other, cls):
+                return self._descr_eq_wrapped(space, w_other)
+            return self._descr_eq_unboxed(space, w_other)
+
+        @jit.look_inside_iff(_unroll_condition_cmp)
+        def _descr_eq_wrapped(self, space, w_other):
+            values = self.values
+            items_w = w_other.tolist()
+            if len(values) != len(items_w):
+                return space.w_False
+            for i in range(len(values)):
+                if not space.eq_w(wrap(space, values[i]), items_w[i]):
+                    return space.w_False
+            return space.w_True
+
+        @jit.look_inside_iff(_unroll_condition_cmp)
+        def _descr_eq_unboxed(self, space, w_other):
+            values1 = self.values
+            values2 = w_other.values
+            if len(values1) != len(values2):
+                return space.w_False
+            for i in range(len(values1)):
+                if values1[i] != values2[i]:
+                    if typ == float:
+                        # issue with NaNs, which should be equal here
+                        if (float2longlong(values1[i]) ==
+                            float2longlong(values2[i])):
+                            continue
+                    return space.w_False
+            return space.w_True
+
+        descr_ne = negate(descr_eq)
+
+        def getitem(self, space, index):
+            try:
+                value = self.values[index]
+            except IndexError:
+                raise oefmt(space.w_IndexError, "tuple index out of range")
+            return wrap(space, value)
+
+    cls.__name__ = 'W_UnboxedTupleObject_' + typ.__name__[0]
+    return cls
+
+Cls_unboxed_i = make_unboxed_class(int)
+Cls_unboxed_f = make_unboxed_class(float)
+Cls_unboxed_s = make_unboxed_class(str)
+
+@jit.look_inside_iff(lambda space, list_w:
+        jit.loop_unrolling_heuristic(list_w, len(list_w), UNROLL_CUTOFF))
+def makeunboxedtuple(space, list_w):
+    from pypy.objspace.std.bytesobject import W_BytesObject
+    from pypy.objspace.std.intobject import W_IntObject
+    from pypy.objspace.std.floatobject import W_FloatObject
+    if len(list_w) == 0:
+        raise NotSpecialised
+    w_first = list_w[0]
+    if type(w_first) is W_IntObject:
+        for w_item in list_w:
+            if type(w_item) is not W_IntObject:
+                raise NotSpecialised
+        return Cls_unboxed_i(space, [space.int_w(w_item)
+                                     for w_item in list_w])
+    elif type(w_first) is W_FloatObject:
+        for w_item in list_w:
+            if type(w_item) is not W_FloatObject:
+                raise NotSpecialised
+        return Cls_unboxed_f(space, [space.float_w(w_item)
+                                     for w_item in list_w])
+    elif type(w_first) is W_BytesObject:
+        for w_item in list_w:
+            if type(w_item) is not W_BytesObject:
+                raise NotSpecialised
+        return Cls_unboxed_s(space, [space.bytes_w(w_item)
+                                     for w_item in list_w])
+    raise NotSpecialised
+
 # --------------------------------------------------
 # Special code based on list strategies to implement zip(),
 # here with two list arguments only.  This builds a zipped
@@ -1294,6 +1294,7 @@ class Config:
         class std:
             methodcachesizeexp = 11
             withmethodcachecounter = False
+            withsharedkeysdict = False
 
 FakeSpace.config = Config()
 
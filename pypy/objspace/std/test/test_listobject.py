@@ -1180,6 +1180,18 @@ class AppTestListObject(object):
         assert c.count('l') == 2
         assert c.count('h') == 1
         assert c.count('w') == 0
+        l = [1, 2, 1, 3, 1]
+        assert l.count(1) == 3
+        assert l.count(1.0) == 3
+        assert l.count(4) == 0
+        assert l.count("1") == 0
+        l = [1.5, 2.5, 1.5]
+        assert l.count(1.5) == 2
+        assert l.count(3) == 0
+        nan = float("nan")
+        l = [nan, 1.5, nan]
+        assert l.count(nan) == 2
+        assert range(10).count(3) == 1
 
     def test_insert(self):
         c = list('hello world')
@@ -925,6 +925,21 @@ class AppTestWithMapDictAndCounters(object):
             return space.wrap((failures, successes, globalfailures))
         check.unwrap_spec = [gateway.ObjSpace, gateway.W_Root, 'text']
         cls.w_check = cls.space.wrap(gateway.interp2app(check))
+        #
+        def cache_entries(space, w_func, name):
+            w_code = space.getattr(w_func, space.wrap('func_code'))
+            nameindex = map(space.str_w, w_code.co_names_w).index(name)
+            entry = w_code._mapdict_caches[nameindex]
+            result = []
+            while entry is not None and entry is not INVALID_CACHE_ENTRY:
+                result.append(space.newtuple([space.wrap(id(entry)),
+                                              space.wrap(entry.kind),
+                                              space.wrap(entry.megamorphic)]))
+                entry = entry.next
+            return space.newlist(result)
+        cache_entries.unwrap_spec = [gateway.ObjSpace, gateway.W_Root, 'text']
+        cls.w_cache_entries = cls.space.wrap(
+            gateway.interp2app(cache_entries))
 
     def test_simple(self):
         class A(object):
@@ -1154,14 +1169,15 @@ class AppTestWithMapDictAndCounters(object):
                 return 42
 
         """
+        # LOAD_ATTR doesn't use the entry of LOOKUP_METHOD
         res = self.check(f, 'm')
-        assert res == (1, 1, 1)
+        assert res == (1, 0, 1)
         res = self.check(f, 'm')
-        assert res == (0, 2, 1)
+        assert res == (0, 1, 1)
         res = self.check(f, 'm')
-        assert res == (0, 2, 1)
+        assert res == (0, 1, 1)
         res = self.check(f, 'm')
-        assert res == (0, 2, 1)
+        assert res == (0, 1, 1)
 
     def test_dont_keep_class_alive(self):
         import weakref
@@ -1289,6 +1305,29 @@ class AppTestWithMapDictAndCounters(object):
         assert res1 == "mymethod"
         assert res2 == "foobar"
 
+    def test_megamorphic_site(self):
+        classes = [type('A%d' % i, (object,), {}) for i in range(10)]
+        objs = []
+        for cls in classes:
+            obj = cls()
+            obj.x = 42
+            objs.append(obj)
+        def f(objs):
+            for obj in objs:
+                obj.x
+        f(objs[:4])
+        entries = self.cache_entries(f, 'x')
+        assert len(entries) == 4
+        assert not [e for e in entries if e[2]]
+        # a fifth map collapses the entries into a single megamorphic one
+        f(objs)
+        entries = self.cache_entries(f, 'x')
+        assert len(entries) == 1
+        assert entries[0][2]
+        # which is refilled in place from now on
+        f(objs)
+        f(objs)
+        assert self.cache_entries(f, 'x') == entries
 
 
 class AppTestGlobalCaching(AppTestWithMapDict):
@@ -1307,14 +1346,21 @@ class AppTestGlobalCaching(AppTestWithMapDict):
             class C(object):
                 def f(self):
                     return 44
-            l = [A(), B(), C()] * 10
+            class D(object):
+                def f(self):
+                    return 45
+            class E(object):
+                def f(self):
+                    return 46
+            # more classes than the entries of the cache of CALL_METHOD
+            l = [A(), B(), C(), D(), E()] * 10
             __pypy__.reset_method_cache_counter()
             # 'exec' to make sure that a.f() is compiled with CALL_METHOD
             exec """for i, a in enumerate(l):
-                        assert a.f() == 42 + i % 3
+                        assert a.f() == 42 + i % 5
             """ in locals()
             cache_counter = __pypy__.mapdict_cache_counter("f")
-            if cache_counter == (27, 3):
+            if cache_counter == (45, 5):
                 break
             # keep them alive, to make sure that on the
             # next try they have difference addresses
@@ -1335,12 +1381,19 @@ class AppTestGlobalCaching(AppTestWithMapDict):
             class C(object):
                 def __init__(self):
                     self.x = 44
-            l = [A(), B(), C()] * 10
+            class D(object):
+                def __init__(self):
+                    self.x = 45
+            class E(object):
+                def __init__(self):
+                    self.x = 46
+            # more classes than the entries of the cache of LOAD_ATTR
+            l = [A(), B(), C(), D(), E()] * 10
             __pypy__.reset_method_cache_counter()
             for i, a in enumerate(l):
-                assert a.x == 42 + i % 3
+                assert a.x == 42 + i % 5
             cache_counter = __pypy__.mapdict_cache_counter("x")
-            if cache_counter == (27, 3):
+            if cache_counter == (45, 5):
                 break
             # keep them alive, to make sure that on the
             # next try they have difference addresses
@@ -1348,6 +1401,61 @@ class AppTestGlobalCaching(AppTestWithMapDict):
         else:
             assert 0, "failed: got %r" % ([got[1] for got in seen],)
 
+    def test_polymorphic_sites(self):
+        import __pypy__
+        class A(object):
+            def __init__(self):
+                self.x = 42
+            def f(self):
+                return self.x
+        class B(object):
+            def __init__(self):
+                self.y = 0
+                self.x = 43
+            def f(self):
+                return self.x
+        class C(A):
+            pass
+        class D(B):
+            pass
+        l = [A(), B(), C(), D()] * 10
+        __pypy__.reset_method_cache_counter()
+        # 'exec' to make sure that a.f() is compiled with CALL_METHOD
+        exec """for i, a in enumerate(l):
+                    assert a.x == 42 + i % 2
+                    assert a.f() == 42 + i % 2
+                    a.x = a.x
+        """ in locals()
+        # the caches of LOAD_ATTR and STORE_ATTR, the method cache
+        assert __pypy__.attr_cache_counter("x") == (148, 12)
+        assert __pypy__.attr_cache_counter("f") == (36, 4)
+
+    def test_store_attr(self):
+        import __pypy__
+        class A(object):
+            pass
+        class B(object):
+            def __setattr__(self, name, value):
+                object.__setattr__(self, name, value + 1)
+        class C(object):
+            x = property(lambda self: self._x, lambda self, x: 0)
+            def __init__(self):
+                self._x = 42
+        a = A()
+        b = B()
+        c = C()
+        a.x = b.x = 0
+        __pypy__.reset_method_cache_counter()
+        for i in range(10):
+            a.x = i
+            b.x = i
+            c.x = i
+        assert a.x == 9
+        assert b.x == 10
+        assert c.x == 42
+        # only 'a.x = i' is cached, after its first execution
+        assert __pypy__.attr_cache_counter("x") == (9, 24)
+
 class TestDictSubclassShortcutBug(object):
     spaceconfig = {"objspace.std.withmethodcachecounter": True}
 
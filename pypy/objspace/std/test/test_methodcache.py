@@ -36,14 +36,21 @@ class AppTestMethodCaching(test_typeobject.AppTestTypeObject):
             class C(object):
                 def f(self):
                     return 44
-            l = [A(), B(), C()] * 10
+            class D(object):
+                def f(self):
+                    return 45
+            class E(object):
+                def f(self):
+                    return 46
+            # more classes than the entries of the cache of CALL_METHOD
+            l = [A(), B(), C(), D(), E()] * 10
             __pypy__.reset_method_cache_counter()
             for i, a in enumerate(l):
-                assert a.f() == 42 + i % 3
+                assert a.f() == 42 + i % 5
             cache_counter = __pypy__.method_cache_counter("f")
-            assert cache_counter[0] >= 15
-            assert cache_counter[1] >= 3 # should be (27, 3)
-            assert sum(cache_counter) == 30
+            assert cache_counter[0] >= 25
+            assert cache_counter[1] >= 5 # should be (45, 5)
+            assert sum(cache_counter) == 50
 
     def test_class_that_cannot_be_cached(self):
         @self.retry
@@ -63,14 +70,25 @@ class AppTestMethodCaching(test_typeobject.AppTestTypeObject):
             class C(object):
                 def f(self):
                     return 44
-            l = [A(), B(), C()] * 10
+            class D(object):
+                def f(self):
+                    return 45
+            class E(object):
+                def f(self):
+                    return 46
+            class F(object):
+                def f(self):
+                    return 47
+            # more cacheable classes than the entries of the cache of
+            # CALL_METHOD
+            l = [A(), B(), C(), D(), E(), F()] * 10
             __pypy__.reset_method_cache_counter()
             for i, a in enumerate(l):
-                assert a.f() == 42 + i % 3
+                assert a.f() == 42 + i % 6
             cache_counter = __pypy__.method_cache_counter("f")
-            assert cache_counter[0] >= 9
-            assert cache_counter[1] >= 2 # should be (18, 2)
-            assert sum(cache_counter) == 20
+            assert cache_counter[0] >= 25
+            assert cache_counter[1] >= 5 # should be (45, 5)
+            assert sum(cache_counter) == 50
 
     def test_change_methods(self):
         @self.retry
@@ -124,14 +142,19 @@ class AppTestMethodCaching(test_typeobject.AppTestTypeObject):
                     return 43
             class C(A):
                 pass
-            l = [A(), B(), C()] * 10
+            class D(B):
+                pass
+            class E(A):
+                pass
+            # more classes than the entries of the cache of CALL_METHOD
+            l = [A(), B(), C(), D(), E()] * 10
             __pypy__.reset_method_cache_counter()
             for i, a in enumerate(l):
-                assert a.f() == 42 + (i % 3 == 1)
+                assert a.f() == 42 + i % 5 % 2
             cache_counter = __pypy__.method_cache_counter("f")
-            assert cache_counter[0] >= 15
-            assert cache_counter[1] >= 3 # should be (27, 3)
-            assert sum(cache_counter) == 30
+            assert cache_counter[0] >= 25
+            assert cache_counter[1] >= 5 # should be (45, 5)
+            assert sum(cache_counter) == 50
 
     def test_many_names(self):
         @self.retry
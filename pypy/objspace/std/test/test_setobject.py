@@ -81,7 +81,7 @@ class TestW_SetObject:
     def test_create_set_from_list(self):
         from pypy.interpreter.baseobjspace import W_Root
         from pypy.objspace.std.setobject import BytesSetStrategy, ObjectSetStrategy, UnicodeSetStrategy
-        from pypy.objspace.std.floatobject import W_FloatObject
+        from pypy.objspace.std.setobject import FloatSetStrategy
 
         w = self.space.wrap
         wb = self.space.newbytes
@@ -118,9 +118,8 @@ class TestW_SetObject:
         w_list = W_ListObject(self.space, [w(1.0), w(2.0), w(3.0)])
         w_set = W_SetObject(self.space)
         _initialize_set(self.space, w_set, w_list)
-        assert w_set.strategy is self.space.fromcache(ObjectSetStrategy)
-        for item in w_set.strategy.unerase(w_set.sstorage):
-            assert isinstance(item, W_FloatObject)
+        assert w_set.strategy is self.space.fromcache(FloatSetStrategy)
+        assert sorted(w_set.strategy.unerase(w_set.sstorage)) == [1.0, 2.0, 3.0]
 
         # changed cached object, need to change it back for other tests to pass
         intstr.get_storage_from_list = tmp_func
@@ -1032,6 +1031,82 @@ class AppTestAppSetTest:
         s.intersection_update(set())
         assert strategy(s) == "EmptySetStrategy"
 
+    def test_float_strategy(self):
+        from __pypy__ import strategy
+        s = set([1.5, 2.5])
+        assert strategy(s) == "FloatSetStrategy"
+        s = {1.5, 2.5, 3.5}
+        assert strategy(s) == "FloatSetStrategy"
+        s = set(x + 0.5 for x in range(3))
+        assert strategy(s) == "FloatSetStrategy"
+        assert s == set([0.5, 1.5, 2.5])
+        assert 1.5 in s
+        assert 4.5 not in s
+        assert sorted(s & set([1.5, 9.5])) == [1.5]
+        assert strategy(s & set([1.5, 9.5])) == "FloatSetStrategy"
+        assert strategy(s - set([1.5])) == "FloatSetStrategy"
+        assert strategy(s | set([1.5, 9.5])) == "FloatSetStrategy"
+        # NaNs are equal to themselves and 0.0 is equal to -0.0
+        nan = float("nan")
+        s = set([nan, 0.0])
+        s.add(nan)
+        s.add(-0.0)
+        assert len(s) == 2
+        assert nan in s
+        assert str(list(s)[1]) == "0.0"
+        # equal ints
+        s = set([1.0, 2.5])
+        assert 1 in s
+        assert s == set([1, 2.5])
+        s.add(1)
+        assert len(s) == 2
+        assert strategy(s) == "ObjectSetStrategy"
+        assert set([1.0, 2.0]) & set([2, 3]) == set([2])
+
+    def test_int_pair_strategy(self):
+        from __pypy__ import strategy
+        s = set([(1, 2), (2, 3)])
+        assert strategy(s) == "IntPairSetStrategy"
+        s = {(i, i + 1) for i in range(5)}
+        assert strategy(s) == "IntPairSetStrategy"
+        assert (0, 1) in s
+        assert (1, 0) not in s
+        assert sorted(s) == [(0, 1), (1, 2), (2, 3), (3, 4), (4, 5)]
+        s2 = set([(1, 2), (4, 5), (8, 9)])
+        assert strategy(s & s2) == "IntPairSetStrategy"
+        assert s & s2 == set([(1, 2), (4, 5)])
+        assert strategy(s - s2) == "IntPairSetStrategy"
+        assert s - s2 == set([(0, 1), (2, 3), (3, 4)])
+        assert strategy(s | s2) == "IntPairSetStrategy"
+        assert len(s | s2) == 6
+        assert strategy(s ^ s2) == "IntPairSetStrategy"
+        assert s ^ s2 == set([(0, 1), (2, 3), (3, 4), (8, 9)])
+        assert set([(1, 2)]) <= s
+        assert not s.isdisjoint(s2)
+        x = s.pop()
+        assert type(x) is tuple and len(x) == 2
+        # the tuples are rebuilt from the stored ints
+        s = {(1, 2), (3, 4)}
+        assert strategy(s) == "IntPairSetStrategy"
+        assert sorted(iter(s)) == [(1, 2), (3, 4)]
+        x = {(1, 2)}.pop()
+        assert type(x) is tuple and x == (1, 2)
+        assert type(x[0]) is int and type(x[1]) is int
+        #
+        class T(tuple):
+            pass
+        assert strategy(set([T((1, 2))])) == "ObjectSetStrategy"
+        assert strategy(set([(1, 2, 3)])) == "ObjectSetStrategy"
+        assert strategy(set([(1, 2L)])) == "ObjectSetStrategy"
+        s = set([(1, 2)])
+        s.add((1, "a"))
+        assert strategy(s) == "ObjectSetStrategy"
+        assert s == set([(1, 2), (1, "a")])
+        s = set([(1, 2)])
+        assert (1, 2.0) in s
+        assert set([(1, 2)]) != set([1, 2])
+        assert not set([(1, 2)]) & set([1, 2])
+
     def test_weird_exception_from_iterable(self):
         def f():
            raise ValueError
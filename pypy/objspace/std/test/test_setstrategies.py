@@ -1,6 +1,7 @@
 from pypy.objspace.std.setobject import W_SetObject
 from pypy.objspace.std.setobject import (
     BytesIteratorImplementation, BytesSetStrategy, EmptySetStrategy,
+    FloatSetStrategy, IntPairSetStrategy,
     IntegerIteratorImplementation, IntegerSetStrategy, ObjectSetStrategy,
     UnicodeIteratorImplementation, UnicodeSetStrategy)
 from pypy.objspace.std.listobject import W_ListObject
@@ -29,6 +30,15 @@ class TestW_SetStrategies:
         s = W_SetObject(self.space, self.wrapped([u"a", u"b"]))
         assert s.strategy is self.space.fromcache(UnicodeSetStrategy)
 
+        s = W_SetObject(self.space, self.wrapped([1.5, 2.5]))
+        assert s.strategy is self.space.fromcache(FloatSetStrategy)
+
+        s = W_SetObject(self.space, self.wrapped([(1, 2), (3, 4)]))
+        assert s.strategy is self.space.fromcache(IntPairSetStrategy)
+
+        s = W_SetObject(self.space, self.wrapped([(1, 2), (3, 4, 5)]))
+        assert s.strategy is self.space.fromcache(ObjectSetStrategy)
+
     def test_switch_to_object(self):
         s = W_SetObject(self.space, self.wrapped([1,2,3,4,5]))
         s.add(self.space.wrap("six"))
@@ -57,6 +67,23 @@ class TestW_SetStrategies:
         skip("for now intersection with ObjectStrategy always results in another ObjectStrategy")
         assert s3.strategy is self.space.fromcache(IntegerSetStrategy)
 
+    def test_unwrapped_algebra(self):
+        for strategy, l1, l2 in [
+                (FloatSetStrategy, [1.5, 2.5, 3.5], [2.5, 3.5, 4.5]),
+                (IntPairSetStrategy, [(1, 2), (2, 3), (3, 4)],
+                                     [(2, 3), (3, 4), (4, 5)])]:
+            strategy = self.space.fromcache(strategy)
+            s1 = W_SetObject(self.space, self.wrapped(l1))
+            s2 = W_SetObject(self.space, self.wrapped(l2))
+            for s3, length in [(s1.intersect(s2), 2),
+                               (s1.difference(s2), 1),
+                               (s1.symmetric_difference(s2), 2),
+                               (s1.descr_union(self.space, [s2]), 4)]:
+                assert s3.strategy is strategy
+                assert s3.length() == length
+            assert not s1.issubset(s2)
+            assert not s1.isdisjoint(s2)
+
     def test_clear(self):
         s1 = W_SetObject(self.space, self.wrapped([1,2,3,4,5]))
         s1.clear()
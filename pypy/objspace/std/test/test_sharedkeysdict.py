@@ -0,0 +1,237 @@
+from pypy.objspace.std.test.test_dictmultiobject import FakeSpace, W_DictObject
+from pypy.objspace.std.sharedkeysdict import *
+from pypy.objspace.std import sharedkeysdict
+
+space = FakeSpace()
+
+def new_dict(strategy):
+    storage = strategy.get_empty_storage()
+    return W_DictObject(space, strategy, storage)
+
+def test_shared_layout():
+    strategy = BytesSharedKeysDictStrategy(space)
+    d1 = new_dict(strategy)
+    d2 = new_dict(strategy)
+    for d in [d1, d2]:
+        d.setitem_str("a", 1)
+        d.setitem_str("b", 2)
+    s1 = strategy.unerase(d1.dstorage)
+    s2 = strategy.unerase(d2.dstorage)
+    assert s1.layout is s2.layout
+    assert s1.layout.get_keys() == ["a", "b"]
+    assert s1.values_w == [1, 2]
+    assert s1.values_w is not s2.values_w
+    # setting an existing key doesn't change the layout
+    d2.setitem_str("a", 3)
+    assert s2.layout is s1.layout
+    assert d2.getitem_str("a") == 3
+    assert d1.getitem_str("a") == 1
+    # another order gives another layout
+    d3 = new_dict(strategy)
+    d3.setitem_str("b", 2)
+    d3.setitem_str("a", 1)
+    s3 = strategy.unerase(d3.dstorage)
+    assert s3.layout is not s1.layout
+    assert d3.w_keys() == ["b", "a"]
+    assert d1.w_keys() == ["a", "b"]
+
+def test_popitem_goes_back():
+    strategy = BytesSharedKeysDictStrategy(space)
+    d = new_dict(strategy)
+    d.setitem_str("a", 1)
+    layout = strategy.unerase(d.dstorage).layout
+    d.setitem_str("b", 2)
+    assert d.popitem() == ("b", 2)
+    assert strategy.unerase(d.dstorage).layout is layout
+    assert d.get_strategy() is strategy
+
+def test_delitem_devolves():
+    strategy = BytesSharedKeysDictStrategy(space)
+    d = new_dict(strategy)
+    d.setitem_str("a", 1)
+    d.setitem_str("b", 2)
+    d.delitem("a")
+    assert d.get_strategy().__class__.__name__ == "BytesDictStrategy"
+    assert d.w_keys() == ["b"]
+
+def test_limit_keys():
+    strategy = BytesSharedKeysDictStrategy(space)
+    d = new_dict(strategy)
+    for i in range(100):
+        d.setitem_str("d%s" % i, i)
+    assert d.get_strategy().__class__.__name__ == "BytesDictStrategy"
+    assert d.length() == 100
+    assert d.getitem_str("d99") == 99
+
+def test_limit_transitions():
+    strategy = BytesSharedKeysDictStrategy(space)
+    for i in range(sharedkeysdict.LIMIT_TRANSITIONS + 5):
+        d = new_dict(strategy)
+        d.setitem_str("a", 1)
+        d.setitem_str("b%s" % i, 2)
+        if i < sharedkeysdict.LIMIT_TRANSITIONS:
+            assert d.get_strategy() is strategy
+        else:
+            assert d.get_strategy().__class__.__name__ == "BytesDictStrategy"
+        assert d.getitem_str("a") == 1
+        assert d.getitem_str("b%s" % i) == 2
+
+def test_limit_chain_layouts(monkeypatch):
+    monkeypatch.setattr(sharedkeysdict, "LIMIT_CHAIN_LAYOUTS", 5)
+    strategy = BytesSharedKeysDictStrategy(space)
+    # "a", then "a" followed by "b0" .. "b3"
+    for i in range(sharedkeysdict.LIMIT_TRANSITIONS):
+        d = new_dict(strategy)
+        d.setitem_str("a", 1)
+        d.setitem_str("b%s" % i, 2)
+        if i < 4:
+            assert d.get_strategy() is strategy
+        else:
+            assert d.get_strategy().__class__.__name__ == "BytesDictStrategy"
+    # the limit is per chain: the layouts starting with another key
+    # are not affected
+    d = new_dict(strategy)
+    d.setitem_str("b", 1)
+    d.setitem_str("a", 2)
+    assert d.get_strategy() is strategy
+    assert d.w_keys() == ["b", "a"]
+
+def test_layouts_share_their_prefix():
+    strategy = BytesSharedKeysDictStrategy(space)
+    d = new_dict(strategy)
+    d.setitem_str("a", 1)
+    d.setitem_str("b", 2)
+    d.setitem_str("c", 3)
+    layout = strategy.unerase(d.dstorage).layout
+    assert layout.key == "c"
+    assert layout.back.key == "b"
+    assert layout.back.back.key == "a"
+    assert layout.back.back.back is strategy.root
+    assert layout.find_index("a") == 0
+    assert layout.find_index("c") == 2
+    assert layout.find_index("d") == -1
+    assert layout.back.find_index("c") == -1
+
+def test_new_storage():
+    strategy = BytesSharedKeysDictStrategy(space)
+    storage = strategy.new_storage(["a", "b"], [1, 2])
+    d = W_DictObject(space, strategy, strategy.erase(storage))
+    d2 = new_dict(strategy)
+    d2.setitem_str("a", 3)
+    d2.setitem_str("b", 4)
+    assert (strategy.unerase(d.dstorage).layout is
+            strategy.unerase(d2.dstorage).layout)
+    assert d.getitem_str("b") == 2
+    storage = strategy.new_storage(["x%d" % i for i in range(100)],
+                                   range(100))
+    assert storage is None
+
+def test_view_as_kwargs():
+    strategy = BytesSharedKeysDictStrategy(space)
+    d = new_dict(strategy)
+    d.setitem_str("a", 1)
+    d.setitem_str("b", 2)
+    assert space.view_as_kwargs(d) == (["a", "b"], [1, 2])
+
+def test_from_empty():
+    strategy = EmptySharedKeysDictStrategy(space)
+    d = new_dict(strategy)
+    d.setitem_str("a", 3)
+    assert isinstance(d.get_strategy(), BytesSharedKeysDictStrategy)
+
+
+from pypy.objspace.std.test.test_dictmultiobject import BaseTestRDictImplementation, BaseTestDevolvedDictImplementation
+
+class TestSharedKeysDictImplementation(BaseTestRDictImplementation):
+    StrategyClass = BytesSharedKeysDictStrategy
+
+    def test_delitem(self):
+        pass # delitem devolves
+
+    def test_setdefault_fast(self):
+        pass # not based on hashing the keys of the dict
+
+class TestDevolvedSharedKeysDictImplementation(BaseTestDevolvedDictImplementation):
+    StrategyClass = BytesSharedKeysDictStrategy
+
+    def test_setdefault_fast(self):
+        pass # not based on hashing the keys of the dict
+
+
+class AppTestSharedKeysDictStrategy(object):
+    spaceconfig = {"objspace.std.withsharedkeysdict": True,
+                   "usemodules": ["_pypyjson"]}
+
+    def test_create(self):
+        import __pypy__
+        d = {}
+        d["a"] = 1
+        d["b"] = 2
+        assert __pypy__.strategy(d) == "BytesSharedKeysDictStrategy"
+        assert d == {"a": 1, "b": 2}
+        assert d.keys() == ["a", "b"]
+        d = {}
+        d[u"a"] = 1
+        assert __pypy__.strategy(d) == "UnicodeSharedKeysDictStrategy"
+        assert d == {u"a": 1}
+        assert d["a"] == 1
+
+    def test_devolve(self):
+        import __pypy__
+        d = {"a": 1, "b": 2, "c": 3}
+        del d["b"]
+        assert __pypy__.strategy(d) == "BytesDictStrategy"
+        assert d == {"a": 1, "c": 3}
+        d = {"a": 1}
+        d[5] = 6
+        assert __pypy__.strategy(d) == "ObjectDictStrategy"
+        assert d == {"a": 1, 5: 6}
+
+    def test_methods(self):
+        d = {"a": 1, "b": 2}
+        assert d.get("a") == 1
+        assert d.get("c") is None
+        assert d.get(1.5) is None
+        assert d.setdefault("c", 3) == 3
+        assert d.items() == [("a", 1), ("b", 2), ("c", 3)]
+        assert list(d.iteritems()) == [("a", 1), ("b", 2), ("c", 3)]
+        assert list(d.itervalues()) == [1, 2, 3]
+        assert d.popitem() == ("c", 3)
+        assert d.copy() == {"a": 1, "b": 2}
+        assert d.pop("a") == 1
+        assert d == {"b": 2}
+        d.clear()
+        assert d == {}
+
+    def test_iterate_and_change(self):
+        d = {"a": 1, "b": 2}
+        it = d.iteritems()
+        next(it)
+        d["c"] = 3
+        raises(RuntimeError, list, it)
+
+    def test_kwargs(self):
+        def f(**kwargs):
+            return kwargs
+        d = {"a": 1, "b": 2}
+        assert f(**d) == {"a": 1, "b": 2}
+
+    def test_json(self):
+        import __pypy__
+        import _pypyjson
+        l = _pypyjson.loads('[{"a": 1, "b": 2}, {"a": 3, "b": 4}]')
+        assert __pypy__.strategy(l[0]) == "UnicodeSharedKeysDictStrategy"
+        assert __pypy__.strategy(l[1]) == "UnicodeSharedKeysDictStrategy"
+        assert l == [{u"a": 1, u"b": 2}, {u"a": 3, u"b": 4}]
+
+
+class AppTestNewdictSharedKeys(object):
+    def test_newdict(self):
+        import __pypy__
+        d = __pypy__.newdict("sharedkeys")
+        assert __pypy__.strategy(d) == "EmptySharedKeysDictStrategy"
+        d["a"] = 1
+        assert __pypy__.strategy(d) == "BytesSharedKeysDictStrategy"
+        d2 = {}
+        d2["a"] = 1
+        assert __pypy__.strategy(d2) == "BytesDictStrategy"
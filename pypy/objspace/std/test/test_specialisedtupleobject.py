@@ -254,3 +254,124 @@ class AppTestW_SpecialisedTupleObject:
 
 class AppTestAll(test_tupleobject.AppTestW_TupleObject):
     spaceconfig = {"objspace.std.withspecialisedtuple": True}
+
+
+class TestW_UnboxedTupleObject():
+    spaceconfig = {"objspace.std.withunboxedtuple": True}
+
+    def test_isunboxedtupleobject(self):
+        space = self.space
+        w_tuple = space.newtuple([space.wrap(i) for i in range(20)])
+        assert type(w_tuple).__name__ == 'W_UnboxedTupleObject_i'
+        assert w_tuple.values == range(20)
+        w_tuple = space.newtuple([space.wrap(1.5), space.wrap(2.5)])
+        assert type(w_tuple).__name__ == 'W_UnboxedTupleObject_f'
+        w_tuple = space.newtuple([space.newbytes("a"), space.newbytes("b")])
+        assert type(w_tuple).__name__ == 'W_UnboxedTupleObject_s'
+
+    def test_isnotunboxedtupleobject(self):
+        space = self.space
+        for values_w in [[], [space.wrap(1), space.wrap(1.5)],
+                         [space.wrap(1), space.wrap({})],
+                         [space.wrap(1), space.wrap(1L)]]:
+            w_tuple = space.newtuple(values_w)
+            assert type(w_tuple) is W_TupleObject
+
+    def hash_test(self, values):
+        N_values_w = [self.space.wrap(value) for value in values]
+        S_values_w = [self.space.wrap(value) for value in values]
+        N_w_tuple = W_TupleObject(N_values_w)
+        S_w_tuple = self.space.newtuple(S_values_w)
+
+        assert 'W_UnboxedTupleObject' in type(S_w_tuple).__name__
+        assert self.space.is_true(self.space.eq(N_w_tuple, S_w_tuple))
+        assert self.space.is_true(self.space.eq(S_w_tuple, N_w_tuple))
+        assert self.space.is_true(
+                self.space.eq(self.space.hash(N_w_tuple),
+                              self.space.hash(S_w_tuple)))
+
+    def test_hash_against_normal_tuple(self):
+        self.hash_test([-1, -1, -1])
+        self.hash_test([1 << 62, 0, 5])
+        self.hash_test(range(50))
+        self.hash_test([1.5, 2.8, -1.0, 1e300])
+        self.hash_test([float('nan'), float('inf')])
+        self.hash_test(['arbitrary', 'strings', ''])
+        self.hash_test([1])
+
+
+class AppTestW_UnboxedTupleObject:
+    spaceconfig = {"objspace.std.withunboxedtuple": True}
+
+    def w_isunboxed(self, obj, expected=''):
+        import __pypy__
+        r = __pypy__.internal_repr(obj)
+        return ("UnboxedTupleObject_" + expected) in r
+
+    def test_createunboxedtuple(self):
+        assert self.isunboxed((1, 2, 3, 4, 5), 'i')
+        assert self.isunboxed((1.5,), 'f')
+        assert self.isunboxed(('a', 'b', 'c'), 's')
+        assert self.isunboxed(tuple(range(100)), 'i')
+        assert self.isunboxed(tuple([1.5, 2.5]), 'f')
+        assert self.isunboxed((1, 2, 3) + (4,), 'i')
+        assert self.isunboxed((1, 2, 3)[::2], 'i')
+        assert not self.isunboxed(())
+        assert not self.isunboxed((1, 2.5))
+        assert not self.isunboxed((1, u'a'))
+        class I(int):
+            pass
+        assert not self.isunboxed((1, I(2)))
+        class T(tuple):
+            pass
+        assert not self.isunboxed(T((1, 2, 3)))
+
+    def test_items(self):
+        t = tuple(range(10))
+        assert len(t) == 10
+        assert t[0] == 0
+        assert t[-1] == 9
+        raises(IndexError, "t[10]")
+        raises(IndexError, "t[-11]")
+        assert list(t) == range(10)
+        assert t[2:4] == (2, 3)
+        assert 5 in t
+        assert 5.0 in t
+        assert 10 not in t
+        assert t.index(4) == 4
+        assert t.count(3) == 1
+        a, b = ('x', 'y')
+        assert (a, b) == ('x', 'y')
+
+    def test_eq_hash(self):
+        values = [(1, 2, 3), (1.0, 2.0, 3.0), (1L, 2L, 3L), (1, 2.0, 3L)]
+        for a in values:
+            for b in values:
+                assert a == b
+                assert not a != b
+                assert hash(a) == hash(b)
+        assert (1, 2, 3) != (1, 2)
+        assert (1, 2, 3) != (1, 2, 4)
+        assert ('a', 'b') != ('a', 'c')
+        assert hash(('a', 'b')) == hash(('a',) + ('b',))
+        d = {(1, 2, 3): 'x', (1.5, 2.5, 3.5): 'y', ('a', 'b', 'c'): 'z'}
+        assert d[tuple([1, 2, 3])] == 'x'
+        assert d[tuple([1.5, 2.5, 3.5])] == 'y'
+        assert d[tuple('abc')] == 'z'
+
+    def test_nans_and_zeroes(self):
+        N = float('nan')
+        T = (N, N, 1.5)
+        assert N in T
+        assert T == (N, N, 1.5)
+        assert (0.0, 0.0, 0.0) == (-0.0, -0.0, -0.0)
+
+    def test_ordering(self):
+        assert (1, 2, 3) < (1, 2, 4)
+        assert (1, 2, 3) < (1, 2, 3, 0)
+        assert (1.5, 2.5) > (1.5, 2.0)
+        assert ('a', 'b') <= ('a', 'b')
+
+
+class AppTestAllUnboxed(test_tupleobject.AppTestW_TupleObject):
+    spaceconfig = {"objspace.std.withunboxedtuple": True}
@@ -95,6 +95,8 @@ class W_AbstractTupleObject(W_Root):
             return w_sequence
         else:
             tuple_w = space.fixedview(w_sequence)
+        if space.is_w(w_tupletype, space.w_tuple):
+            return space.newtuple(tuple_w)
         w_obj = space.allocate_instance(W_TupleObject, w_tupletype)
         W_TupleObject.__init__(w_obj, tuple_w)
         return w_obj
@@ -352,4 +354,10 @@ def wraptuple(space, list_w):
             return makespecialisedtuple(space, list_w)
         except NotSpecialised:
             pass
+    if space.config.objspace.std.withunboxedtuple:
+        from specialisedtupleobject import makeunboxedtuple, NotSpecialised
+        try:
+            return makeunboxedtuple(space, list_w)
+        except NotSpecialised:
+            pass
     return W_TupleObject(list_w)
@@ -24,6 +24,8 @@ class AsmMemoryManager(object):
         self.free_blocks = {}      # map {start: stop}
         self.free_blocks_end = {}  # map {stop: start}
         self.blocks_by_size = [[] for i in range(self.num_indices)]
+        self.chunks = []           # list of (start, stop) of the mmap()s
+        self.num_shared_chunks = 0 # see prepare_for_fork()
 
     def get_stats(self):
         """Returns stats for rlib.jit.jit_hooks.stats_asmmemmgr_*()."""
@@ -48,7 +50,7 @@ class AsmMemoryManager(object):
         """Free a block (start, stop) returned by a previous malloc()."""
         if r_uint is not None:
             self.total_mallocs -= r_uint(stop - start)
-        self._add_free_block(start, stop)
+        self._add_unshared_free_block(start, stop)
 
     def open_malloc(self, minsize):
         """Allocate at least minsize bytes.  Returns (start, stop)."""
@@ -61,11 +63,43 @@ class AsmMemoryManager(object):
         """Used for freeing the end of an open-allocated block of memory."""
         if stop - middle >= self.min_fragment:
             self.total_mallocs -= r_uint(stop - middle)
-            self._add_free_block(middle, stop)
+            self._add_unshared_free_block(middle, stop)
             return True
         else:
             return False    # too small to record
 
+    def prepare_for_fork(self):
+        """Called before fork(), if the child processes are going to run
+        the machine code already compiled.  From now on, we never allocate
+        again the free parts of the pages that contain this code, so that
+        these pages stay shared copy-on-write by all the children instead
+        of being copied by each child as soon as it compiles more code.
+        Only the free blocks that cover whole pages are kept.
+        """
+        self.num_shared_chunks = len(self.chunks)
+        free_blocks = self.free_blocks.items()
+        self.free_blocks = {}
+        self.free_blocks_end = {}
+        self.blocks_by_size = [[] for i in range(self.num_indices)]
+        for start, stop in free_blocks:
+            self._add_unshared_free_block(start, stop)
+
+    def _in_shared_chunk(self, addr):
+        for i in range(self.num_shared_chunks):
+            start, stop = self.chunks[i]
+            if start <= addr < stop:
+                return True
+        return False
+
+    def _add_unshared_free_block(self, start, stop):
+        if self._in_shared_chunk(start):
+            # only keep the whole pages inside (start, stop)
+            start = (start + rmmap.PAGESIZE - 1) & ~(rmmap.PAGESIZE - 1)
+            stop = stop & ~(rmmap.PAGESIZE - 1)
+            if stop - start < self.min_fragment:
+                return
+        self._add_free_block(start, stop)
+
     def _allocate_large_block(self, minsize):
         # Compute 'size' from 'minsize': it must be rounded up to
         # 'large_alloc_size'.  Additionally, we use the following line
@@ -84,6 +118,7 @@ class AsmMemoryManager(object):
                 rmmap.hint.pos += 0x80000000 - size
         self.total_memory_allocated += r_uint(size)
         data = rffi.cast(lltype.Signed, data)
+        self.chunks.append((data, data + size))
         return self._add_free_block(data, data + size)
 
     def _get_index(self, length):
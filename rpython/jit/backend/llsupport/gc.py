@@ -74,6 +74,8 @@ class GcLLDescription(GcCache):
         pass
     def can_use_nursery_malloc(self, size):
         return False
+    def must_pretenure(self, tid):
+        return False
     def has_write_barrier_class(self):
         return None
     def get_nursery_free_addr(self):
@@ -492,6 +494,20 @@ class GcLLDescr_framework(GcLLDescription):
         self.generate_function('malloc_big_fixedsize', malloc_big_fixedsize,
                                [lltype.Signed] * 2)
 
+        def malloc_fixedsize_pretenured(size, tid):
+            """Allocate an object of a type which the GC wanted outside the
+            nursery when the loop was compiled.  The GC checks again if it
+            still does."""
+            if self.DEBUG:
+                self._random_usage_of_xmm_registers()
+            type_id = llop.extract_ushort(llgroup.HALFWORD, tid)
+            check_typeid(type_id)
+            return llop1.do_malloc_fixedsize_pretenured(llmemory.GCREF,
+                                                        type_id, size)
+        self.generate_function('malloc_fixedsize_pretenured',
+                               malloc_fixedsize_pretenured,
+                               [lltype.Signed] * 2)
+
     def _bh_malloc(self, sizedescr):
         from rpython.memory.gctypelayout import check_typeid
         llop1 = self.llop1
@@ -554,6 +570,14 @@ class GcLLDescr_framework(GcLLDescription):
     def can_use_nursery_malloc(self, size):
         return size < self.max_size_of_young_obj
 
+    def must_pretenure(self, tid):
+        """Ask the GC if the objects of this type should currently be
+        allocated outside the nursery, because they usually survive."""
+        if self.layoutbuilder is None:
+            return False     # tests
+        type_id = llop.extract_ushort(llgroup.HALFWORD, tid)
+        return llop.gc_must_pretenure(lltype.Bool, type_id)
+
     def has_write_barrier_class(self):
         return WriteBarrierDescr
 
@@ -107,6 +107,9 @@ class AbstractLLCPU(AbstractCPU):
         if self.HAS_CODEMAP:
             self.codemap.finish_once()
 
+    def prepare_for_fork(self):
+        self.asmmemmgr.prepare_for_fork()
+
     def compile_loop(self, inputargs, operations, looptoken, jd_id=0,
                      unique_id=0, log=True, name='', logger=None):
         return self.assembler.assemble_loop(jd_id, unique_id, logger, name,
@@ -242,6 +245,15 @@ class AbstractLLCPU(AbstractCPU):
         deadframe = lltype.cast_opaque_ptr(jitframe.JITFRAMEPTR, deadframe)
         return deadframe.jf_savedata
 
+    def get_loop_code_size(self, compiled_loop_token):
+        size = 0
+        if compiled_loop_token is not None:
+            blocks = compiled_loop_token.asmmemmgr_blocks
+            if blocks is not None:
+                for rawstart, rawstop in blocks:
+                    size += rawstop - rawstart
+        return size
+
     def free_loop_and_bridges(self, compiled_loop_token):
         AbstractCPU.free_loop_and_bridges(self, compiled_loop_token)
         # turn off all gcreftracers
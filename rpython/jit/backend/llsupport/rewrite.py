@@ -478,7 +478,11 @@ class GcRewriterAssembler(object):
     def handle_new_fixedsize(self, descr, op):
         assert isinstance(descr, SizeDescr)
         size = descr.size
-        if self.gen_malloc_nursery(size, op):
+        # if the GC wants the objects of this type outside the nursery,
+        # we call it; it checks again at run time, as it may change its mind
+        if self.gc_ll_descr.must_pretenure(descr.tid):
+            self.gen_malloc_pretenured(size, descr.tid, op)
+        elif self.gen_malloc_nursery(size, op):
             self.gen_initialize_tid(op, descr.tid)
         else:
             self.gen_malloc_fixedsize(size, descr.tid, op)
@@ -716,6 +720,20 @@ class GcRewriterAssembler(object):
         # In general, don't add v_result to write_barrier_applied:
         # v_result might be a large young array.
 
+    def gen_malloc_pretenured(self, size, typeid, v_result):
+        """Generate a CALL_R(malloc_fixedsize_pretenured_fn, ...).
+        Only on the framework GC.
+        """
+        assert (size & (WORD-1)) == 0, "size not aligned?"
+        addr = self.gc_ll_descr.get_malloc_fn_addr(
+            'malloc_fixedsize_pretenured')
+        args = [ConstInt(addr), ConstInt(size), ConstInt(typeid)]
+        descr = self.gc_ll_descr.malloc_fixedsize_pretenured_descr
+        self._gen_call_malloc_gc(args, v_result, descr)
+        # the object is either old or in the nursery: either way it was
+        # just allocated, so it doesn't need a write barrier
+        self.remember_write_barrier(v_result)
+
     def gen_malloc_fixedsize(self, size, typeid, v_result):
         """Generate a CALL_R(malloc_fixedsize_fn, ...).
         Used on Boehm, and on the framework GC for large fixed-size
@@ -154,6 +154,30 @@ class TestAsmMemoryManager:
                     assert new_total <= 147456
                     prev_total = new_total
 
+    def test_prepare_for_fork(self):
+        from rpython.rlib.rmmap import PAGESIZE
+        memmgr = self.asmmemmgr
+        memmgr.large_alloc_size = 4 * PAGESIZE
+        start1, stop1 = memmgr.malloc(100, 100)
+        start2, stop2 = memmgr.malloc(100, 100)
+        [(chunk_start, chunk_stop)] = memmgr.chunks
+        memmgr.prepare_for_fork()
+        def pages(start, stop):
+            return set(range(start // PAGESIZE, (stop - 1) // PAGESIZE + 1))
+        shared_pages = pages(start1, stop1) | pages(start2, stop2)
+        memmgr.free(start1, stop1)
+        got = []
+        while memmgr.total_memory_allocated < 16 * PAGESIZE:
+            start, stop = memmgr.malloc(100, 100)
+            assert not (pages(start, stop) & shared_pages)
+            got.append((start, stop))
+        # the free whole pages of the old chunk were used
+        assert [start for start, stop in got
+                if chunk_start <= start < chunk_stop]
+        # the chunks allocated after prepare_for_fork() are not affected
+        memmgr.free(*got[-1])
+        assert memmgr.malloc(100, 100) == got[-1]
+
     def test_insert_gcroot_marker(self):
         puts = []
         class FakeGcRootMap:
@@ -72,6 +72,10 @@ class FakeLLOp(object):
 
     do_malloc_fixedsize_clear = do_malloc_fixedsize
 
+    def do_malloc_fixedsize_pretenured(self, RESTYPE, type_id, size):
+        return self.do_malloc_fixedsize(RESTYPE, type_id, size,
+                                        False, False, False)
+
     def do_malloc_varsize(self, RESTYPE, type_id, length, size,
                                 itemsize, offset_to_length):
         p, tid = self._malloc(type_id, size + itemsize * length)
@@ -646,6 +646,24 @@ class TestFramework(RewriteTests):
             jump()
         """)
 
+    def test_new_with_vtable_pretenured(self):
+        self.gc_ll_descr.must_pretenure = lambda tid: tid == 9315
+        self.check_rewrite("""
+            []
+            p0 = new_with_vtable(descr=o_descr)
+            p1 = new(descr=sdescr)
+            jump()
+        """, """
+            [p1]
+            p0 = call_r(ConstClass(malloc_fixedsize_pretenured), 104, 9315, \
+                                descr=malloc_fixedsize_pretenured_descr)
+            check_memory_error(p0)
+            gc_store(p0, 0,  0, %(vtable_descr.field_size)s)
+            p2 = call_malloc_nursery(%(sdescr.size)d)
+            gc_store(p2, 0,  1234, %(tiddescr.field_size)s)
+            jump()
+        """)
+
     def test_rewrite_assembler_newstr_newunicode(self):
         # note: strdescr.basesize already contains the extra final character,
         # so that's why newstr(14) is rounded up to 'basesize+15' and not
@@ -50,6 +50,15 @@ class AbstractCPU(object):
         """
         return False
 
+    def prepare_for_fork(self):
+        """Called before fork(), if the child processes are going to run
+        the machine code already compiled.  Makes sure that the following
+        compilations don't write to the pages containing this code (apart
+        from the unavoidable patching of the guards that get a bridge).
+        Does nothing by default.
+        """
+        pass
+
     def compile_loop(self, inputargs, operations, looptoken, jd_id=0,
                      unique_id=0, log=True, name='', logger=None):
         """Assemble the given loop.
@@ -158,6 +167,17 @@ class AbstractCPU(object):
         """
         pass
 
+    def profile_agent_enabled(self):
+        """Return True if an external profiler wants to know the name of
+        each loop, even when the debug_prints are disabled."""
+        return False
+
+    def get_loop_code_size(self, compiled_loop_token):
+        """Return the number of bytes of machine code used by the loop
+        and all bridges attached to it.  Used by the memory manager
+        (see the 'loop_memory_limit' parameter)."""
+        return 0
+
     def sizeof(self, S):
         raise NotImplementedError
 
@@ -647,7 +647,8 @@ class Assembler386(BaseAssembler, VectorAssemblerMixin):
         self.teardown()
         # oprofile support
         if self.cpu.profile_agent is not None:
-            name = "Bridge # %s" % (descr_number,)
+            name = "Bridge # %s of Loop # %s" % (descr_number,
+                                                 original_loop_token.number)
             self.cpu.profile_agent.native_code_written(name,
                                                        rawstart, fullsize)
         return AsmInfo(ops_offset, startpos + rawstart, codeendpos - startpos, rawstart+bridgestartpos)
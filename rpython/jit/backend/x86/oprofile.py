@@ -53,6 +53,7 @@ class OProfileAgent(profagent.ProfileAgent):
         if not agent:
             raise OProfileError(rposix.get_saved_errno(), "startup")
         self.agent = agent
+        self.enabled = True
 
     def shutdown(self):
         if not OPROFILE_AVAILABLE:
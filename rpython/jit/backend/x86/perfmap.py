@@ -0,0 +1,82 @@
+import os
+from rpython.jit.backend.x86 import profagent
+
+# 'perf report' and 'perf top' look for this file to give a name to the
+# addresses which are not in any ELF file: one line per piece of machine
+# code, "START SIZE NAME", with START and SIZE in hexadecimal.
+PERF_MAP_FILE = '/tmp/perf-%d.map'
+FREED_NAME = '[freed jit code]'
+
+
+class PerfMapAgent(profagent.ProfileAgent):
+    """ Writes the perf map file of the process if the environment variable
+    PYPY_PERF_MAP is set to a non-empty value other than '0'. """
+
+    def __init__(self):
+        self.enabled = False
+        self.fd = -1
+        self.pid = 0
+        self.freed = []
+
+    def startup(self):
+        value = os.environ.get('PYPY_PERF_MAP')
+        self.enabled = value is not None and value != '' and value != '0'
+
+    def shutdown(self):
+        if self.enabled:
+            self.write_freed()
+        self.close()
+
+    def close(self):
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+    def open(self):
+        pid = os.getpid()
+        if self.fd >= 0 and self.pid == pid:
+            return True
+        # after a fork(), don't append to the file of the parent.  The
+        # code compiled before the fork is not listed for the child.
+        self.close()
+        try:
+            self.fd = os.open(PERF_MAP_FILE % pid,
+                              os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0644)
+        except OSError:
+            self.enabled = False
+            return False
+        self.pid = pid
+        return True
+
+    def write_entry(self, address, size, name):
+        if not self.open():
+            return
+        line = '%x %x %s\n' % (address, size, name.replace('\n', ' '))
+        try:
+            while line:
+                count = os.write(self.fd, line)
+                assert count >= 0
+                line = line[count:]
+        except OSError:
+            self.close()
+            self.enabled = False
+
+    def write_freed(self):
+        freed = self.freed
+        self.freed = []
+        for i in range(0, len(freed), 2):
+            self.write_entry(freed[i], freed[i + 1], FREED_NAME)
+
+    def native_code_written(self, name, address, size):
+        if self.enabled:
+            self.write_freed()
+            self.write_entry(address, size, name)
+
+    def native_code_freed(self, address, size):
+        # a perf map can't remove an entry; mark the range instead, so
+        # that a sample there is not attributed to the freed loop.  This
+        # is called from a __del__, which must not do I/O: the range is
+        # written before the next entry.
+        if self.enabled:
+            self.freed.append(address)
+            self.freed.append(size)
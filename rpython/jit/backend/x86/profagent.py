@@ -3,10 +3,14 @@ class ProfileAgent(object):
     """ A class that communicates to a profiler which assembler code belongs to
     which functions. """
 
+    enabled = False
+
     def startup(self):
         pass
     def shutdown(self):
         pass
     def native_code_written(self, name, address, size):
         pass
+    def native_code_freed(self, address, size):
+        pass
 
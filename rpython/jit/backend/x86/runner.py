@@ -4,7 +4,7 @@ from rpython.rlib.jit_hooks import LOOP_RUN_CONTAINER
 from rpython.rlib import rgc
 from rpython.jit.backend.x86.assembler import Assembler386
 from rpython.jit.backend.x86.regalloc import gpr_reg_mgr_cls, xmm_reg_mgr_cls
-from rpython.jit.backend.x86.profagent import ProfileAgent
+from rpython.jit.backend.x86.perfmap import PerfMapAgent
 from rpython.jit.backend.llsupport.llmodel import AbstractLLCPU
 from rpython.jit.backend.x86 import regloc
 from rpython.jit.backend.x86.vector_ext import X86VectorExt
@@ -38,7 +38,7 @@ class AbstractX86CPU(AbstractLLCPU):
         AbstractLLCPU.__init__(self, rtyper, stats, opts,
                                translate_support_code, gcdescr)
 
-        profile_agent = ProfileAgent()
+        profile_agent = PerfMapAgent()
         if rtyper is not None:
             config = rtyper.annotator.translator.config
             if config.translation.jit_profiler == "oprofile":
@@ -74,6 +74,18 @@ class AbstractX86CPU(AbstractLLCPU):
         self.assembler.finish_once()
         self.profile_agent.shutdown()
 
+    def profile_agent_enabled(self):
+        return self.profile_agent.enabled
+
+    def free_loop_and_bridges(self, compiled_loop_token):
+        if self.profile_agent.enabled:
+            blocks = compiled_loop_token.asmmemmgr_blocks
+            if blocks is not None:
+                for rawstart, rawstop in blocks:
+                    self.profile_agent.native_code_freed(rawstart,
+                                                         rawstop - rawstart)
+        AbstractLLCPU.free_loop_and_bridges(self, compiled_loop_token)
+
     def dump_loop_token(self, looptoken):
         """
         NOT_RPYTHON
@@ -0,0 +1,72 @@
+import os
+from rpython.rlib.jit import JitDriver
+from rpython.jit.backend.x86 import perfmap
+from rpython.jit.backend.x86.perfmap import PerfMapAgent
+from rpython.jit.backend.x86.test.test_basic import Jit386Mixin
+
+
+def read_map(path):
+    return [line.split(' ', 2) for line in path.read().splitlines()]
+
+
+class TestPerfMap(Jit386Mixin):
+
+    def setup_method(self, meth):
+        self.old_file = perfmap.PERF_MAP_FILE
+        self.old_env = os.environ.get('PYPY_PERF_MAP')
+
+    def teardown_method(self, meth):
+        perfmap.PERF_MAP_FILE = self.old_file
+        if self.old_env is None:
+            os.environ.pop('PYPY_PERF_MAP', None)
+        else:
+            os.environ['PYPY_PERF_MAP'] = self.old_env
+
+    def test_agent(self, tmpdir):
+        perfmap.PERF_MAP_FILE = str(tmpdir.join('perf-%d.map'))
+        path = tmpdir.join('perf-%d.map' % os.getpid())
+        agent = PerfMapAgent()
+        os.environ['PYPY_PERF_MAP'] = '0'
+        agent.startup()
+        agent.native_code_written('Loop # 0: foo', 0x1000, 0x80)
+        assert not path.check()
+        os.environ['PYPY_PERF_MAP'] = '1'
+        agent.startup()
+        agent.native_code_written('Loop # 0: foo\nbar', 0x1000, 0x80)
+        agent.native_code_freed(0x1000, 0x100)
+        assert len(read_map(path)) == 1
+        agent.native_code_written('Loop # 1: baz', 0x1000, 0x40)
+        agent.native_code_freed(0x1000, 0x40)
+        agent.shutdown()
+        assert read_map(path) == [['1000', '80', 'Loop # 0: foo bar'],
+                                  ['1000', '100', perfmap.FREED_NAME],
+                                  ['1000', '40', 'Loop # 1: baz'],
+                                  ['1000', '40', perfmap.FREED_NAME]]
+
+    def test_loop_and_bridge(self, tmpdir):
+        perfmap.PERF_MAP_FILE = str(tmpdir.join('perf-%d.map'))
+        os.environ['PYPY_PERF_MAP'] = '1'
+        def get_printable_location(code):
+            return 'function%d' % code
+        myjitdriver = JitDriver(greens = ['code'], reds = ['n', 'res'],
+                                get_printable_location=get_printable_location)
+        def f(code, n):
+            res = 0
+            while n > 0:
+                myjitdriver.jit_merge_point(code=code, n=n, res=res)
+                if n < 20:
+                    res += 2
+                else:
+                    res += 1
+                n -= 1
+            return res
+        res = self.meta_interp(f, [7, 100])
+        assert res == f(7, 100)
+        entries = read_map(tmpdir.join('perf-%d.map' % os.getpid()))
+        names = [name for _, _, name in entries]
+        assert names[0].startswith('Loop # ')
+        assert names[0].endswith(': function7')
+        assert [name for name in names if name.startswith('Bridge # ')]
+        for start, size, _ in entries:
+            assert int(start, 16) > 0
+            assert int(size, 16) > 0
@@ -12,6 +12,7 @@ from rpython.jit.metainterp.resoperation import rop, InputArgInt, InputArgRef
 from rpython.jit.metainterp.executor import execute
 from rpython.jit.backend.test.runner_test import LLtypeBackendTest
 from rpython.jit.tool.oparser import parse
+from rpython.rlib.objectmodel import compute_unique_id
 import ctypes
 
 CPU = getcpuclass()
@@ -427,7 +428,8 @@ class TestX86(LLtypeBackendTest):
 
         self.cpu.compile_bridge(faildescr1, [i1b], bridge, looptoken)
         name, address, size = agent.functions[1]
-        assert name == "Bridge # 0: bye (loop counter 1)"
+        assert name == "Bridge # %s of Loop # 17" % (
+            compute_unique_id(faildescr1),)
         # Would be exactly ==, but there are some guard failure recovery
         # stubs in-between
         assert address >= loopaddress + loopsize
@@ -251,9 +251,11 @@ def compile_simple_loop(metainterp, greenkey, trace, runtime_args, enable_opts,
     return target_token
 
 def compile_loop(metainterp, greenkey, start, inputargs, jumpargs,
-                 full_preamble_needed=True, try_disabling_unroll=False):
+                 full_preamble_needed=True, try_disabling_unroll=False,
+                 baseline=False):
     """Try to compile a new procedure by closing the current history back
-    to the first operation.
+    to the first operation.  With 'baseline', compile it without
+    unrolling, which is the most expensive optimization.
     """
     from rpython.jit.metainterp.optimizeopt import optimize_trace
 
@@ -272,6 +274,9 @@ def compile_loop(metainterp, greenkey, start, inputargs, jumpargs,
             return None
         enable_opts = enable_opts.copy()
         del enable_opts['unroll']
+    elif baseline and 'unroll' in enable_opts:
+        enable_opts = enable_opts.copy()
+        del enable_opts['unroll']
 
     jitcell_token = make_jitcell_token(jitdriver_sd)
     cut_at = history.get_trace_position()
@@ -561,7 +566,11 @@ def send_loop_to_backend(greenkey, jitdriver_sd, metainterp_sd, loop, type,
     debug_start("jit-backend")
     log = have_debug_prints() or jl.jitlog_enabled()
     try:
-        loopname = jitdriver_sd.warmstate.get_location_str(greenkey)
+        if metainterp_sd.cpu.profile_agent_enabled():
+            # the profiler needs the name even without debug_prints
+            loopname = jitdriver_sd.warmstate.get_decision_location(greenkey)
+        else:
+            loopname = jitdriver_sd.warmstate.get_location_str(greenkey)
         unique_id = jitdriver_sd.warmstate.get_unique_id(greenkey)
         asminfo = do_compile_loop(jitdriver_sd.index, unique_id, metainterp_sd,
                                   loop.inputargs,
@@ -590,6 +599,9 @@ def send_loop_to_backend(greenkey, jitdriver_sd, metainterp_sd, loop, type,
     #
     if metainterp_sd.warmrunnerdesc is not None:    # for tests
         metainterp_sd.warmrunnerdesc.memory_manager.keep_loop_alive(original_jitcell_token)
+        guard_stats = metainterp_sd.warmrunnerdesc.guard_stats
+        if guard_stats.enabled:
+            guard_stats.register_operations(metainterp_sd, n, operations)
 
 def send_bridge_to_backend(jitdriver_sd, metainterp_sd, faildescr, inputargs,
                            operations, original_loop_token, memo):
@@ -636,6 +648,16 @@ def send_bridge_to_backend(jitdriver_sd, metainterp_sd, faildescr, inputargs,
     metainterp_sd.logger_ops.log_bridge(inputargs, operations, None, faildescr,
                                         ops_offset, memo=memo)
     #
+    if metainterp_sd.warmrunnerdesc is not None:    # for tests
+        metainterp_sd.warmrunnerdesc.memory_manager.loop_code_size_changed(
+            original_loop_token)
+        guard_stats = metainterp_sd.warmrunnerdesc.guard_stats
+        if guard_stats.enabled:
+            guard_stats.bridge_attached(faildescr)
+            guard_stats.register_operations(metainterp_sd,
+                                            original_loop_token.number,
+                                            operations)
+    #
     #if metainterp_sd.warmrunnerdesc is not None:    # for tests
     #    metainterp_sd.warmrunnerdesc.memory_manager.keep_loop_alive(
     #        original_loop_token)
@@ -752,6 +774,9 @@ class AbstractResumeGuardDescr(ResumeDescr):
 
     def must_compile(self, deadframe, metainterp_sd, jitdriver_sd):
         jitcounter = metainterp_sd.warmrunnerdesc.jitcounter
+        guard_stats = metainterp_sd.warmrunnerdesc.guard_stats
+        if guard_stats.enabled:
+            guard_stats.guard_failed(self)
         #
         if self.status & (self.ST_BUSY_FLAG | self.ST_TYPE_MASK) == 0:
             # common case: this is not a guard_value, and we are not
@@ -796,7 +821,13 @@ class AbstractResumeGuardDescr(ResumeDescr):
                           intval * 1442968193)
         #
         increment = jitdriver_sd.warmstate.increment_trace_eagerness
-        return jitcounter.tick(hash, increment)
+        if not jitcounter.tick(hash, increment):
+            return False
+        if jl.jit_decisions.is_enabled():
+            # the guards are not identified from one run to the next:
+            # bridges are only counted
+            jl.jit_decisions.record(jl.DECISION_BRIDGE, 0, '')
+        return True
 
     def start_compiling(self):
         # start tracing and compiling from this guard.
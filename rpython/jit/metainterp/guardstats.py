@@ -0,0 +1,96 @@
+"""
+Live statistics about the guards of the compiled loops and bridges: how
+many times each guard failed, and how many bridges were attached to it.
+It is disabled by default.  When enabled, it costs one dictionary lookup
+per guard failure that doesn't go to a bridge, and one small object per
+guard compiled.
+"""
+
+import weakref
+from rpython.rlib import rweakref
+from rpython.rlib.jit_hooks import GUARD_STATS_CONTAINER
+from rpython.rtyper.annlowlevel import llstr
+from rpython.rtyper.lltypesystem import lltype
+from rpython.jit.metainterp.compile import AbstractResumeGuardDescr
+from rpython.jit.metainterp.resoperation import rop
+
+
+class GuardStat(object):
+    def __init__(self, descr, loop_no, location):
+        self.wref_descr = weakref.ref(descr)
+        self.hash = descr.get_jitcounter_hash()
+        self.loop_no = loop_no
+        self.location = location
+        self.failures = 0
+        self.bridges = 0
+
+
+class GuardStats(object):
+    MIN_PRUNE = 1000
+
+    def __init__(self):
+        self.enabled = False
+        self.clear()
+
+    def clear(self):
+        self.stats = []
+        self.stat_of_descr = rweakref.RWeakKeyDictionary(
+            AbstractResumeGuardDescr, GuardStat)
+        self.next_prune = self.MIN_PRUNE
+
+    def set_enabled(self, flag):
+        if flag != self.enabled:
+            self.clear()
+        self.enabled = flag
+
+    def register_operations(self, metainterp_sd, loop_no, operations):
+        """Called after a loop or bridge is compiled."""
+        location = ''
+        merge_point = None
+        for op in operations:
+            if op.getopnum() == rop.DEBUG_MERGE_POINT:
+                merge_point = op
+            elif op.is_guard():
+                descr = op.getdescr()
+                if not isinstance(descr, AbstractResumeGuardDescr):
+                    continue
+                if merge_point is not None:
+                    # compute the location only once per merge point
+                    jd_sd = metainterp_sd.jitdrivers_sd[
+                        merge_point.getarg(0).getint()]
+                    greenkey = merge_point.getarglist()[3:]
+                    location = jd_sd.warmstate.get_location_str(greenkey)
+                    merge_point = None
+                stat = GuardStat(descr, loop_no, location)
+                self.stats.append(stat)
+                self.stat_of_descr.set(descr, stat)
+        if len(self.stats) >= self.next_prune:
+            self._prune()
+
+    def guard_failed(self, descr):
+        stat = self.stat_of_descr.get(descr)
+        if stat is not None:
+            stat.failures += 1
+
+    def bridge_attached(self, descr):
+        stat = self.stat_of_descr.get(descr)
+        if stat is not None:
+            stat.bridges += 1
+
+    def _prune(self):
+        # forget the guards of the loops that were freed
+        self.stats = [stat for stat in self.stats
+                      if stat.wref_descr() is not None]
+        self.next_prune = max(self.MIN_PRUNE, len(self.stats) * 2)
+
+    def get_container(self):
+        self._prune()
+        result = lltype.malloc(GUARD_STATS_CONTAINER, len(self.stats))
+        for i in range(len(self.stats)):
+            stat = self.stats[i]
+            result[i].hash = stat.hash
+            result[i].loop_no = stat.loop_no
+            result[i].failures = stat.failures
+            result[i].bridges = stat.bridges
+            result[i].location = llstr(stat.location)
+        return result
@@ -391,6 +391,30 @@ _const_ptr_for_unicode = {}
 
 # ____________________________________________________________
 
+TIER_UP_COUNTER = rffi.CArray(lltype.Signed)
+
+class TierUpCounter(object):
+    """The number of iterations of a loop compiled by the baseline tier
+    (see the 'baseline_threshold' parameter).  It is a raw word, which
+    the machine code of the loop increments; when it reaches 'limit', a
+    guard fails and the loop is traced again.
+    """
+    def __init__(self, limit):
+        self.limit = limit
+        self.ptr = lltype.malloc(TIER_UP_COUNTER, 1, flavor='raw', zero=True,
+                                 track_allocation=False)
+
+    def get_address(self):
+        return rffi.cast(lltype.Signed, self.ptr)
+
+    def reached_limit(self):
+        return self.ptr[0] >= self.limit
+
+    def __del__(self):
+        lltype.free(self.ptr, flavor='raw', track_allocation=False)
+
+# ____________________________________________________________
+
 # The JitCellToken class is the root of a tree of traces.  Each branch ends
 # in a jump which goes to a LABEL operation; or it ends in a FINISH.
 
@@ -409,6 +433,9 @@ class JitCellToken(AbstractDescr):
     # and more data specified by the backend when the loop is compiled
     number = -1
     generation = r_int64(0)
+    entry_count = 0      # for the memory manager
+    code_size = 0        # for the memory manager
+    tier_up_counter = None   # for loops compiled by the baseline tier
     # one purpose of LoopToken is to keep alive the CompiledLoopToken
     # returned by the backend.  When the LoopToken goes away, the
     # CompiledLoopToken has its __del__ called, which frees the assembler
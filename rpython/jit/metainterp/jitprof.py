@@ -152,6 +152,10 @@ class Profiler(BaseProfiler):
         self._print_intline("abort: bad loop", cnt[Counters.ABORT_BAD_LOOP])
         self._print_intline("abort: force quasi-immut",
                             cnt[Counters.ABORT_FORCE_QUASIIMMUT])
+        self._print_intline("deferred loops", cnt[Counters.DEFERRED_LOOPS])
+        self._print_intline("not inlined: too long",
+                            cnt[Counters.NOT_INLINED_TOO_LONG])
+        self._print_intline("baseline loops", cnt[Counters.BASELINE_LOOPS])
         self._print_intline("nvirtuals", cnt[Counters.NVIRTUALS])
         self._print_intline("nvholes", cnt[Counters.NVHOLES])
         self._print_intline("nvreused", cnt[Counters.NVREUSED])
@@ -2,6 +2,8 @@ import math
 from rpython.rlib.rarithmetic import r_int64
 from rpython.rlib.debug import debug_start, debug_print, debug_stop
 from rpython.rlib.objectmodel import we_are_translated
+from rpython.rlib.listsort import make_timsort_class
+from rpython.rlib.rjitlog import rjitlog as jl
 
 #
 # Logic to decide which loops are old and not used any more.
@@ -19,6 +21,25 @@ from rpython.rlib.objectmodel import we_are_translated
 # 'generation' field is much smaller than the current generation, and
 # removed from the set.
 #
+# Independently, a limit can be put on the total size of the machine
+# code of the loops in 'alive_loops' (see set_memory_limit()).  When it
+# is exceeded, loops are removed from the set until their size drops
+# below 3/4 of the limit, in the order of their score: the number of
+# times they were entered divided by the number of generations since
+# they were last entered.  This keeps the loops that are entered often,
+# even if they are not always the most recently used ones.  The total
+# size is maintained incrementally in 'alive_code_size', so that the
+# loops are only scored and sorted when the limit is really exceeded.
+#
+
+class ScoredLoop(object):
+    def __init__(self, looptoken, score, size):
+        self.looptoken = looptoken
+        self.score = score
+        self.size = size
+
+ScoredLoopSort = make_timsort_class(lt=lambda a, b: a.score < b.score)
+
 
 class MemoryManager(object):
 
@@ -38,6 +59,14 @@ class MemoryManager(object):
         self.current_generation = r_int64(1)
         self.next_check = r_int64(-1)
         self.alive_loops = {}
+        self.cpu = None
+        self.memory_limit = 0
+        # total code size of the loops in 'alive_loops', only maintained
+        # if there is a memory limit
+        self.alive_code_size = 0
+        # statistics about the loops removed because of the memory limit
+        self.evicted_loops = 0
+        self.evicted_bytes = 0
 
     def set_max_age(self, max_age, check_frequency=0):
         if max_age <= 0:
@@ -49,16 +78,50 @@ class MemoryManager(object):
             self.check_frequency = check_frequency
             self.next_check = self.current_generation + 1
 
+    def set_memory_limit(self, limit):
+        # in bytes; 0 means no limit
+        self.memory_limit = max(limit, 0)
+        self.alive_code_size = 0
+        for looptoken in self.alive_loops.keys():
+            looptoken.code_size = 0
+            if self.memory_limit > 0:
+                self._update_code_size(looptoken)
+
     def next_generation(self):
         self.current_generation += 1
         if self.current_generation == self.next_check:
             self._kill_old_loops_now()
             self.next_check = self.current_generation + self.check_frequency
+        if self.memory_limit > 0:
+            self._check_memory_limit()
 
     def keep_loop_alive(self, looptoken):
+        looptoken.entry_count += 1
         if looptoken.generation != self.current_generation:
             looptoken.generation = self.current_generation
-            self.alive_loops[looptoken] = None
+            if looptoken not in self.alive_loops:
+                looptoken.code_size = 0
+                self.alive_loops[looptoken] = None
+            if self.memory_limit > 0:
+                self._update_code_size(looptoken)
+
+    def loop_code_size_changed(self, looptoken):
+        # called after a bridge was attached to the loop
+        if self.memory_limit > 0 and looptoken in self.alive_loops:
+            self._update_code_size(looptoken)
+
+    def _update_code_size(self, looptoken):
+        size = self.cpu.get_loop_code_size(looptoken.compiled_loop_token)
+        self.alive_code_size += size - looptoken.code_size
+        looptoken.code_size = size
+
+    def _forget_loop(self, looptoken):
+        del self.alive_loops[looptoken]
+        self.alive_code_size -= looptoken.code_size
+        looptoken.code_size = 0
+        if jl.jit_decisions.is_enabled():
+            jl.jit_decisions.record(jl.DECISION_FREE_LOOP,
+                                    looptoken.number, '')
 
     def _kill_old_loops_now(self):
         debug_start("jit-mem-collect")
@@ -70,7 +133,7 @@ class MemoryManager(object):
         for looptoken in self.alive_loops.keys():
             if (0 <= looptoken.generation < max_generation or
                 looptoken.invalidated):
-                del self.alive_loops[looptoken]
+                self._forget_loop(looptoken)
         newtotal = len(self.alive_loops)
         debug_print("Loop tokens freed: ", oldtotal - newtotal)
         debug_print("Loop tokens left:  ", newtotal)
@@ -81,3 +144,36 @@ class MemoryManager(object):
             # a single one is not enough for all tests :-(
             rgc.collect(); rgc.collect(); rgc.collect()
         debug_stop("jit-mem-collect")
+
+    def _check_memory_limit(self):
+        if self.alive_code_size <= self.memory_limit:
+            return
+        scored_loops = []
+        for looptoken in self.alive_loops.keys():
+            if looptoken.invalidated:
+                score = -1.0
+            else:
+                age = self.current_generation - looptoken.generation
+                score = (looptoken.entry_count + 1.0) / (float(age) + 1.0)
+            scored_loops.append(ScoredLoop(looptoken, score,
+                                           looptoken.code_size))
+        debug_start("jit-mem-collect")
+        debug_print("Current generation:", self.current_generation)
+        debug_print("Code size before:  ", self.alive_code_size)
+        ScoredLoopSort(scored_loops).sort()
+        goal = self.memory_limit - self.memory_limit // 4
+        evicted = 0
+        for scored_loop in scored_loops:
+            if self.alive_code_size <= goal:
+                break
+            self.evicted_bytes += scored_loop.size
+            self._forget_loop(scored_loop.looptoken)
+            evicted += 1
+        self.evicted_loops += evicted
+        debug_print("Loop tokens evicted:", evicted)
+        debug_print("Code size left:    ", self.alive_code_size)
+        scored_loops = scored_loop = None
+        if not we_are_translated() and evicted > 0:
+            from rpython.rlib import rgc
+            rgc.collect(); rgc.collect(); rgc.collect()
+        debug_stop("jit-mem-collect")
@@ -2,6 +2,7 @@
 optimizer of the bridge attached to a guard. """
 
 from rpython.jit.metainterp import resumecode
+from rpython.jit.metainterp.optimizeopt.intutils import IntBound, MAXINT
 
 
 # adds the following sections at the end of the resume code:
@@ -28,7 +29,23 @@ from rpython.jit.metainterp import resumecode
 # <length>
 # (<const> <box2>) length times, if call_loopinvariant(const) == box2
 #                  box2 should be in liveboxes
+#
+# ---- nonnull and integer bound knowledge, only if there is any
+# <length>
+# (<box> [<lower> <upper>]) length times
+#                         a ref box is not NULL but its class is not known.
+#                         An int box is known to be between lower and
+#                         upper.  Only the int boxes with a lower bound
+#                         that fits in the resume code are stored; upper
+#                         is lower - 1 when it is unknown or doesn't fit.
 # ----
+#
+# Most guards know nothing of the kind, and this section is then left out:
+# it would cost one item in the resume code of every guard otherwise.
+
+# the items of the resume code are shorts; MIN_BOUND - 1 must fit too
+MIN_BOUND = -2 ** 15 + 1
+MAX_BOUND = 2 ** 15 - 1
 
 
 # maybe should be delegated to the optimization classes?
@@ -63,8 +80,11 @@ def decode_box(resumestorage, tagged, liveboxes, cpu):
 def serialize_optimizer_knowledge(optimizer, numb_state, liveboxes, liveboxes_from_env, memo):
     from rpython.jit.metainterp.history import ConstInt
     available_boxes = {}
+    available_list = []
     for box in liveboxes:
         if box is not None and box in liveboxes_from_env:
+            if box not in available_boxes:
+                available_list.append(box)
             available_boxes[box] = None
 
     # class knowledge is stored as bits, true meaning the class is known, false
@@ -123,6 +143,30 @@ def serialize_optimizer_knowledge(optimizer, numb_state, liveboxes, liveboxes_fr
     else:
         numb_state.append_int(0)
 
+    # nonnull knowledge, for the boxes whose class is unknown (a known
+    # class implies nonnull), and integer bounds
+    known_boxes = []
+    for box in available_list:
+        if box.type == "r":
+            info = optimizer.getptrinfo(box)
+            if (info is not None and info.is_nonnull() and
+                    info.get_known_class(optimizer.cpu) is None):
+                known_boxes.append((box, 0, 0))
+        elif box.type == "i":
+            bound = optimizer.getintbound(box)
+            if bound.has_lower and MIN_BOUND <= bound.lower <= MAX_BOUND:
+                upper = bound.lower - 1
+                if bound.has_upper and bound.upper <= MAX_BOUND:
+                    upper = bound.upper
+                known_boxes.append((box, bound.lower, upper))
+    if known_boxes:
+        numb_state.append_int(len(known_boxes))
+        for box, lower, upper in known_boxes:
+            numb_state.append_short(tag_box(box, liveboxes_from_env, memo))
+            if box.type == "i":
+                numb_state.append_int(lower)
+                numb_state.append_int(upper)
+
 def deserialize_optimizer_knowledge(optimizer, resumestorage, frontend_boxes, liveboxes):
     from rpython.jit.metainterp.history import ConstInt
     reader = resumecode.Reader(resumestorage.rd_numb)
@@ -186,3 +230,21 @@ def deserialize_optimizer_knowledge(optimizer, resumestorage, frontend_boxes, li
         result_loopinvariant.append((i, box))
     if optimizer.optrewrite:
         optimizer.optrewrite.deserialize_optrewrite(result_loopinvariant)
+
+    # nonnull knowledge and integer bounds
+    if reader.at_end():
+        return
+    length = reader.next_item()
+    for i in range(length):
+        tagged = reader.next_item()
+        box = decode_box(resumestorage, tagged, liveboxes, metainterp_sd.cpu)
+        if box.type == "r":
+            optimizer.make_nonnull(box)
+            continue
+        lower = reader.next_item()
+        upper = reader.next_item()
+        # every int is below MAXINT, saying it explicitly lets the
+        # bounds of the operations of the bridge be computed
+        if upper < lower:
+            upper = MAXINT
+        optimizer.setintbound(box, IntBound(lower, upper))
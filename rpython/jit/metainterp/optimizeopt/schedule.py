@@ -978,7 +978,7 @@ class Pair(Pack):
                    self.right is other.right
 
 class AccumPack(Pack):
-    SUPPORTED = { rop.INT_ADD: '+', }
+    SUPPORTED = { rop.INT_ADD: '+', rop.FLOAT_ADD: '+', }
 
     def __init__(self, nodes, operator, position):
         Pack.__init__(self, nodes)
@@ -190,6 +190,18 @@ class CostModelBaseTest(SchedulerBaseTest):
         assert savings >= 0
 
     def test_sum(self):
+        loop1 = self.parse_trace("""
+        f10 = raw_load_f(p0, i0, descr=double)
+        f11 = raw_load_f(p0, i1, descr=double)
+        f12 = float_add(f1, f10)
+        f13 = float_add(f12, f11)
+        """)
+        savings = self.savings(loop1)
+        assert savings == 2
+
+    def test_sum_user_code(self, monkeypatch):
+        # the float additions are not reordered in user code
+        monkeypatch.setattr(FakeJitDriverStaticData, 'vec', False)
         loop1 = self.parse_trace("""
         f10 = raw_load_f(p0, i0, descr=double)
         f11 = raw_load_f(p0, i1, descr=double)
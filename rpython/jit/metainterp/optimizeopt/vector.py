@@ -385,7 +385,10 @@ class VectorizingOptimizer(Optimizer):
         loop = graph.loop
         operations = loop.operations
 
-        self.packset = PackSet(self.vector_ext.vec_size())
+        # summing floats in a different order changes the result, which
+        # only the jitdrivers with vectorize=True (micronumpy) accept
+        self.packset = PackSet(self.vector_ext.vec_size(),
+                               float_accum=self.jitdriver_sd.vec)
         memory_refs = graph.memory_refs.items()
         # initialize the pack set
         for node_a,memref_a in memory_refs:
@@ -677,10 +680,11 @@ def isomorphic(l_op, r_op):
     return False
 
 class PackSet(object):
-    _attrs_ = ('packs', 'vec_reg_size')
-    def __init__(self, vec_reg_size):
+    _attrs_ = ('packs', 'vec_reg_size', 'float_accum')
+    def __init__(self, vec_reg_size, float_accum=False):
         self.packs = []
         self.vec_reg_size = vec_reg_size
+        self.float_accum = float_accum
 
     def pack_count(self):
         return len(self.packs)
@@ -769,6 +773,8 @@ class PackSet(object):
         opnum = left.getopnum()
 
         if opnum in AccumPack.SUPPORTED:
+            if left.type == 'f' and not self.float_accum:
+                return None
             right = rnode.getoperation()
             assert left.numargs() == 2 and not left.returns_void()
             scalar, index = self.getaccumulator_variable(left, right, origin_pack)
@@ -842,8 +848,9 @@ class PackSet(object):
                 oplist.append(vecop)
                 opnum = rop.VEC_INT_XOR
                 if datatype == FLOAT:
-                    # see PRECISION loss below
-                    raise NotImplementedError
+                    # the sum is computed in vec_reg_size // bytesize
+                    # lanes, so in a different order (see float_accum)
+                    opnum = rop.VEC_FLOAT_XOR
                 vecop = VecOperation(opnum, [vecop, vecop],
                                      vecop, count)
                 oplist.append(vecop)
@@ -65,6 +65,9 @@ class MIFrame(object):
         self.bytecode = jitcode.code
         # this is not None for frames that are recursive portal calls
         self.greenkey = greenkey
+        # the length of the trace when this portal call was inlined,
+        # or -1 (see record_inlined_size())
+        self.inlined_from = -1
         # copy the constants in place
         self.copy_constants(self.registers_i, jitcode.constants_i, ConstInt)
         self.copy_constants(self.registers_r, jitcode.constants_r, ConstPtr)
@@ -1133,6 +1136,9 @@ class MIFrame(object):
                         loc = targetjitdriver_sd.warmstate.get_location_str(greenboxes)
                         debug_print("recursive function (not inlined):", loc)
                     warmrunnerstate.dont_trace_here(greenboxes)
+                elif self.metainterp.inlining_would_abort(warmrunnerstate,
+                                                          greenboxes):
+                    pass    # emit a call_assembler instead
                 else:
                     return self.metainterp.perform_call(portal_code, allboxes,
                                 greenkey=greenboxes)
@@ -1909,6 +1915,10 @@ class MetaInterpStaticData(object):
         #
         self.cpu.propagate_exception_descr = exc_descr
         #
+        # for reading the TierUpCounter of loops compiled by the baseline tier
+        self.tier_up_counter_descr = self.cpu.arraydescrof(
+            history.TIER_UP_COUNTER)
+        #
         self.globaldata = MetaInterpGlobalData(self)
 
     def finish_setup_descrs(self):
@@ -1974,6 +1984,38 @@ class MetaInterpStaticData(object):
         if self.warmrunnerdesc is not None:       # for tests
             self.warmrunnerdesc.memory_manager.next_generation()
 
+    def compile_deferred_loops(self):
+        """Compile all the loops whose compilation was deferred
+        (see the 'deferred_compile' parameter)."""
+        deferred_loops = self.globaldata.deferred_loops
+        if not deferred_loops:
+            return
+        self.globaldata.deferred_loops = []
+        for deferred in deferred_loops:
+            self._compile_deferred_loop(deferred)
+
+    def compile_deferred_loop(self, cell):
+        """Compile only the deferred loop traced from the greenkey of
+        'cell'.  Returns False if there is no such loop."""
+        deferred = cell.deferred_loop
+        if deferred is None:
+            return False
+        self.globaldata.deferred_loops.remove(deferred)
+        self._compile_deferred_loop(deferred)
+        return True
+
+    def _forget_deferred_loop(self, deferred):
+        # the oldest deferred loop is dropped when there are too many
+        # of them: the next time it gets hot, it is traced again
+        deferred.jitdriver_sd.warmstate.set_deferred(deferred.greenkey, None)
+
+    def _compile_deferred_loop(self, deferred):
+        metainterp = MetaInterp(self, deferred.jitdriver_sd)
+        metainterp.history = deferred.history
+        metainterp.call_pure_results = deferred.call_pure_results
+        metainterp.box_names_memo = deferred.box_names_memo
+        metainterp.compile_deferred_loop(deferred)
+
     # ---------------- logging ------------------------
 
     def log(self, msg):
@@ -1998,6 +2040,26 @@ class MetaInterpGlobalData(object):
         self.initialized = False
         self.indirectcall_dict = None
         self.addr2name = None
+        self.deferred_loops = []
+
+# the maximum number of loops whose compilation is deferred at the same
+# time; each of them keeps its whole trace alive
+MAX_DEFERRED_LOOPS = 64
+
+class DeferredLoop(object):
+    """A loop traced by 'metainterp', whose compilation was deferred.
+    Only keeps what compile_loop() needs, not the whole MetaInterp.
+    It is stored on the JitCell of its greenkey, and in the queue
+    'globaldata.deferred_loops', oldest first."""
+    def __init__(self, metainterp, greenkey, start, inputargs, jumpargs):
+        self.jitdriver_sd = metainterp.jitdriver_sd
+        self.history = metainterp.history
+        self.call_pure_results = metainterp.call_pure_results
+        self.box_names_memo = metainterp.box_names_memo
+        self.greenkey = greenkey
+        self.start = start
+        self.inputargs = inputargs
+        self.jumpargs = jumpargs
 
 # ____________________________________________________________
 
@@ -2033,6 +2095,11 @@ class MetaInterp(object):
         self.aborted_tracing_greenkey = None
 
     def retrace_needed(self, trace, exported_state):
+        if jl.jit_decisions.is_enabled() and self.current_merge_points:
+            jd_sd = self.jitdriver_sd
+            greenkey = self.current_merge_points[0][0][:jd_sd.num_green_args]
+            jl.jit_decisions.record(jl.DECISION_RETRACE, 0,
+                    jd_sd.warmstate.get_decision_location(greenkey))
         self.partial_trace = trace
         self.retracing_from = self.potential_retrace_position
         self.exported_state = exported_state
@@ -2042,9 +2109,36 @@ class MetaInterp(object):
     def perform_call(self, jitcode, boxes, greenkey=None):
         # causes the metainterp to enter the given subfunction
         f = self.newframe(jitcode, greenkey)
+        if greenkey is not None:
+            f.inlined_from = self.history.length()
         f.setup_call(boxes)
         raise ChangeFrame
 
+    def inlining_would_abort(self, warmrunnerstate, greenkey):
+        """Guess, from the size of the previous inlined calls to the
+        function 'greenkey', if inlining it now would make the trace
+        longer than the trace_limit.  In this case, return True: the
+        call is done with a call_assembler instead, and if the function
+        is not compiled yet, it is traced on its own the next time it is
+        called.  Unlike JC_DONT_TRACE_HERE, this doesn't prevent inlining
+        the same function in other, shorter traces."""
+        size = warmrunnerstate.get_inlined_size(greenkey)
+        if size == 0:
+            return False
+        trace_limit = self.jitdriver_sd.warmstate.trace_limit
+        if self.history.length() + size <= trace_limit:
+            return False
+        if warmrunnerstate.get_procedure_token(greenkey) is None:
+            warmrunnerstate.JitCell.trace_next_iteration(greenkey)
+        if have_debug_prints():
+            loc = warmrunnerstate.get_location_str(greenkey)
+            debug_print("not inlined, the trace would be too long:", loc)
+        if jl.jit_decisions.is_enabled():
+            jl.jit_decisions.record(jl.DECISION_NOT_INLINED, 0,
+                    warmrunnerstate.get_decision_location(greenkey))
+        self.staticdata.profiler.count(Counters.NOT_INLINED_TOO_LONG)
+        return True
+
     def is_main_jitcode(self, jitcode):
         return (jitcode.jitdriver_sd is not None and
                 jitcode.jitdriver_sd.jitdriver.is_recursive)
@@ -2091,6 +2185,9 @@ class MetaInterp(object):
         if frame.greenkey is not None and self.is_main_jitcode(jitcode):
             self.portal_trace_positions.append(
                     (jitcode.jitdriver_sd, None, self.history.get_trace_position()))
+            if frame.inlined_from >= 0:
+                jitcode.jitdriver_sd.warmstate.record_inlined_size(
+                    frame.greenkey, self.history.length() - frame.inlined_from)
         # we save the freed MIFrames to avoid needing to re-create new
         # MIFrame objects all the time; they are a bit big, with their
         # 3*256 register entries.
@@ -2362,8 +2459,13 @@ class MetaInterp(object):
         jd_sd = self.jitdriver_sd
         if not self.current_merge_points:
             greenkey = None # we're in the bridge
+            if jl.jit_decisions.is_enabled():
+                jl.jit_decisions.record(jl.DECISION_ABORT, reason, '')
         else:
             greenkey = self.current_merge_points[0][0][:jd_sd.num_green_args]
+            if jl.jit_decisions.is_enabled():
+                jl.jit_decisions.record(jl.DECISION_ABORT, reason,
+                        jd_sd.warmstate.get_decision_location(greenkey))
             hooks = self.staticdata.warmrunnerdesc.hooks
             if hooks.are_hooks_enabled():
                 hooks.on_abort(reason,
@@ -2495,7 +2597,10 @@ class MetaInterp(object):
         # a stack of blackhole interpreters filled with the same values, and
         # run it.
         from rpython.jit.metainterp.blackhole import convert_and_run_from_pyjitpl
-        self.aborted_tracing(stb.reason)
+        if stb.reason == Counters.DEFERRED_LOOPS:
+            self.staticdata.profiler.count(stb.reason)
+        else:
+            self.aborted_tracing(stb.reason)
         convert_and_run_from_pyjitpl(self, stb.raising_exception)
         assert False    # ^^^ must raise
 
@@ -2679,6 +2784,8 @@ class MetaInterp(object):
         cell = JitCell.get_jit_cell_at_key(greenkey)
         if cell is None:
             return None
+        if cell.is_tiering_up():
+            return None     # we are replacing the loop of the baseline tier
         token = cell.get_procedure_token()
         if with_compiled_targets:
             if not token:
@@ -2691,6 +2798,10 @@ class MetaInterp(object):
                      try_disabling_unroll=False, exported_state=None):
         num_green_args = self.jitdriver_sd.num_green_args
         greenkey = original_boxes[:num_green_args]
+        tier_up_counter = None
+        if (not self.partial_trace and not try_disabling_unroll and
+                self.jitdriver_sd.warmstate.use_baseline_tier(greenkey)):
+            tier_up_counter = self.record_tier_up_guard()
         if self.history.trace_tag_overflow():
             raise SwitchToBlackhole(Counters.ABORT_TOO_LONG)
         self.history.trace.tracing_done()
@@ -2708,12 +2819,23 @@ class MetaInterp(object):
                                                    self.resumekey,
                                                    exported_state)
         else:
+            if (self.jitdriver_sd.warmstate.deferred_compile and
+                    not try_disabling_unroll and
+                    isinstance(self.resumekey, compile.ResumeFromInterpDescr)):
+                self.defer_loop(greenkey, start,
+                                original_boxes[num_green_args:],
+                                live_arg_boxes[num_green_args:])
             target_token = compile.compile_loop(self, greenkey, start,
                                                 original_boxes[num_green_args:],
                                                 live_arg_boxes[num_green_args:],
-                                     try_disabling_unroll=try_disabling_unroll)
+                                     try_disabling_unroll=try_disabling_unroll,
+                                     baseline=tier_up_counter is not None)
             if target_token is not None:
                 assert isinstance(target_token, TargetToken)
+                if tier_up_counter is not None:
+                    jitcell_token = target_token.targeting_jitcell_token
+                    jitcell_token.tier_up_counter = tier_up_counter
+                    self.staticdata.profiler.count(Counters.BASELINE_LOOPS)
                 self.jitdriver_sd.warmstate.attach_procedure_to_interp(greenkey, target_token.targeting_jitcell_token)
                 self.staticdata.stats.add_jitcell_token(target_token.targeting_jitcell_token)
 
@@ -2722,6 +2844,50 @@ class MetaInterp(object):
             jitcell_token = target_token.targeting_jitcell_token
             self.raise_continue_running_normally(live_arg_boxes, jitcell_token)
 
+    def record_tier_up_guard(self):
+        """Called before compiling a loop with the baseline tier: record
+        operations that count its iterations, and a guard that fails when
+        it ran 'threshold' times.  The interpreter then traces the loop
+        again (see maybe_compile_and_run())."""
+        counter = history.TierUpCounter(self.jitdriver_sd.warmstate.threshold)
+        c_addr = ConstInt(counter.get_address())
+        self.history.record(rop.INCREMENT_DEBUG_COUNTER, [c_addr], None)
+        count_box = self.execute_and_record(rop.RAW_LOAD_I,
+                                            self.staticdata.tier_up_counter_descr,
+                                            c_addr, ConstInt(0))
+        cond_box = self.execute_and_record(rop.INT_LT, None, count_box,
+                                           ConstInt(counter.limit))
+        self.generate_guard(rop.GUARD_TRUE, cond_box)
+        return counter
+
+    def defer_loop(self, greenkey, start, inputargs, jumpargs):
+        """Queue the loop for compile_deferred_loop(), and continue
+        running the interpreter until then."""
+        deferred = DeferredLoop(self, greenkey, start, inputargs, jumpargs)
+        deferred_loops = self.staticdata.globaldata.deferred_loops
+        if len(deferred_loops) >= MAX_DEFERRED_LOOPS:
+            self.staticdata._forget_deferred_loop(deferred_loops.pop(0))
+        deferred_loops.append(deferred)
+        self.jitdriver_sd.warmstate.set_deferred(greenkey, deferred)
+        self.staticdata.log('deferred compilation')
+        raise SwitchToBlackhole(Counters.DEFERRED_LOOPS)
+
+    def compile_deferred_loop(self, deferred):
+        greenkey = deferred.greenkey
+        self.jitdriver_sd.warmstate.set_deferred(greenkey, None)
+        ptoken = self.get_procedure_token(greenkey)
+        if ptoken is not None and ptoken.target_tokens is not None:
+            return     # we already have a loop now
+        target_token = compile.compile_loop(self, greenkey, deferred.start,
+                                            deferred.inputargs,
+                                            deferred.jumpargs)
+        if target_token is not None:
+            assert isinstance(target_token, TargetToken)
+            jitcell_token = target_token.targeting_jitcell_token
+            self.jitdriver_sd.warmstate.attach_procedure_to_interp(
+                greenkey, jitcell_token)
+            self.staticdata.stats.add_jitcell_token(jitcell_token)
+
     def compile_loop_or_abort(self, original_boxes, live_arg_boxes,
                               start):
         """Called after we aborted more than 'max_unroll_loops' times.
@@ -180,6 +180,7 @@ class ResumeDataLoopMemo(object):
         self.refs = self.cpu.ts.new_ref_dict_2()
         self.cached_boxes = {}
         self.cached_virtuals = {}
+        self.shared_prefix = resumecode.SharedPrefix()
 
         self.nvirtuals = 0
         self.nvholes = 0
@@ -465,7 +466,7 @@ class ResumeDataVirtualAdder(VirtualVisitor):
         numb_state.patch(1, len(liveboxes))
 
         self._add_optimizer_sections(numb_state, liveboxes, liveboxes_from_env)
-        storage.rd_numb = numb_state.create_numbering()
+        storage.rd_numb = numb_state.create_numbering(self.memo.shared_prefix)
         storage.rd_consts = self.memo.consts
         return liveboxes[:]
 
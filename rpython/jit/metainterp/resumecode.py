@@ -20,6 +20,19 @@
 
   # ----- optimization section
   <more code>                                      further sections according to bridgeopt.py
+
+Consecutive guards of a loop often have the same frames, so their resume
+sections are mostly identical.  A numbering can share these items with the
+numbering of a previous guard, which is then stored in 'prefix': the items
+of the resume section after the two first ones are read from prefix.code,
+between two byte offsets.  Its code is then:
+
+  [<number of bytes of the head> <start> <stop>]
+  [total size of resume section]  [number of failargs]     the head
+  <more code>                                              after the shared part
+
+The Reader hides this and returns the same items as for a numbering which
+is not shared.
 """
 
 from rpython.rtyper.lltypesystem import rffi, lltype
@@ -27,10 +40,17 @@ from rpython.rlib import objectmodel
 
 NUMBERINGP = lltype.Ptr(lltype.GcForwardReference())
 NUMBERING = lltype.GcStruct('Numbering',
+                            ('prefix', NUMBERINGP),
                             ('code', lltype.Array(rffi.UCHAR)))
 NUMBERINGP.TO.become(NUMBERING)
 NULL_NUMBER = lltype.nullptr(NUMBERING)
 
+# the number of items before the shared part, see the docstring above
+SHARED_START = 2
+# don't share fewer bytes than that: it would not save enough memory to
+# pay for the three offsets, and it makes reading a bit slower
+MIN_SHARED_BYTES = 32
+
 def append_numbering(lst, item):
     item = rffi.cast(lltype.Signed, item)
     item *= 2
@@ -50,6 +70,18 @@ def append_numbering(lst, item):
         lst.append(rffi.cast(rffi.UCHAR, item >> 14))
 
 
+def numbering_size(item):
+    """Number of bytes used by append_numbering(item)."""
+    item = rffi.cast(lltype.Signed, item)
+    item *= 2
+    if item < 0:
+        item = -1 - item
+    if item < 2**7:
+        return 1
+    elif item < 2**14:
+        return 2
+    return 3
+
 def numb_next_item(numb, index):
     value = rffi.cast(lltype.Signed, numb.code[index])
     index += 1
@@ -74,10 +106,9 @@ def numb_next_n_items(numb, size, index):
 
 def unpack_numbering(numb):
     l = []
-    i = 0
-    while i < len(numb.code):
-        next, i = numb_next_item(numb, i)
-        l.append(next)
+    reader = Reader(numb)
+    while not reader.at_end():
+        l.append(reader.next_item())
     return l
 
 class Writer(object):
@@ -92,13 +123,20 @@ class Writer(object):
         assert rffi.cast(lltype.Signed, short) == item
         return self.append_short(short)
 
-    def create_numbering(self):
+    def create_numbering(self, shared=None):
+        """Encode the items.  If 'shared' is a SharedPrefix, the items of
+        the resume section that are the same as in the last numbering
+        created with it are not copied, but shared with it."""
         final = objectmodel.newlist_hint(len(self.current) * 3)
         for item in self.current:
             append_numbering(final, item)
-        numb = lltype.malloc(NUMBERING, len(final))
-        for i, elt in enumerate(final):
-            numb.code[i] = elt
+        if shared is not None:
+            numb = shared.try_to_share(self.current, final)
+            if numb:
+                return numb
+        numb = _malloc_numbering(final)
+        if shared is not None:
+            shared.set_base(self.current, final, numb)
         return numb
 
     def patch_current_size(self, index):
@@ -107,35 +145,130 @@ class Writer(object):
     def patch(self, index, item):
         self.current[index] = item
 
-def create_numbering(l):
+def _malloc_numbering(code):
+    numb = lltype.malloc(NUMBERING, len(code))
+    for i, elt in enumerate(code):
+        numb.code[i] = elt
+    return numb
+
+
+class SharedPrefix(object):
+    """ Remembers the last numbering of a loop which does not share its
+    items, to share them with the numberings created next
+    (see Writer.create_numbering()).
+    """
+
+    def __init__(self):
+        self.items = None
+        self.numb = NULL_NUMBER
+        self.head_size = 0
+
+    def set_base(self, items, final, numb):
+        head_size = 0
+        for i in range(min(SHARED_START, len(items))):
+            head_size += numbering_size(items[i])
+        if len(final) >= 2**15:
+            return    # too large to be referenced by the offsets
+        self.items = items
+        self.numb = numb
+        self.head_size = head_size
+
+    def try_to_share(self, items, final):
+        base_items = self.items
+        if base_items is None or len(items) < SHARED_START:
+            return NULL_NUMBER
+        # the shared part is in the resume section, whose length is the
+        # first item
+        stop = min(rffi.cast(lltype.Signed, items[0]),
+                   rffi.cast(lltype.Signed, base_items[0]))
+        i = SHARED_START
+        shared_bytes = 0
+        while i < stop and (rffi.cast(lltype.Signed, items[i]) ==
+                            rffi.cast(lltype.Signed, base_items[i])):
+            shared_bytes += numbering_size(items[i])
+            i += 1
+        if shared_bytes < MIN_SHARED_BYTES:
+            return NULL_NUMBER
+        head_size = 0
+        for i in range(SHARED_START):
+            head_size += numbering_size(items[i])
+        code = objectmodel.newlist_hint(len(final) - shared_bytes + 9)
+        append_numbering(code, head_size)
+        append_numbering(code, self.head_size)
+        append_numbering(code, self.head_size + shared_bytes)
+        for i in range(head_size):
+            code.append(final[i])
+        for i in range(head_size + shared_bytes, len(final)):
+            code.append(final[i])
+        numb = _malloc_numbering(code)
+        numb.prefix = self.numb
+        return numb
+
+
+def create_numbering(l, shared=None):
     w = Writer()
     for item in l:
         w.append_int(item)
-    return w.create_numbering()
+    return w.create_numbering(shared)
+
 
+SEGMENT_HEAD, SEGMENT_SHARED, SEGMENT_LAST = range(3)
 
 class Reader(object):
     def __init__(self, code):
         self.code = code
-        self.cur_pos = 0 # index into the code
+        self.cur_code = code # the numbering currently read: code or its prefix
+        self.cur_pos = 0 # index into cur_code
         self.items_read = 0 # number of items read
+        self.tail_pos = 0
+        if code.prefix:
+            head_size, pos = numb_next_item(code, 0)
+            self.shared_start, pos = numb_next_item(code, pos)
+            self.shared_stop, pos = numb_next_item(code, pos)
+            self.cur_pos = pos
+            self.segment_end = pos + head_size
+            self.segment = SEGMENT_HEAD
+        else:
+            self.segment_end = len(code.code)
+            self.segment = SEGMENT_LAST
+
+    def _next_segment(self):
+        if self.segment == SEGMENT_HEAD:
+            self.tail_pos = self.cur_pos
+            self.cur_code = self.code.prefix
+            self.cur_pos = self.shared_start
+            self.segment_end = self.shared_stop
+            self.segment = SEGMENT_SHARED
+        else:
+            assert self.segment == SEGMENT_SHARED
+            self.cur_code = self.code
+            self.cur_pos = self.tail_pos
+            self.segment_end = len(self.code.code)
+            self.segment = SEGMENT_LAST
 
     def next_item(self):
-        result, self.cur_pos = numb_next_item(self.code, self.cur_pos)
+        if self.cur_pos == self.segment_end:
+            self._next_segment()
+        result, self.cur_pos = numb_next_item(self.cur_code, self.cur_pos)
         self.items_read += 1
         return result
 
     def peek(self):
-        result, _ = numb_next_item(self.code, self.cur_pos)
+        if self.cur_pos == self.segment_end:
+            self._next_segment()
+        result, _ = numb_next_item(self.cur_code, self.cur_pos)
         return result
 
     def jump(self, size):
         """ jump n items forward without returning anything """
-        index = self.cur_pos
         for i in range(size):
-            _, index = numb_next_item(self.code, index)
-        self.items_read += size
-        self.cur_pos = index
+            self.next_item()
+
+    def at_end(self):
+        while (self.cur_pos == self.segment_end and
+               self.segment != SEGMENT_LAST):
+            self._next_segment()
+        return self.cur_pos >= self.segment_end
 
     def unpack(self):
         # mainly for debugging
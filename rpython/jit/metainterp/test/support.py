@@ -27,6 +27,8 @@ def _get_jitcodes(testself, CPUClass, func, values,
             return self.__product_token
         def set_procedure_token(self, token):
             self.__product_token = token
+        def is_tiering_up(self):
+            return False
 
     class FakeWarmRunnerState(object):
         def attach_procedure_to_interp(self, greenkey, procedure_token):
@@ -43,6 +45,9 @@ def _get_jitcodes(testself, CPUClass, func, values,
         def get_location_str(self, args):
             return 'location'
 
+        def use_baseline_tier(self, greenkey):
+            return False
+
         class JitCell:
             @staticmethod
             def get_jit_cell_at_key(greenkey):
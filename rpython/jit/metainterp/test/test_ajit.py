@@ -1598,7 +1598,7 @@ class BasicTests:
             return x
         res = self.meta_interp(f, [299], listops=True)
         assert res == f(299)
-        self.check_resops(guard_class=0, guard_nonnull=4,
+        self.check_resops(guard_class=0, guard_nonnull=0,
                           guard_nonnull_class=4, guard_isnull=2)
 
 
@@ -1626,7 +1626,7 @@ class BasicTests:
             return x
         res = self.meta_interp(f, [299], listops=True)
         assert res == f(299)
-        self.check_resops(guard_value=4, guard_class=0, guard_nonnull=4,
+        self.check_resops(guard_value=4, guard_class=0, guard_nonnull=0,
                           guard_nonnull_class=0, guard_isnull=2)
 
 
@@ -1654,7 +1654,7 @@ class BasicTests:
             return x
         res = self.meta_interp(f, [299], listops=True)
         assert res == f(299)
-        self.check_resops(guard_value=4, guard_class=0, guard_nonnull=4,
+        self.check_resops(guard_value=4, guard_class=0, guard_nonnull=0,
                           guard_nonnull_class=0, guard_isnull=2)
 
 
@@ -1685,7 +1685,7 @@ class BasicTests:
             return x
         res = self.meta_interp(f, [399], listops=True)
         assert res == f(399)
-        self.check_resops(guard_class=0, guard_nonnull=6, guard_value=6,
+        self.check_resops(guard_class=0, guard_nonnull=0, guard_value=6,
                           guard_nonnull_class=0, guard_isnull=2)
 
 
@@ -2775,7 +2775,7 @@ class BasicTests:
                 i += 1
             return sa
         assert self.meta_interp(f, [20]) == f(20)
-        self.check_resops(int_lt=6, int_le=2, int_ge=4, int_gt=5)
+        self.check_resops(int_lt=6, int_le=2, int_ge=2, int_gt=5)
 
 
     def test_intbounds_not_generalized2(self):
@@ -0,0 +1,113 @@
+from rpython.rlib.jit import JitDriver, Counters, set_param
+from rpython.rlib import jit_hooks
+from rpython.jit.metainterp.test.support import LLJitMixin
+from rpython.jit.metainterp.jitprof import Profiler
+from rpython.jit.metainterp.warmspot import get_stats
+from rpython.jit.metainterp.resoperation import rop
+
+
+def get_count(n):
+    return jit_hooks.stats_get_counter_value(None, n)
+
+def count_labels(loop):
+    return len([op for op in loop.operations if op.getopnum() == rop.LABEL])
+
+
+class BaselineTests(object):
+
+    def test_compiled_again_when_hot(self):
+        myjitdriver = JitDriver(greens = [], reds = ['n', 'res'])
+        def f(n):
+            set_param(myjitdriver, 'threshold', 50)
+            set_param(myjitdriver, 'baseline_threshold', 5)
+            res = 0
+            while n > 0:
+                myjitdriver.jit_merge_point(n=n, res=res)
+                res += n
+                n -= 1
+            return get_count(Counters.BASELINE_LOOPS) * 100000 + res
+        res = self.meta_interp(f, [200], ProfilerClass=Profiler)
+        assert res == 100000 + 200 * 201 // 2
+        self.check_trace_count(2)
+        self.check_aborted_count(0)
+        baseline_loop, loop = get_stats().loops
+        # the baseline tier doesn't unroll the loop
+        assert count_labels(baseline_loop) == 1
+        assert count_labels(loop) == 2
+
+    def test_baseline_loop_only(self):
+        myjitdriver = JitDriver(greens = [], reds = ['n', 'res'])
+        def f(n):
+            set_param(myjitdriver, 'threshold', 50)
+            set_param(myjitdriver, 'baseline_threshold', 5)
+            res = 0
+            while n > 0:
+                myjitdriver.jit_merge_point(n=n, res=res)
+                res += n
+                n -= 1
+            return get_count(Counters.BASELINE_LOOPS) * 100000 + res
+        res = self.meta_interp(f, [40], ProfilerClass=Profiler)
+        assert res == 100000 + 40 * 41 // 2
+        self.check_trace_count(1)
+        self.check_resops(increment_debug_counter=1, int_lt=1)
+
+    def test_call_assembler_redirected(self):
+        driver = JitDriver(greens = ['codeno'], reds = ['i', 'k'],
+                           is_recursive=True)
+        def portal(codeno, k):
+            i = 0
+            while i < 10:
+                driver.can_enter_jit(codeno=codeno, i=i, k=k)
+                driver.jit_merge_point(codeno=codeno, i=i, k=k)
+                if codeno == 2:
+                    k += portal(1, k)
+                i += 1
+            return k
+        def main(n):
+            set_param(driver, 'threshold', 30)
+            set_param(driver, 'baseline_threshold', 3)
+            k = 0
+            for j in range(n):
+                k = portal(2, j)
+            return get_count(Counters.BASELINE_LOOPS) * 100000 + k
+        res = self.meta_interp(main, [20], ProfilerClass=Profiler,
+                               inline=True)
+        k = 0
+        for j in range(20):
+            k = portal(2, j)
+        assert res % 100000 == k
+        # both portals were first compiled by the baseline tier, then
+        # traced again
+        assert res // 100000 == 2
+        assert len(get_stats().loops) == 4
+        self.check_aborted_count(0)
+        baseline_tokens = []
+        for wref in get_stats().jitcell_token_wrefs:
+            token = wref()
+            if token is not None and token.tier_up_counter is not None:
+                baseline_tokens.append(token)
+        assert len(baseline_tokens) == 2
+        for token in baseline_tokens:
+            # the CALL_ASSEMBLERs to the baseline loop now go to the new
+            # loop: the baseline loop, which increments its counter before
+            # checking it, was not entered again after the tier-up
+            assert token.compiled_loop_token._llgraph_redirected
+            counter = token.tier_up_counter
+            assert counter.ptr[0] == counter.limit
+
+    def test_disabled_by_default(self):
+        myjitdriver = JitDriver(greens = [], reds = ['n', 'res'])
+        def f(n):
+            res = 0
+            while n > 0:
+                myjitdriver.jit_merge_point(n=n, res=res)
+                res += n
+                n -= 1
+            return get_count(Counters.BASELINE_LOOPS) * 100000 + res
+        res = self.meta_interp(f, [200], ProfilerClass=Profiler)
+        assert res == 200 * 201 // 2
+        self.check_trace_count(1)
+
+
+class TestLLtype(BaselineTests, LLJitMixin):
+    pass
@@ -9,9 +9,12 @@ from rpython.jit.metainterp.test.support import LLJitMixin
 from rpython.jit.metainterp.optimizeopt.bridgeopt import serialize_optimizer_knowledge
 from rpython.jit.metainterp.optimizeopt.bridgeopt import deserialize_optimizer_knowledge
 from rpython.jit.metainterp.resoperation import InputArgRef, InputArgInt
-from rpython.jit.metainterp.resume import NumberingState
+from rpython.jit.metainterp.resume import NumberingState, tag, TAGBOX
 from rpython.jit.metainterp.resumecode import unpack_numbering
 from rpython.jit.metainterp.optimizeopt.info import InstancePtrInfo
+from rpython.jit.metainterp.optimizeopt.info import NonNullPtrInfo
+from rpython.jit.metainterp.optimizeopt.intutils import (IntBound,
+    IntLowerBound, IntUpperBound, IntUnbounded, MAXINT)
 
 from hypothesis import strategies, given
 
@@ -32,10 +35,12 @@ class FakeOptimizer(object):
     optheap = None
     optrewrite = None
 
-    def __init__(self, dct={}, cpu=None):
+    def __init__(self, dct={}, cpu=None, bounds={}):
         self.dct = dct
         self.constant_classes = {}
         self.cpu = cpu
+        self.bounds = bounds.copy()
+        self.nonnull = []
 
     def getptrinfo(self, arg):
         return self.dct.get(arg, None)
@@ -43,6 +48,19 @@ class FakeOptimizer(object):
     def make_constant_class(self, arg, cls):
         self.constant_classes[arg] = cls
 
+    def getintbound(self, arg):
+        return self.bounds.get(arg, IntUnbounded())
+
+    def setintbound(self, arg, bound):
+        self.bounds[arg] = bound
+
+    def make_nonnull(self, arg):
+        self.nonnull.append(arg)
+
+class FakeMetaInterpStaticData(object):
+    def __init__(self, cpu):
+        self.cpu = cpu
+
 class FakeClass(object):
     pass
 
@@ -117,6 +135,80 @@ def test_random_class_knowledge(boxes_known_classes):
     for box, known_class in boxes_known_classes:
         assert (box in after_optimizer.constant_classes) == known_class
 
+def test_nonnull_and_int_bounds():
+    box1 = InputArgInt()
+    box2 = InputArgInt()
+    box3 = InputArgInt()
+    box4 = InputArgInt()
+    box5 = InputArgRef()
+    box6 = InputArgRef()
+    bounds = {box1: IntBound(0, 255), box2: IntUpperBound(5),
+              box3: IntBound(0, 2 ** 40), box4: IntLowerBound(-3)}
+    optimizer = FakeOptimizer({box5: NonNullPtrInfo()}, bounds=bounds)
+
+    numb_state = NumberingState(6)
+    numb_state.append_int(1) # size of resume block
+    liveboxes = [box1, box2, box3, box4, box5, box6]
+    liveboxes_from_env = {box: tag(i, TAGBOX)
+                              for i, box in enumerate(liveboxes)}
+
+    serialize_optimizer_knowledge(optimizer, numb_state, liveboxes,
+                                  liveboxes_from_env, None)
+    # an upper bound alone is not stored, an unknown one is lower - 1
+    assert unpack_numbering(numb_state.create_numbering())[5:] == [
+        4,
+        liveboxes_from_env[box1], 0, 255,
+        liveboxes_from_env[box3], 0, -1,
+        liveboxes_from_env[box4], -3, -4,
+        liveboxes_from_env[box5]]
+
+    rboxes = [InputArgInt(), InputArgInt(), InputArgInt(), InputArgInt(),
+              InputArgRef(), InputArgRef()]
+    after_optimizer = FakeOptimizer(cpu=FakeCPU({}))
+    after_optimizer.metainterp_sd = FakeMetaInterpStaticData(
+        after_optimizer.cpu)
+    deserialize_optimizer_knowledge(
+        after_optimizer, FakeStorage(numb_state.create_numbering()),
+        rboxes, rboxes)
+    assert after_optimizer.nonnull == [rboxes[4]]
+    bound = after_optimizer.bounds[rboxes[0]]
+    assert bound.has_lower and bound.lower == 0
+    assert bound.has_upper and bound.upper == 255
+    assert rboxes[1] not in after_optimizer.bounds
+    # the upper bound doesn't fit in the resume code
+    bound = after_optimizer.bounds[rboxes[2]]
+    assert bound.has_lower and bound.lower == 0
+    assert bound.upper == MAXINT
+    bound = after_optimizer.bounds[rboxes[3]]
+    assert bound.has_lower and bound.lower == -3
+    assert bound.upper == MAXINT
+
+def test_no_nonnull_or_int_bounds():
+    box1 = InputArgInt()
+    box2 = InputArgRef()
+    optimizer = FakeOptimizer({}, bounds={box1: IntUpperBound(5)})
+
+    numb_state = NumberingState(2)
+    numb_state.append_int(1) # size of resume block
+    liveboxes = [box1, box2]
+    liveboxes_from_env = {box: tag(i, TAGBOX)
+                              for i, box in enumerate(liveboxes)}
+
+    serialize_optimizer_knowledge(optimizer, numb_state, liveboxes,
+                                  liveboxes_from_env, None)
+    # the section is left out
+    assert unpack_numbering(numb_state.create_numbering()) == [
+        1, 0b000000, 0, 0, 0]
+
+    after_optimizer = FakeOptimizer(cpu=FakeCPU({}))
+    after_optimizer.metainterp_sd = FakeMetaInterpStaticData(
+        after_optimizer.cpu)
+    deserialize_optimizer_knowledge(
+        after_optimizer, FakeStorage(numb_state.create_numbering()),
+        liveboxes, liveboxes)
+    assert after_optimizer.nonnull == []
+    assert after_optimizer.bounds == {}
+
 class TestOptBridge(LLJitMixin):
     # integration tests
     def test_bridge_guard_class(self):
@@ -363,6 +455,28 @@ class TestOptBridge(LLJitMixin):
         self.check_trace_count(3)
         self.check_resops(call_r=1)
 
+    def test_bridge_int_bounds(self):
+        myjitdriver = jit.JitDriver(greens=[], reds=['y', 'res', 'n'])
+        def f(y, n):
+            res = 0
+            while y > 0:
+                myjitdriver.jit_merge_point(y=y, n=n, res=res)
+                if n < 0:
+                    return -1
+                if y > n:
+                    res += 1
+                if n < 0:
+                    return -2
+                res += 1
+                y -= 1
+            return res
+        res = self.meta_interp(f, [64, 32])
+        assert res == f(64, 32)
+        self.check_trace_count(3)
+        # the bridge knows that n >= 0, so it doesn't need to check it
+        # before jumping to the loop
+        self.check_resops(int_ge=0)
+
     @pytest.mark.xfail()
     def test_bridge_call_loopinvariant_2(self):
         class A(object):
@@ -27,6 +27,8 @@ class FakeCPU(object):
                      logger=None):
         token.compiled_loop_token = self.Storage()
         self.seen.append((inputargs, operations, token))
+    def profile_agent_enabled(self):
+        return False
 
 class FakeLogger(object):
     def log_loop(self, inputargs, operations, number=0, type=None, ops_offset=None, name='', memo=None):
@@ -0,0 +1,131 @@
+from rpython.rlib.jit import JitDriver, Counters, set_param
+from rpython.rlib import jit_hooks
+from rpython.jit.metainterp.test.support import LLJitMixin
+from rpython.jit.metainterp.jitprof import Profiler
+
+
+class DeferredCompileTests(object):
+
+    def test_compiled_when_hot_again(self):
+        myjitdriver = JitDriver(greens = [], reds = ['n', 'res'])
+        def f(n):
+            set_param(myjitdriver, 'deferred_compile', 1)
+            res = 0
+            while n > 0:
+                myjitdriver.jit_merge_point(n=n, res=res)
+                res += n
+                n -= 1
+            return get_count(Counters.DEFERRED_LOOPS) * 1000 + res
+        def get_count(n):
+            return jit_hooks.stats_get_counter_value(None, n)
+        res = self.meta_interp(f, [30], ProfilerClass=Profiler)
+        assert res == 1000 + 30 * 31 // 2
+        self.check_trace_count(1)
+        self.check_aborted_count(0)
+        self.check_enter_count(1)
+
+    def test_compile_deferred_loops(self):
+        myjitdriver = JitDriver(greens = [], reds = ['n', 'res'])
+        def loop(n):
+            res = 0
+            while n > 0:
+                myjitdriver.jit_merge_point(n=n, res=res)
+                res += n
+                n -= 1
+            return res
+        def get_count(n):
+            return jit_hooks.stats_get_counter_value(None, n)
+        def main():
+            set_param(myjitdriver, 'deferred_compile', 1)
+            res = loop(5)
+            assert get_count(Counters.DEFERRED_LOOPS) == 1
+            assert get_count(Counters.TOTAL_COMPILED_LOOPS) == 0
+            jit_hooks.metainterp_compile_deferred_loops(None)
+            assert get_count(Counters.TOTAL_COMPILED_LOOPS) == 1
+            jit_hooks.metainterp_compile_deferred_loops(None)
+            assert get_count(Counters.TOTAL_COMPILED_LOOPS) == 1
+            res += loop(30)
+            assert get_count(Counters.TRACING) == 1
+            return res
+        res = self.meta_interp(main, [], ProfilerClass=Profiler)
+        assert res == 5 * 6 // 2 + 30 * 31 // 2
+        self.check_trace_count(1)
+        self.check_aborted_count(0)
+
+    def test_only_hot_loop_compiled(self):
+        myjitdriver = JitDriver(greens = ['code'], reds = ['n', 'res'])
+        def loop(code, n):
+            res = 0
+            while n > 0:
+                myjitdriver.jit_merge_point(code=code, n=n, res=res)
+                res += n * code
+                n -= 1
+            return res
+        def get_count(n):
+            return jit_hooks.stats_get_counter_value(None, n)
+        def main():
+            set_param(myjitdriver, 'deferred_compile', 1)
+            res = loop(1, 5)
+            res += loop(2, 5)
+            assert get_count(Counters.DEFERRED_LOOPS) == 2
+            assert get_count(Counters.TOTAL_COMPILED_LOOPS) == 0
+            res += loop(1, 30)
+            # only the loop of code=1 got hot again
+            assert get_count(Counters.TOTAL_COMPILED_LOOPS) == 1
+            jit_hooks.metainterp_compile_deferred_loops(None)
+            assert get_count(Counters.TOTAL_COMPILED_LOOPS) == 2
+            return res
+        res = self.meta_interp(main, [], ProfilerClass=Profiler)
+        assert res == 15 + 30 + 30 * 31 // 2
+        self.check_trace_count(2)
+        self.check_aborted_count(0)
+
+    def test_oldest_deferred_loop_dropped(self, monkeypatch):
+        from rpython.jit.metainterp import pyjitpl
+        monkeypatch.setattr(pyjitpl, 'MAX_DEFERRED_LOOPS', 1)
+        myjitdriver = JitDriver(greens = ['code'], reds = ['n', 'res'])
+        def loop(code, n):
+            res = 0
+            while n > 0:
+                myjitdriver.jit_merge_point(code=code, n=n, res=res)
+                res += n * code
+                n -= 1
+            return res
+        def get_count(n):
+            return jit_hooks.stats_get_counter_value(None, n)
+        def main():
+            set_param(myjitdriver, 'deferred_compile', 1)
+            res = loop(1, 5)
+            res += loop(2, 5)
+            # the loop of code=1 was dropped from the queue
+            assert get_count(Counters.DEFERRED_LOOPS) == 2
+            res += loop(1, 30)
+            # so it is traced again when it gets hot, which drops code=2
+            assert get_count(Counters.TRACING) == 3
+            assert get_count(Counters.DEFERRED_LOOPS) == 3
+            assert get_count(Counters.TOTAL_COMPILED_LOOPS) == 1
+            jit_hooks.metainterp_compile_deferred_loops(None)
+            assert get_count(Counters.TOTAL_COMPILED_LOOPS) == 1
+            return res
+        res = self.meta_interp(main, [], ProfilerClass=Profiler)
+        assert res == 15 + 30 + 30 * 31 // 2
+        self.check_aborted_count(0)
+
+    def test_not_deferred_by_default(self):
+        myjitdriver = JitDriver(greens = [], reds = ['n', 'res'])
+        def f(n):
+            res = 0
+            while n > 0:
+                myjitdriver.jit_merge_point(n=n, res=res)
+                res += n
+                n -= 1
+            return get_count(Counters.DEFERRED_LOOPS) * 1000 + res
+        def get_count(n):
+            return jit_hooks.stats_get_counter_value(None, n)
+        res = self.meta_interp(f, [30], ProfilerClass=Profiler)
+        assert res == 30 * 31 // 2
+        self.check_trace_count(1)
+
+
+class TestLLtype(DeferredCompileTests, LLJitMixin):
+    pass
@@ -0,0 +1,116 @@
+from rpython.rlib.jit import JitDriver, Counters
+from rpython.rlib.rjitlog import rjitlog as jl
+from rpython.jit.metainterp.test.support import LLJitMixin
+
+
+def get_printable_location(code):
+    return 'code %d' % code
+
+def replay(*decisions):
+    jl.jit_decisions.replayed = dict.fromkeys(
+        [jl.decision_key(kind, detail, location)
+         for kind, detail, location in decisions])
+
+
+class JitDecisionsTests(object):
+
+    def teardown_method(self, meth):
+        jl.stop_decisions()
+
+    def test_record(self, tmpdir):
+        myjitdriver = JitDriver(greens = ['code'], reds = ['n', 'res'],
+                                get_printable_location=get_printable_location)
+        def f(code, n):
+            res = 0
+            while n > 0:
+                myjitdriver.jit_merge_point(code=code, n=n, res=res)
+                res += n
+                n -= 1
+            return res
+        file = tmpdir.join('decisions')
+        fd = file.open('wb')
+        try:
+            jl.record_decisions(fd.fileno())
+            res = self.meta_interp(f, [5, 100])
+        finally:
+            jl.stop_decisions()
+            fd.close()
+        assert res == f(5, 100)
+        self.check_trace_count(1)
+        decisions = jl.parse_decisions(file.read('rb'))
+        assert decisions == [(jl.DECISION_TRACE, 0, 'code 5')]
+
+    def test_record_abort(self, tmpdir):
+        myjitdriver = JitDriver(greens = ['code'], reds = ['n', 'res'],
+                                get_printable_location=get_printable_location)
+        def f(code, n):
+            res = 0
+            while n > 0:
+                myjitdriver.jit_merge_point(code=code, n=n, res=res)
+                for i in range(n):
+                    res += i
+                n -= 1
+            return res
+        file = tmpdir.join('decisions')
+        fd = file.open('wb')
+        try:
+            jl.record_decisions(fd.fileno())
+            self.meta_interp(f, [3, 100], trace_limit=30)
+        finally:
+            jl.stop_decisions()
+            fd.close()
+        self.check_aborted_count_at_least(1)
+        decisions = jl.parse_decisions(file.read('rb'))
+        assert (jl.DECISION_TRACE, 0, 'code 3') in decisions
+        assert (jl.DECISION_ABORT, Counters.ABORT_TOO_LONG,
+                'code 3') in decisions
+
+    def test_replay_no_trace(self):
+        myjitdriver = JitDriver(greens = ['code'], reds = ['n', 'res'],
+                                get_printable_location=get_printable_location)
+        def f(code, n):
+            res = 0
+            while n > 0:
+                myjitdriver.jit_merge_point(code=code, n=n, res=res)
+                res += n
+                n -= 1
+            return res
+        replay((jl.DECISION_TRACE, 0, 'code 6'))
+        res = self.meta_interp(f, [5, 100])
+        assert res == f(5, 100)
+        self.check_trace_count(0)
+        replay((jl.DECISION_TRACE, 0, 'code 5'))
+        res = self.meta_interp(f, [5, 100])
+        assert res == f(5, 100)
+        self.check_trace_count(1)
+
+    def test_replay_dont_inline(self):
+        driver = JitDriver(greens = ['code'], reds = ['i'],
+                           get_printable_location=get_printable_location)
+        def portal(code):
+            i = 0
+            while True:
+                driver.jit_merge_point(code=code, i=i)
+                if code < 10:
+                    i += portal(20)
+                    code += 1
+                elif code == 10:
+                    if i > 63:
+                        return i
+                    code = 0
+                    driver.can_enter_jit(code=code, i=i)
+                else:
+                    return 1
+        replay((jl.DECISION_TRACE, 0, 'code 0'))
+        res = self.meta_interp(portal, [0], inline=True)
+        assert res == 70
+        self.check_resops(call_assembler_i=0)
+        replay((jl.DECISION_TRACE, 0, 'code 0'),
+               (jl.DECISION_DONT_INLINE, 0, 'code 20'))
+        res = self.meta_interp(portal, [0], inline=True)
+        assert res == 70
+        self.check_resops(call_assembler_i=20)
+
+
+class TestLLtype(JitDecisionsTests, LLJitMixin):
+    pass
@@ -157,6 +157,54 @@ class JitHookInterfaceTests(object):
             assert jit_hooks.stats_get_times_value(None, Counters.TRACING) == 0
         self.meta_interp(main, [], ProfilerClass=EmptyProfiler)
 
+    def test_guard_stats(self):
+        driver = JitDriver(greens = ['k'], reds = ['i', 's'])
+
+        def loop(i, k):
+            s = 0
+            while i > 0:
+                driver.jit_merge_point(i=i, s=s, k=k)
+                if i % 2:
+                    s += 1
+                i -= 1
+                s+= 2
+            return s
+
+        def main():
+            loop(30, 1)
+            assert len(jit_hooks.stats_get_guard_stats(None)) == 0
+            jit_hooks.stats_set_guard_stats(None, True)
+            loop(30, 2)
+            ll_stats = jit_hooks.stats_get_guard_stats(None)
+            assert len(ll_stats) > 0
+            failures = 0
+            bridges = 0
+            for j in range(len(ll_stats)):
+                failures += ll_stats[j].failures
+                bridges += ll_stats[j].bridges
+            assert bridges == 1
+            assert failures >= 1
+            jit_hooks.stats_set_guard_stats(None, False)
+            assert len(jit_hooks.stats_get_guard_stats(None)) == 0
+
+        self.meta_interp(main, [], ProfilerClass=Profiler)
+
+    def test_prepare_for_fork(self):
+        driver = JitDriver(greens = [], reds = ['i', 's'])
+        def loop(i):
+            s = 0
+            while i > 0:
+                driver.jit_merge_point(i=i, s=s)
+                s += i
+                i -= 1
+            return s
+        def main():
+            res = loop(30)
+            jit_hooks.cpu_prepare_for_fork(None)
+            return res + loop(40)
+        res = self.meta_interp(main, [])
+        assert res == 30 * 31 // 2 + 40 * 41 // 2
+
     def test_get_jitcell_at_key(self):
         driver = JitDriver(greens = ['s'], reds = ['i'], name='jit')
 
@@ -20,7 +20,16 @@ from rpython.rlib import rgc
 
 class FakeLoopToken:
     generation = 0
+    entry_count = 0
     invalidated = False
+    code_size = 0
+    compiled_loop_token = 100      # used as the code size by FakeCPU
+
+class FakeCPU:
+    size_requests = 0
+    def get_loop_code_size(self, compiled_loop_token):
+        self.size_requests += 1
+        return compiled_loop_token
 
 
 class _TestMemoryManager:
@@ -78,6 +87,81 @@ class _TestMemoryManager:
             else:
                 assert tokens[i] in memmgr.alive_loops
 
+    def test_memory_limit(self):
+        memmgr = MemoryManager()
+        memmgr.cpu = FakeCPU()
+        memmgr.set_max_age(0)
+        memmgr.set_memory_limit(1000)
+        tokens = [FakeLoopToken() for i in range(10)]
+        for token in tokens:
+            memmgr.keep_loop_alive(token)
+            memmgr.next_generation()
+        assert memmgr.alive_loops == dict.fromkeys(tokens)
+        extra = FakeLoopToken()
+        memmgr.keep_loop_alive(extra)
+        memmgr.next_generation()
+        # 1100 bytes > 1000: the oldest loops are freed, down to 750 bytes
+        assert memmgr.alive_loops == dict.fromkeys(tokens[4:] + [extra])
+        assert memmgr.evicted_loops == 4
+        assert memmgr.evicted_bytes == 400
+        assert memmgr.alive_code_size == 700
+
+    def test_memory_limit_running_total(self):
+        memmgr = MemoryManager()
+        memmgr.cpu = FakeCPU()
+        memmgr.set_max_age(0)
+        memmgr.set_memory_limit(1000)
+        tokens = [FakeLoopToken() for i in range(5)]
+        for token in tokens:
+            memmgr.keep_loop_alive(token)
+            memmgr.keep_loop_alive(token)
+        assert memmgr.alive_code_size == 500
+        # the sizes are only asked for once, and not again when below
+        # the limit
+        assert memmgr.cpu.size_requests == 5
+        for i in range(10):
+            memmgr.next_generation()
+        assert memmgr.cpu.size_requests == 5
+        # a bridge makes the loop bigger
+        tokens[0].compiled_loop_token = 300
+        memmgr.loop_code_size_changed(tokens[0])
+        assert memmgr.alive_code_size == 700
+        # a loop that is still alive is only counted once
+        memmgr.keep_loop_alive(tokens[0])
+        assert memmgr.alive_code_size == 700
+
+    def test_memory_limit_keeps_loops_entered_often(self):
+        memmgr = MemoryManager()
+        memmgr.cpu = FakeCPU()
+        memmgr.set_max_age(0)
+        memmgr.set_memory_limit(1000)
+        hot = FakeLoopToken()
+        for i in range(50):
+            memmgr.keep_loop_alive(hot)
+        tokens = [FakeLoopToken() for i in range(10)]
+        for token in tokens:
+            memmgr.keep_loop_alive(token)
+            memmgr.next_generation()
+        # the hot loop is the oldest one, but it is kept
+        assert hot in memmgr.alive_loops
+        assert memmgr.alive_loops == dict.fromkeys([hot] + tokens[4:])
+
+    def test_memory_limit_invalidated_first(self):
+        memmgr = MemoryManager()
+        memmgr.cpu = FakeCPU()
+        memmgr.set_max_age(0)
+        memmgr.set_memory_limit(400)
+        tokens = [FakeLoopToken() for i in range(4)]
+        for token in tokens:
+            memmgr.keep_loop_alive(token)
+            memmgr.next_generation()
+        tokens[3].invalidated = True
+        big = FakeLoopToken()
+        memmgr.keep_loop_alive(big)
+        memmgr.next_generation()
+        assert tokens[3] not in memmgr.alive_loops
+        assert big in memmgr.alive_loops
+
 
 class _TestIntegration(LLJitMixin):
     # See comments in TestMemoryManager.  To get temporarily the normal
@@ -1,12 +1,14 @@
 import py
-from rpython.rlib.jit import JitDriver, hint, set_param
+from rpython.rlib.jit import JitDriver, hint, set_param, Counters
 from rpython.rlib.jit import unroll_safe, dont_look_inside, promote
 from rpython.rlib.objectmodel import we_are_translated
 from rpython.rlib.debug import fatalerror
+from rpython.rlib import jit_hooks
 from rpython.jit.metainterp.test.support import LLJitMixin
 from rpython.jit.codewriter.policy import StopAtXPolicy
 from rpython.rtyper.annlowlevel import hlstr
 from rpython.jit.metainterp.warmspot import get_stats
+from rpython.jit.metainterp.jitprof import Profiler
 from rpython.jit.backend.llsupport import codemap
 
 class RecursiveTests:
@@ -579,6 +581,52 @@ class RecursiveTests:
         self.check_resops(call=0, call_assembler_i=2)
         self.check_jitcell_token_count(2)
 
+    def test_dont_inline_when_trace_would_be_too_long(self):
+        def p(pc, code):
+            code = hlstr(code)
+            return "%s %d %s" % (code, pc, code[pc])
+        myjitdriver = JitDriver(greens=['pc', 'code'], reds=['n'],
+                                get_printable_location=p,
+                                is_recursive=True)
+
+        def f(code, n):
+            pc = 0
+            while pc < len(code):
+                myjitdriver.jit_merge_point(n=n, code=code, pc=pc)
+                op = code[pc]
+                if op == "-":
+                    n -= 1
+                elif op == "+":
+                    n += 1
+                elif op == "c":
+                    n = f('++++++++++', n)
+                elif op == "l":
+                    if n > 0:
+                        myjitdriver.can_enter_jit(n=n, code=code, pc=0)
+                        pc = 0
+                        continue
+                else:
+                    assert 0
+                pc += 1
+            return n
+        def g(m):
+            set_param(None, 'inlining', True)
+            # the inner function can be inlined once in the trace of the
+            # outer loop, but not twice: the second call should become a
+            # call_assembler, instead of aborting the trace
+            set_param(None, 'trace_limit', 60)
+            if m > 1000000:
+                f('', 0)
+            result = 0
+            for i in range(m):
+                result += f('c-------------c-------------l', i+100)
+            return jit_hooks.stats_get_counter_value(
+                None, Counters.NOT_INLINED_TOO_LONG)
+        res = self.meta_interp(g, [10], backendopt=True,
+                               ProfilerClass=Profiler)
+        assert res >= 1
+        self.check_aborted_count(0)
+
     def test_directly_call_assembler(self):
         driver = JitDriver(greens = ['codeno'], reds = ['i'],
                            get_printable_location = lambda codeno : str(codeno))
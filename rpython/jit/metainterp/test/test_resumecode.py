@@ -1,5 +1,5 @@
 from rpython.jit.metainterp.resumecode import create_numbering,\
-    unpack_numbering, Reader, Writer
+    unpack_numbering, Reader, Writer, SharedPrefix
 from rpython.rtyper.lltypesystem import lltype
 
 from hypothesis import strategies, given, example
@@ -60,3 +60,50 @@ def test_patch(l):
         n = w.create_numbering()
         assert unpack_numbering(n)[1:] == l
         assert unpack_numbering(n)[0] == middle + 1
+
+def test_shared_prefix():
+    shared = SharedPrefix()
+    l1 = [40, 3] + range(1000, 1038) + [5, 6]
+    l2 = [40, 4] + range(1000, 1030) + range(8) + [7]
+    n1 = create_numbering(l1, shared)
+    n2 = create_numbering(l2, shared)
+    assert not n1.prefix
+    assert n2.prefix == n1
+    assert len(n2.code) < 20
+    assert unpack_numbering(n1) == l1
+    assert unpack_numbering(n2) == l2
+    r = Reader(n2)
+    assert r.next_item() == 40
+    r.jump(30)
+    assert r.items_read == 31
+    assert r.peek() == 1029
+    assert r.next_item() == 1029
+    assert r.next_item() == 0
+    r.jump(7)
+    assert r.next_item() == 7
+    assert r.at_end()
+
+def test_shared_prefix_too_short():
+    shared = SharedPrefix()
+    l1 = [10, 3] + range(1000, 1008)
+    l2 = [10, 4] + range(1000, 1004) + range(4)
+    n1 = create_numbering(l1, shared)
+    n2 = create_numbering(l2, shared)
+    assert not n2.prefix
+    assert unpack_numbering(n2) == l2
+
+@given(strategies.lists(strategies.integers(-2**15, 2**15-1)),
+       strategies.lists(strategies.integers(-2**15, 2**15-1)),
+       strategies.lists(strategies.integers(-2**15, 2**15-1)))
+def test_shared_roundtrip(common, tail1, tail2):
+    shared = SharedPrefix()
+    l1 = [2 + len(common) + len(tail1), 1] + common + tail1
+    l2 = [2 + len(common) + len(tail2), 2] + common + tail2
+    n1 = create_numbering(l1, shared)
+    n2 = create_numbering(l2, shared)
+    assert unpack_numbering(n1) == l1
+    assert unpack_numbering(n2) == l2
+    r = Reader(n2)
+    for i, elt in enumerate(l2):
+        assert r.items_read == i
+        assert r.next_item() == elt
@@ -495,6 +495,25 @@ class VectorizeTests(object):
         assert res == f(60,0.5) == 60*0.5
 
 
+    def test_accum_float_sum(self):
+        myjitdriver = JitDriver(greens = [], reds = 'auto', vectorize=True)
+        T = lltype.Array(rffi.DOUBLE, hints={'nolength': True})
+        def f(d):
+            va = lltype.malloc(T, d, flavor='raw', zero=True)
+            for i in range(d):
+                va[i] = float(i)
+            r = 0.5
+            i = 0
+            while i < d:
+                myjitdriver.jit_merge_point()
+                r += va[i]
+                i += 1
+            lltype.free(va, flavor='raw')
+            return r
+        res = self.meta_interp(f, [60], vec=True)
+        assert res == f(60) == 1770.5
+        self.check_resops(vec_float_add=1)
+
     @py.test.mark.parametrize('i',[15])
     def test_array_bounds_check_elimination(self,i):
         myjitdriver = JitDriver(greens = [],
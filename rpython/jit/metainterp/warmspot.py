@@ -19,6 +19,7 @@ from rpython.translator.backendopt import removenoops
 from rpython.translator.unsimplify import call_final_function
 
 from rpython.jit.metainterp import history, pyjitpl, gc, memmgr, jitexc
+from rpython.jit.metainterp import guardstats
 from rpython.jit.metainterp.pyjitpl import MetaInterpStaticData
 from rpython.jit.metainterp.jitprof import Profiler, EmptyProfiler
 from rpython.jit.metainterp.jitdriver import JitDriverStaticData
@@ -209,6 +210,7 @@ def reset_jit():
     """Helper for some tests (see micronumpy/test/test_zjit.py)"""
     reset_stats()
     pyjitpl._warmrunnerdesc.memory_manager.alive_loops.clear()
+    pyjitpl._warmrunnerdesc.memory_manager.alive_code_size = 0
     pyjitpl._warmrunnerdesc.jitcounter._clear_all()
 
 def get_translator():
@@ -237,7 +239,9 @@ class WarmRunnerDesc(object):
         pyjitpl._warmrunnerdesc = self   # this is a global for debugging only!
         self.set_translator(translator)
         self.memory_manager = memmgr.MemoryManager()
+        self.guard_stats = guardstats.GuardStats()
         self.build_cpu(CPUClass, **kwds)
+        self.memory_manager.cpu = self.cpu
         self.inline_inlineable_portals()
         self.find_portals()
         self.codewriter = codewriter.CodeWriter(self.cpu, self.jitdrivers_sd)
@@ -850,7 +854,7 @@ class WarmRunnerDesc(object):
         # make sure we make a copy of function so it no longer belongs
         # to extregistry
         func = op.args[1].value
-        if func.func_name.startswith('stats_'):
+        if func.func_name.startswith(('stats_', 'cpu_', 'metainterp_')):
             # get special treatment since we rewrite it to a call that accepts
             # jit driver
             assert len(op.args) >= 3, ("%r must have a first argument "
@@ -138,6 +138,8 @@ JC_TRACING         = 0x01
 JC_DONT_TRACE_HERE = 0x02
 JC_TEMPORARY       = 0x04
 JC_TRACING_OCCURRED= 0x08
+JC_DEFERRED        = 0x10
+JC_TIER_UP         = 0x20
 
 class BaseJitCell(object):
     """Subclasses of BaseJitCell are used in tandem with the single
@@ -184,9 +186,26 @@ class BaseJitCell(object):
         this particular function.  (We only set this flag when aborting
         due to a trace too long, so we use the same flag as a hint to
         also mean "please trace from here as soon as possible".)
+
+        JC_DEFERRED: a loop was traced from this greenkey, but its
+        compilation was deferred (see the 'deferred_compile' parameter).
+        The trace is in 'deferred_loop'.  When the JitCounter reaches the
+        threshold again, we compile it instead of tracing again.
+
+        JC_TIER_UP: the procedure_token is a loop compiled by the
+        baseline tier (see the 'baseline_threshold' parameter) which
+        ran 'threshold' times.  We trace it again, and until we manage
+        to compile it with all the optimizations, we don't use it.
+
+    A JitCell also records 'inlined_size', the number of operations
+    produced by inlining this function in a trace (a running average),
+    or 0 if it was not inlined so far.  It is used to avoid inlining it
+    when the trace would become too long.
     """
     flags = 0     # JC_xxx flags
+    inlined_size = 0
     wref_procedure_token = None
+    deferred_loop = None     # with JC_DEFERRED
     next = None
 
     def get_procedure_token(self):
@@ -205,6 +224,10 @@ class BaseJitCell(object):
             self.flags |= JC_TEMPORARY
         else:
             self.flags &= ~JC_TEMPORARY
+        self.flags &= ~JC_TIER_UP
+
+    def is_tiering_up(self):
+        return (self.flags & JC_TIER_UP) != 0
 
     def _makeref(self, token):
         assert token is not None
@@ -213,7 +236,7 @@ class BaseJitCell(object):
     def should_remove_jitcell(self):
         if self.get_procedure_token() is not None:
             return False    # don't remove JitCells with a procedure_token
-        if self.flags & JC_TRACING:
+        if self.flags & (JC_TRACING | JC_DEFERRED):
             return False    # don't remove JitCells that are being traced
         if self.flags & JC_DONT_TRACE_HERE:
             # if we have this flag, and we *had* a procedure_token but
@@ -226,6 +249,8 @@ class BaseJitCell(object):
 
 
 class WarmEnterState(object):
+    threshold = 0
+    baseline_threshold = 0
 
     def __init__(self, warmrunnerdesc, jitdriver_sd):
         "NOT_RPYTHON"
@@ -248,6 +273,19 @@ class WarmEnterState(object):
         return self.warmrunnerdesc.jitcounter.compute_threshold(threshold)
 
     def set_param_threshold(self, threshold):
+        self.threshold = threshold
+        self._update_increment_threshold()
+
+    def set_param_baseline_threshold(self, threshold):
+        self.baseline_threshold = threshold
+        self._update_increment_threshold()
+
+    def _update_increment_threshold(self):
+        # with a baseline tier, loops are first traced after
+        # 'baseline_threshold' iterations
+        threshold = self.threshold
+        if 0 < self.baseline_threshold < threshold:
+            threshold = self.baseline_threshold
         self.increment_threshold = self._compute_threshold(threshold)
 
     def set_param_function_threshold(self, threshold):
@@ -289,6 +327,12 @@ class WarmEnterState(object):
             self.warmrunnerdesc.memory_manager is not None):   # all for tests
             self.warmrunnerdesc.memory_manager.set_max_age(value)
 
+    def set_param_loop_memory_limit(self, value):
+        # note: it's a global parameter, not a per-jitdriver one
+        if (self.warmrunnerdesc is not None and
+            self.warmrunnerdesc.memory_manager is not None):   # all for tests
+            self.warmrunnerdesc.memory_manager.set_memory_limit(value * 1024)
+
     def set_param_retrace_limit(self, value):
         if self.warmrunnerdesc:
             if self.warmrunnerdesc.memory_manager:
@@ -318,14 +362,62 @@ class WarmEnterState(object):
     def set_param_vec_cost(self, ivalue):
         self.vec_cost = ivalue
 
+    def set_param_deferred_compile(self, ivalue):
+        self.deferred_compile = bool(ivalue)
+
+    def use_baseline_tier(self, greenkey):
+        """Should the loop traced from 'greenkey' be compiled by the
+        baseline tier?  Not if it is already the second time, i.e. if
+        the loop compiled by the baseline tier ran 'threshold' times."""
+        if not (0 < self.baseline_threshold < self.threshold):
+            return False
+        if self.deferred_compile:
+            return False
+        cell = self.JitCell.get_jit_cell_at_key(greenkey)
+        return cell is None or not cell.is_tiering_up()
+
     def disable_noninlinable_function(self, greenkey):
         cell = self.JitCell.ensure_jit_cell_at_key(greenkey)
         cell.flags |= JC_DONT_TRACE_HERE
+        if jl.jit_decisions.is_enabled():
+            jl.jit_decisions.record(jl.DECISION_DONT_INLINE, 0,
+                                    self.get_decision_location(greenkey))
         debug_start("jit-disableinlining")
         loc = self.get_location_str(greenkey)
         debug_print("disabled inlining", loc)
         debug_stop("jit-disableinlining")
 
+    def record_inlined_size(self, greenkey, size):
+        cell = self.JitCell.ensure_jit_cell_at_key(greenkey)
+        if cell.inlined_size == 0:
+            cell.inlined_size = size
+        else:
+            cell.inlined_size = (cell.inlined_size + size) >> 1
+
+    def get_inlined_size(self, greenkey):
+        cell = self.JitCell.get_jit_cell_at_key(greenkey)
+        if cell is None:
+            return 0
+        return cell.inlined_size
+
+    def get_procedure_token(self, greenkey):
+        cell = self.JitCell.get_jit_cell_at_key(greenkey)
+        if cell is None:
+            return None
+        return cell.get_procedure_token()
+
+    def set_deferred(self, greenkey, deferred):
+        # 'deferred' is the DeferredLoop traced from 'greenkey', or None
+        if deferred is not None:
+            cell = self.JitCell.ensure_jit_cell_at_key(greenkey)
+            cell.flags |= JC_DEFERRED
+        else:
+            cell = self.JitCell.get_jit_cell_at_key(greenkey)
+            if cell is None:
+                return
+            cell.flags &= ~JC_DEFERRED
+        cell.deferred_loop = deferred
+
     def attach_procedure_to_interp(self, greenkey, procedure_token):
         cell = self.JitCell.ensure_jit_cell_at_key(greenkey)
         old_token = cell.get_procedure_token()
@@ -354,6 +446,7 @@ class WarmEnterState(object):
         JitCell = self.make_jitcell_subclass()
         self.make_jitdriver_callbacks()
         confirm_enter_jit = self.confirm_enter_jit
+        printable_location = self.printable_location
         range_red_args = unrolling_iterable(
             range(num_green_args, num_green_args + jitdriver_sd.num_red_args))
         name_red_args = unrolling_iterable(
@@ -418,6 +511,19 @@ class WarmEnterState(object):
             jitcounter.decay_all_counters()
             if rstack.stack_almost_full():
                 return
+            if cell is not None and cell.flags & JC_DEFERRED:
+                # we already have a trace, compile it now.  The next
+                # iteration will run the loop.
+                if metainterp_sd.compile_deferred_loop(cell):
+                    return
+                cell.flags &= ~JC_DEFERRED
+            if jl.jit_decisions.is_enabled():
+                location = printable_location(*args[:num_green_args])
+                if (jl.jit_decisions.is_replaying() and
+                    not jl.jit_decisions.was_recorded(jl.DECISION_TRACE, 0,
+                                                      location)):
+                    return     # the recorded run didn't trace here
+                jl.jit_decisions.record(jl.DECISION_TRACE, 0, location)
             # start tracing
             from rpython.jit.metainterp.pyjitpl import MetaInterp
             metainterp = MetaInterp(metainterp_sd, jitdriver_sd)
@@ -468,6 +574,10 @@ class WarmEnterState(object):
             # machine code was already compiled for these greenargs
             procedure_token = cell.get_procedure_token()
             if procedure_token is None:
+                if cell.flags & JC_DEFERRED:
+                    if jitcounter.tick(hash, increment_threshold):
+                        bound_reached(hash, cell, *args)
+                    return
                 if cell.flags & JC_DONT_TRACE_HERE:
                     if not cell.has_seen_a_procedure_token():
                         # A JC_DONT_TRACE_HERE, i.e. a non-inlinable function.
@@ -484,6 +594,18 @@ class WarmEnterState(object):
                 # has been freed
                 jitcounter.cleanup_chain(hash)
                 return
+            if procedure_token.tier_up_counter is not None:
+                if cell.flags & JC_TIER_UP:
+                    # we failed to compile it again so far, count normally
+                    if jitcounter.tick(hash, increment_threshold):
+                        bound_reached(hash, cell, *args)
+                    return
+                if procedure_token.tier_up_counter.reached_limit():
+                    # the loop compiled by the baseline tier ran
+                    # 'threshold' times: trace it again now
+                    cell.flags |= JC_TIER_UP
+                    bound_reached(hash, cell, *args)
+                    return
             if not confirm_enter_jit(*args):
                 return
             # extract and unspecialize the red arguments to pass to
@@ -654,6 +776,12 @@ class WarmEnterState(object):
             cell = JitCell.get_jitcell(*greenargs)
             if cell is not None and (cell.flags & JC_DONT_TRACE_HERE) != 0:
                 return False
+            if jl.jit_decisions.is_replaying():
+                location = printable_location(*greenargs)
+                if jl.jit_decisions.was_recorded(jl.DECISION_DONT_INLINE, 0,
+                                                 location):
+                    self.disable_noninlinable_function(greenkey)
+                    return False
             return True
         self.can_inline_callable = can_inline_callable
 
@@ -728,6 +856,8 @@ class WarmEnterState(object):
         printable_loc_ptr = self.jitdriver_sd._get_printable_location_ptr
         if printable_loc_ptr is None:
             missing = '(%s: no get_printable_location)' % drivername
+            def printable_location(*greenargs):
+                return missing
             def get_location_str(greenkey):
                 return missing
         else:
@@ -738,17 +868,25 @@ class WarmEnterState(object):
             missing = ('(%s: get_printable_location '
                        'disabled, no debug_print)' % drivername)
             #
-            def get_location_str(greenkey):
-                if not have_debug_prints_for("jit-"):
-                    return missing
-                greenargs = unwrap_greenkey(greenkey)
+            def printable_location(*greenargs):
                 fn = support.maybe_on_top_of_llinterp(rtyper, printable_loc_ptr)
                 llres = fn(*greenargs)
                 if not we_are_translated() and isinstance(llres, str):
                     return llres
                 return hlstr(llres)
+            #
+            def get_location_str(greenkey):
+                if not have_debug_prints_for("jit-"):
+                    return missing
+                return printable_location(*unwrap_greenkey(greenkey))
+        self.printable_location = printable_location
         self.get_location_str = get_location_str
         #
+        def get_decision_location(greenkey):
+            # unlike get_location_str(), doesn't depend on the debug_prints
+            return printable_location(*unwrap_greenkey(greenkey))
+        self.get_decision_location = get_decision_location
+        #
         confirm_enter_jit_ptr = self.jitdriver_sd._confirm_enter_jit_ptr
         if confirm_enter_jit_ptr is None:
             def confirm_enter_jit(*args):
@@ -24,6 +24,9 @@ REGEXES = [
     (('abort.vable_escape',), '^abort: vable escape:\s+(\d+)$'),
     (('abort.bad_loop',), '^abort: bad loop:\s+(\d+)$'),
     (('abort.force_quasiimmut',), '^abort: force quasi-immut:\s+(\d+)$'),
+    (('deferred_loops',), '^deferred loops:\s+(\d+)$'),
+    (('not_inlined_too_long',), '^not inlined: too long:\s+(\d+)$'),
+    (('baseline_loops',), '^baseline loops:\s+(\d+)$'),
     (('nvirtuals',), '^nvirtuals:\s+(\d+)$'),
     (('nvholes',), '^nvholes:\s+(\d+)$'),
     (('nvreused',), '^nvreused:\s+(\d+)$'),
@@ -57,6 +60,9 @@ class OutputInfo(object):
     opt_ops = 0
     opt_guards = 0
     forcings = 0
+    deferred_loops = 0
+    not_inlined_too_long = 0
+    baseline_loops = 0
     nvirtuals = 0
     nvholes = 0
     nvreused = 0
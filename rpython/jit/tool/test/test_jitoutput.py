@@ -59,6 +59,9 @@ abort: compiling:       11
 abort: vable escape:    12
 abort: bad loop:        135
 abort: force quasi-immut: 3
+deferred loops:         7
+not inlined: too long:  4
+baseline loops:         6
 nvirtuals:              13
 nvholes:                14
 nvreused:               15
@@ -88,6 +91,9 @@ def test_parse():
     assert info.abort.vable_escape == 12
     assert info.abort.bad_loop == 135
     assert info.abort.force_quasiimmut == 3
+    assert info.deferred_loops == 7
+    assert info.not_inlined_too_long == 4
+    assert info.baseline_loops == 6
     assert info.nvirtuals == 13
     assert info.nvholes == 14
     assert info.nvreused == 15
@@ -21,6 +21,14 @@ class GcHooks(object):
     def is_gc_collect_enabled(self):
         return False
 
+    def get_alloc_sample_interval(self):
+        """
+        Return the number of bytes allocated in the nursery between two
+        samples of the allocation profiler, or 0 to disable it.  It is
+        checked again after every minor collection.
+        """
+        return 0
+
     def on_gc_minor(self, duration, total_memory_used, pinned_objects):
         """
         Called after a minor collection
@@ -45,6 +53,21 @@ class GcHooks(object):
         Called after a major collection is fully done
         """
 
+    def on_gc_alloc_sample(self, sample_id, size):
+        """
+        Called when allocating in the nursery the object that crosses the
+        next sampling point (see get_alloc_sample_interval).  ``sample_id``
+        is a unique, increasing number.  ``size`` is the size reserved in
+        the nursery, which might include other objects allocated together
+        by the JIT.
+        """
+
+    def on_gc_alloc_sample_promoted(self, sample_id):
+        """
+        Called during a minor collection if the object of the given sample
+        survived and was moved out of the nursery.
+        """
+
     # the fire_* methods are meant to be called from the GC are should NOT be
     # overridden
 
@@ -68,3 +91,11 @@ class GcHooks(object):
                                arenas_count_before, arenas_count_after,
                                arenas_bytes, rawmalloc_bytes_before,
                                rawmalloc_bytes_after)
+
+    @rgc.no_collect
+    def fire_gc_alloc_sample(self, sample_id, size):
+        self.on_gc_alloc_sample(sample_id, size)
+
+    @rgc.no_collect
+    def fire_gc_alloc_sample_promoted(self, sample_id):
+        self.on_gc_alloc_sample_promoted(sample_id)
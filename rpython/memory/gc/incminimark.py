@@ -6,6 +6,13 @@ Environment variables can be used to fine-tune the following parameters:
                          '4M'.  Small values
                          (like 1 or 1KB) are useful for debugging.
 
+ PYPY_GC_NURSERY_MIN     If one of these two is set, the nursery size becomes
+ PYPY_GC_NURSERY_MAX     adaptive: it grows (up to the max) when a large
+                         fraction of the nursery survives minor collections,
+                         and shrinks (down to the min) when almost nothing
+                         survives.  Both default to the size chosen for
+                         PYPY_GC_NURSERY, which means non-adaptive.
+
  PYPY_GC_NURSERY_DEBUG   If set to non-zero, will fill nursery with garbage,
                          to help debugging.
 
@@ -52,6 +59,15 @@ Environment variables can be used to fine-tune the following parameters:
                          in time.  Defaults to a conservative value depending
                          on nursery size and maximum object size inside the
                          nursery.  Useful for debugging by setting it to 0.
+
+ PYPY_GC_RELEASE_FREE_PAGES  If set to 0, don't give back to the OS the
+                         memory of free pages in arenas that still contain
+                         some objects.  Fully free arenas are always given
+                         back.
+
+ PYPY_GC_PRETENURE       If set to 1, the JIT allocates directly outside
+                         the nursery the objects of the types that nearly
+                         always survive minor collections.  Off by default.
 """
 # XXX Should find a way to bound the major collection threshold by the
 # XXX total addressable size.  Maybe by keeping some minimarkpage arenas
@@ -190,6 +206,20 @@ FORWARDSTUB = lltype.GcStruct('forwarding_stub',
 FORWARDSTUBPTR = lltype.Ptr(FORWARDSTUB)
 NURSARRAY = lltype.Array(llmemory.Address)
 
+# Statistics about the sampled objects of each type, for pretenuring.
+PRETENURE_ENTRY = lltype.Struct('pretenure_entry',
+                                ('pretenure', lltype.Bool),
+                                ('samples', lltype.Signed),
+                                ('survivors', lltype.Signed))
+PRETENURE_TABLE = lltype.Array(PRETENURE_ENTRY, hints={'nolength': True})
+
+# The marking phase is mostly bound by the cache misses on the headers
+# of the objects popped from 'objects_to_trace'.  To hide some of that
+# latency, objects are not visited as soon as they are popped: they go
+# first through a small FIFO ring buffer of the following size, and we
+# prefetch their header when they enter it.  Must be a power of two.
+MARK_PREFETCH_DISTANCE = 8
+
 # ____________________________________________________________
 
 
@@ -220,6 +250,23 @@ class IncrementalMiniMarkGC(MovingGCBase):
     minimal_size_in_nursery = (
         llmemory.sizeof(HDR) + llmemory.sizeof(llmemory.Address))
 
+    # If the nursery size is adaptive (see PYPY_GC_NURSERY_MIN/MAX), we
+    # look at the fraction of a full nursery that survives a minor
+    # collection.  Above the first number, we double the nursery size
+    # to give more objects a chance to die young; below the second
+    # number, we halve it to improve cache locality.
+    nursery_grow_survival_rate = 0.10
+    nursery_shrink_survival_rate = 0.02
+
+    # Pretenuring: the minor collections check which of the sampled
+    # allocations (see 'alloc_sample_interval') survive, and count them
+    # per type.  After 'pretenure_min_samples' samples of a type, if at
+    # least 'pretenure_survival_rate' of them survived, the fixed-size
+    # objects of that type that the JIT allocates are put directly outside
+    # the nursery, until the end of the next major collection.
+    pretenure_min_samples = 16
+    pretenure_survival_rate = 0.90
+
 
     TRANSLATION_PARAMS = {
         # Automatically adjust the size of the nursery and the
@@ -291,6 +338,9 @@ class IncrementalMiniMarkGC(MovingGCBase):
         assert small_request_threshold % WORD == 0
         self.read_from_env = read_from_env
         self.nursery_size = nursery_size
+        # the bounds of the adaptive nursery size; equal if not adaptive
+        self.nursery_size_min = nursery_size
+        self.nursery_size_max = nursery_size
 
         self.small_request_threshold = small_request_threshold
         self.major_collection_threshold = major_collection_threshold
@@ -395,6 +445,11 @@ class IncrementalMiniMarkGC(MovingGCBase):
                           track_allocation=False)
         self.singleaddr = llmemory.cast_ptr_to_adr(p)
         #
+        # The ring buffer used by visit_all_objects_step().
+        self.mark_prefetch_buffer = lltype.malloc(
+            self._ADDRARRAY, MARK_PREFETCH_DISTANCE, flavor='raw',
+            track_allocation=False)
+        #
         # Two lists of all objects with destructors.
         self.young_objects_with_destructors = self.AddressStack()
         self.old_objects_with_destructors = self.AddressStack()
@@ -431,6 +486,29 @@ class IncrementalMiniMarkGC(MovingGCBase):
         self.old_objects_pointing_to_pinned = self.AddressStack()
         self.updated_old_objects_pointing_to_pinned = False
         #
+        # Allocation sampling, enabled if the hooks return a non-zero
+        # get_alloc_sample_interval().  To get a sample, 'nursery_top' is
+        # temporarily lowered to the next sampling point; the real value is
+        # then stored in 'alloc_sample_real_top'.  The young objects that
+        # are sampled are recorded in 'young_alloc_samples', to find out
+        # at the next minor collection if they survive.
+        self.alloc_sample_interval = 0
+        self.alloc_sample_countdown = 0
+        self.alloc_sample_real_top = llmemory.NULL
+        self.alloc_sample_id = 0
+        self.alloc_sample_fire_hooks = False
+        self.young_alloc_samples = self.AddressStack()
+        #
+        # Pretenuring, enabled if 'pretenure_sample_interval' is not zero.
+        # The samples are taken at this interval if the hooks don't ask
+        # for samples.  'pretenure_table' is indexed by the member index
+        # of the type ids.
+        self.pretenure_sample_interval = 0
+        self.pretenure_table = lltype.nullptr(PRETENURE_TABLE)
+        self.pretenure_table_size = 0
+        self.pretenured_types = 0
+        self.size_pretenured = 0
+        #
         # Allocate a nursery.  In case of auto_nursery_size, start by
         # allocating a very small nursery, enough to do things like look
         # up the env var, which requires the GC; and then really
@@ -500,10 +578,31 @@ class IncrementalMiniMarkGC(MovingGCBase):
                 self.gc_nursery_debug = True
             else:
                 self.gc_nursery_debug = False
+            #
+            nursery_min = env.read_from_env('PYPY_GC_NURSERY_MIN')
+            nursery_max = env.read_from_env('PYPY_GC_NURSERY_MAX')
+            if self.debug_tiny_nursery >= 0:
+                nursery_min = nursery_max = newsize
+            if nursery_min <= 0:
+                nursery_min = newsize
+            if nursery_max <= 0:
+                nursery_max = newsize
+            nursery_min = max(nursery_min, minsize) & ~(WORD-1)
+            nursery_max = max(nursery_max, nursery_min) & ~(WORD-1)
+            newsize = min(max(newsize, nursery_min), nursery_max)
+            #
             self._minor_collection()    # to empty the nursery
             llarena.arena_free(self.nursery)
             self.nursery_size = newsize
+            self.nursery_size_min = nursery_min
+            self.nursery_size_max = nursery_max
             self.allocate_nursery()
+            #
+            release = os.environ.get('PYPY_GC_RELEASE_FREE_PAGES')
+            self.ac.release_free_pages = release != '0'
+            #
+            if os.environ.get('PYPY_GC_PRETENURE') == '1':
+                self.pretenure_sample_interval = newsize // 64
         #
         env_max_number_of_pinned_objects = os.environ.get('PYPY_GC_MAX_PINNED')
         if env_max_number_of_pinned_objects:
@@ -564,6 +663,38 @@ class IncrementalMiniMarkGC(MovingGCBase):
         debug_stop("gc-set-nursery-size")
 
 
+    def resize_nursery(self, newsize):
+        # Must only be called when the nursery is empty and contains
+        # no pinned object, i.e. at the end of a minor collection.
+        debug_start("gc-set-nursery-size")
+        debug_print("resizing nursery from", self.nursery_size,
+                    "to", newsize)
+        llarena.arena_free(self.nursery)
+        self.nursery_size = newsize
+        self.nursery = self._alloc_nursery()
+        self.nursery_free = self.nursery
+        self.nursery_top = self.nursery + self.nursery_size
+        debug_stop("gc-set-nursery-size")
+
+    def adapt_nursery_size(self, nursery_used):
+        """Called at the end of a minor collection, if the nursery size
+        is adaptive.  'nursery_used' is the number of bytes that were in
+        use in the nursery when the minor collection started."""
+        if nursery_used < self.nursery_size // 2:
+            return    # collection done early, e.g. by gc.collect(0)
+        if self.pinned_objects_in_nursery > 0 or self.debug_rotating_nurseries:
+            return
+        rate = float(self.nursery_surviving_size) / float(nursery_used)
+        if rate > self.nursery_grow_survival_rate:
+            newsize = min(self.nursery_size * 2, self.nursery_size_max)
+        elif rate < self.nursery_shrink_survival_rate:
+            newsize = max(self.nursery_size // 2, self.nursery_size_min)
+        else:
+            return
+        newsize &= ~(WORD-1)
+        if newsize != self.nursery_size:
+            self.resize_nursery(newsize)
+
     def set_major_threshold_from(self, threshold, reserving_size=0):
         # Set the next_major_collection_threshold.
         threshold_max = (self.next_major_collection_initial *
@@ -849,7 +980,161 @@ class IncrementalMiniMarkGC(MovingGCBase):
         Otherwise do a minor collection, and possibly some steps of a
         major collection, and finally reserve totalsize bytes.
         """
+        if self.alloc_sample_interval > 0:
+            return self._collect_and_reserve_sampling(totalsize)
+        return self._collect_and_reserve(totalsize)
+    collect_and_reserve._dont_inline_ = True
 
+    def _collect_and_reserve_sampling(self, totalsize):
+        # Maybe we overflowed a 'nursery_top' that was lowered to the next
+        # sampling point.  In this case, restore the real 'nursery_top'
+        # and take a sample.
+        take_sample = False
+        if self.alloc_sample_real_top != llmemory.NULL:
+            self.nursery_top = self.alloc_sample_real_top
+            self.alloc_sample_real_top = llmemory.NULL
+            take_sample = True
+        #
+        # note that the caller has already added 'totalsize' to
+        # 'nursery_free'
+        if take_sample and self.nursery_free <= self.nursery_top:
+            result = self.nursery_free - totalsize
+        else:
+            result = self._collect_and_reserve(totalsize)
+        #
+        if take_sample:
+            self.alloc_sample_id += 1
+            obj = result + self.gcheaderbuilder.size_gc_header
+            self.young_alloc_samples.append(obj)
+            self.alloc_sample_countdown = self.alloc_sample_interval
+            if self.alloc_sample_fire_hooks:
+                self.hooks.fire_gc_alloc_sample(self.alloc_sample_id,
+                                                raw_malloc_usage(totalsize))
+        #
+        # Lower 'nursery_top' to the next sampling point, if it is before
+        # the real 'nursery_top'.  If it is not, count the space that is
+        # left as allocated; this is a good enough approximation.
+        if self.alloc_sample_interval > 0:
+            free = self.nursery_top - self.nursery_free
+            if self.alloc_sample_countdown < free:
+                self.alloc_sample_real_top = self.nursery_top
+                self.nursery_top = (self.nursery_free +
+                                    self.alloc_sample_countdown)
+            else:
+                self.alloc_sample_countdown -= free
+        return result
+
+    def _check_young_alloc_samples(self):
+        # Called by the minor collection, when all surviving objects have
+        # been moved out of the nursery.  The dead ones are still there.
+        sample_id = self.alloc_sample_id
+        while self.young_alloc_samples.non_empty():
+            obj = self.young_alloc_samples.pop()
+            survived = self.is_forwarded(obj)
+            if self.pretenure_sample_interval > 0:
+                typeid = self.get_possibly_forwarded_type_id(obj)
+                self._record_pretenure_sample(typeid, survived)
+            if survived and self.alloc_sample_fire_hooks:
+                self.hooks.fire_gc_alloc_sample_promoted(sample_id)
+            sample_id -= 1
+
+    def _record_pretenure_sample(self, typeid, survived):
+        index = self.get_member_index(typeid)
+        if index >= self.pretenure_table_size:
+            self._grow_pretenure_table(index + 1)
+        entry = self.pretenure_table[index]
+        entry.samples += 1
+        if survived:
+            entry.survivors += 1
+        if entry.samples >= self.pretenure_min_samples:
+            if (not entry.pretenure and entry.survivors >=
+                    entry.samples * self.pretenure_survival_rate):
+                entry.pretenure = True
+                self.pretenured_types += 1
+            entry.samples = 0
+            entry.survivors = 0
+
+    def _grow_pretenure_table(self, minsize):
+        newsize = max(max(minsize, self.pretenure_table_size * 2), 64)
+        newtable = lltype.malloc(PRETENURE_TABLE, newsize, flavor='raw',
+                                 zero=True, track_allocation=False)
+        i = 0
+        while i < self.pretenure_table_size:
+            newtable[i].pretenure = self.pretenure_table[i].pretenure
+            newtable[i].samples = self.pretenure_table[i].samples
+            newtable[i].survivors = self.pretenure_table[i].survivors
+            i += 1
+        if self.pretenure_table:
+            lltype.free(self.pretenure_table, flavor='raw',
+                        track_allocation=False)
+        self.pretenure_table = newtable
+        self.pretenure_table_size = newsize
+
+    def _reset_pretenuring(self):
+        # Called at the end of a major collection: forget the pretenuring
+        # decisions, in case the objects of these types don't survive any
+        # more.  The types will be pretenured again after enough samples.
+        i = 0
+        while i < self.pretenure_table_size:
+            self.pretenure_table[i].pretenure = False
+            i += 1
+        self.pretenured_types = 0
+
+    def _must_pretenure(self, typeid):
+        index = self.get_member_index(typeid)
+        return (index < self.pretenure_table_size and
+                self.pretenure_table[index].pretenure)
+
+    def must_pretenure(self, typeid):
+        """Return True if the objects of this type currently survive often
+        enough to be allocated outside the nursery.  Used by the JIT to
+        know if it should call malloc_fixedsize_pretenured() instead of
+        inlining the nursery allocation."""
+        return self.pretenured_types > 0 and self._must_pretenure(typeid)
+
+    def malloc_fixedsize_pretenured(self, typeid, size):
+        """Like malloc_fixedsize() for an object without finalizer and
+        without weakref, but allocates it outside the nursery if the
+        objects of this type usually survive.  Only called by the JIT, so
+        that the inlined fast path of malloc_fixedsize() doesn't have to
+        check.  The decision is checked again here, because the JIT code
+        stays around after the end of the major collection which forgets
+        it."""
+        if self.pretenured_types > 0 and self._must_pretenure(typeid):
+            totalsize = self.gcheaderbuilder.size_gc_header + size
+            rawtotalsize = raw_malloc_usage(totalsize)
+            if rawtotalsize <= self.nonlarge_max:
+                min_size = raw_malloc_usage(self.minimal_size_in_nursery)
+                if rawtotalsize < min_size:
+                    totalsize = rawtotalsize = min_size
+                obj = self._malloc_pretenured(typeid, totalsize)
+                return llmemory.cast_adr_to_ptr(obj, llmemory.GCREF)
+        return self.malloc_fixedsize(typeid, size)
+
+    def _malloc_pretenured(self, typeid, totalsize):
+        rawtotalsize = raw_malloc_usage(totalsize)
+        #
+        # The nursery doesn't fill up while we allocate here, so count
+        # the pretenured objects as if they were in the nursery, in order
+        # to still run minor collections and the steps of the major one.
+        self.size_pretenured += rawtotalsize
+        if self.size_pretenured > self.nursery_size:
+            self.minor_collection_with_major_progress()
+        #
+        result = self._malloc_out_of_nursery(totalsize)
+        self.init_gc_object(result, typeid, flags=0)
+        obj = result + self.gcheaderbuilder.size_gc_header
+        self.size_objects_made_old += r_uint(rawtotalsize)
+        #
+        # Like an object just moved out of the nursery, it can be
+        # initialized without write barrier, so it must be in the list
+        # 'old_objects_pointing_to_young' until the next minor collection.
+        if self.has_gcptr(typeid):
+            self.old_objects_pointing_to_young.append(obj)
+        return obj
+    _malloc_pretenured._dont_inline_ = True
+
+    def _collect_and_reserve(self, totalsize):
         minor_collection_count = 0
         while True:
             self.nursery_free = llmemory.NULL      # debug: don't use me
@@ -927,7 +1212,6 @@ class IncrementalMiniMarkGC(MovingGCBase):
                 self.nursery_free = self.nursery_top - self.debug_tiny_nursery
         #
         return result
-    collect_and_reserve._dont_inline_ = True
 
 
     # XXX kill alloc_young and make it always True
@@ -1086,6 +1370,9 @@ class IncrementalMiniMarkGC(MovingGCBase):
         if self.next_major_collection_threshold < 0:
             # cannot trigger a full collection now, but we can ensure
             # that one will occur very soon
+            if self.alloc_sample_real_top != llmemory.NULL:
+                self.nursery_top = self.alloc_sample_real_top
+                self.alloc_sample_real_top = llmemory.NULL
             self.nursery_free = self.nursery_top
 
     def can_optimize_clean_setarrayitems(self):
@@ -1695,6 +1982,13 @@ class IncrementalMiniMarkGC(MovingGCBase):
         start = time.time()
         debug_start("gc-minor")
         #
+        # How much of the nursery is in use?  'nursery_free' is NULL if
+        # we come from collect_and_reserve(), i.e. if the nursery is full.
+        if self.nursery_free == llmemory.NULL:
+            nursery_used = self.nursery_size
+        else:
+            nursery_used = self.nursery_free - self.nursery
+        #
         # All nursery barriers are invalid from this point on.  They
         # are evaluated anew as part of the minor collection.
         self.nursery_barriers.delete()
@@ -1818,6 +2112,10 @@ class IncrementalMiniMarkGC(MovingGCBase):
         if self.young_rawmalloced_objects:
             self.free_young_rawmalloced_objects()
         #
+        # Report which of the sampled young objects survived.
+        if self.young_alloc_samples.non_empty():
+            self._check_young_alloc_samples()
+        #
         # All live nursery objects are out of the nursery or pinned inside
         # the nursery.  Create nursery barriers to protect the pinned objects,
         # fill the rest of the nursery with zeros and reset the current nursery
@@ -1872,6 +2170,19 @@ class IncrementalMiniMarkGC(MovingGCBase):
         self.nursery_free = self.nursery
         self.nursery_top = self.nursery_barriers.popleft()
         #
+        # Maybe change the size of the nursery, now that it is empty.
+        if self.nursery_size_min < self.nursery_size_max:
+            self.adapt_nursery_size(nursery_used)
+        #
+        # 'nursery_top' is the real one now.  The next sampling point,
+        # if any, will be set up by the next collect_and_reserve().
+        self.alloc_sample_real_top = llmemory.NULL
+        self.alloc_sample_interval = self.hooks.get_alloc_sample_interval()
+        self.alloc_sample_fire_hooks = self.alloc_sample_interval > 0
+        if not self.alloc_sample_fire_hooks:
+            self.alloc_sample_interval = self.pretenure_sample_interval
+        self.size_pretenured = 0
+        #
         # clear GCFLAG_PINNED_OBJECT_PARENT_KNOWN from all parents in the list.
         self.old_objects_pointing_to_pinned.foreach(
                 self._reset_flag_old_objects_pointing_to_pinned, None)
@@ -2420,7 +2731,7 @@ class IncrementalMiniMarkGC(MovingGCBase):
                 if self.old_objects_with_destructors.non_empty():
                     self.deal_with_old_objects_with_destructors()
                 # objects_to_trace processed fully, can move on to sweeping
-                self.ac.mass_free_prepare()
+                self.ac.mass_free_prepare(self._free_if_unvisited)
                 self.start_free_rawmalloc_objects()
                 #
                 # get rid of objects pointing to pinned objects that were not
@@ -2473,6 +2784,9 @@ class IncrementalMiniMarkGC(MovingGCBase):
                 # We also need to reset the GCFLAG_VISITED on prebuilt GC objects.
                 self.prebuilt_root_objects.foreach(self._reset_gcflag_visited, None)
                 #
+                if self.pretenured_types > 0:
+                    self._reset_pretenuring()
+                #
                 # Set the threshold for the next major collection to be when we
                 # have allocated 'major_collection_threshold' times more than
                 # we currently have -- but no more than 'max_delta' more than
@@ -2673,12 +2987,34 @@ class IncrementalMiniMarkGC(MovingGCBase):
     TEST_VISIT_SINGLE_STEP = False    # for tests
 
     def visit_all_objects_step(self, size_to_track):
-        # Objects can be added to pending by visit
+        # Objects can be added to pending by visit.  The objects popped
+        # from 'pending' are first stored in 'mark_prefetch_buffer' and
+        # only visited MARK_PREFETCH_DISTANCE pops later, in FIFO order;
+        # see the comment at the definition of MARK_PREFETCH_DISTANCE.
         pending = self.objects_to_trace
-        while pending.non_empty():
-            obj = pending.pop()
+        buffer = self.mark_prefetch_buffer
+        size_gc_header = self.gcheaderbuilder.size_gc_header
+        mask = MARK_PREFETCH_DISTANCE - 1
+        head = 0     # index in 'buffer' of the next object to visit
+        count = 0    # number of objects currently in 'buffer'
+        while True:
+            while count < MARK_PREFETCH_DISTANCE and pending.non_empty():
+                obj = pending.pop()
+                llop.raw_prefetch(lltype.Void, obj - size_gc_header)
+                buffer[(head + count) & mask] = obj
+                count += 1
+            if count == 0:
+                break
+            obj = buffer[head]
+            head = (head + 1) & mask
+            count -= 1
             size_to_track -= self.visit(obj)
             if size_to_track < 0 or self.TEST_VISIT_SINGLE_STEP:
+                # Push back the objects not visited yet.  The oldest
+                # one is pushed last, so that it is popped first.
+                while count > 0:
+                    count -= 1
+                    pending.append(buffer[(head + count) & mask])
                 return 0
         return size_to_track
 
@@ -3054,6 +3390,8 @@ class IncrementalMiniMarkGC(MovingGCBase):
             return intmask(self.nursery_size)
         elif stats_no == rgc.TOTAL_GC_TIME:
             return int(self.total_gc_time * 1000)
+        elif stats_no == rgc.RELEASED_ARENA_MEMORY:
+            return intmask(self.ac.released_memory)
         return 0
 
 
@@ -24,6 +24,9 @@ ARENA = lltype.Struct('ArenaReference',
     ('totalpages', lltype.Signed),
     # -- A chained list of free pages in the arena.  Ends with NULL.
     ('freepages', llmemory.Address),
+    # -- How many pages at the end of 'freepages' have already had their
+    #    memory given back to the OS (see release_free_pages).
+    ('releasedpages', lltype.Signed),
     # -- A linked list of arenas.  See below.
     ('nextarena', ARENA_PTR),
     )
@@ -61,7 +64,8 @@ PAGE_PTR = lltype.Ptr(lltype.ForwardReference())
 PAGE_HEADER = lltype.Struct('PageHeader',
     # -- The following pointer makes a chained list of pages.  For non-full
     #    pages, it is a chained list of pages having the same size class,
-    #    rooted in 'page_for_size[size_class]'.  For full pages, it is a
+    #    rooted in 'page_for_size[size_class]' (or, for sparse pages, in
+    #    'sparse_page_for_size[size_class]').  For full pages, it is a
     #    different chained list rooted in 'full_page_for_size[size_class]'.
     #    For free pages, it is the list 'freepages' in the arena header.
     ('nextpage', PAGE_PTR),
@@ -81,6 +85,22 @@ PAGE_HEADER = lltype.Struct('PageHeader',
 PAGE_PTR.TO.become(PAGE_HEADER)
 PAGE_NULL = lltype.nullptr(PAGE_HEADER)
 
+# During an incremental mass_free(), when malloc() finds no page with
+# room for the requested size class, it first sweeps some of the pages
+# of that size class that are still waiting to be swept, instead of
+# immediately taking a fresh page ("lazy sweeping").  This is the
+# maximum number of pages swept that way by a single malloc().
+LAZY_SWEEP_MAX_PAGES = 4
+
+# After sweeping, a page in which less than 1/SPARSE_PAGE_RATIO of the
+# blocks are still in use is "sparse".  Sparse pages are kept apart and
+# only reused once there is no other partially-full page for the size
+# class.  New objects are thus packed into the denser pages, giving the
+# sparse ones a chance to become completely free, which in turn lets us
+# return whole arenas to the OS.  This is how we fight fragmentation
+# without moving old objects.
+SPARSE_PAGE_RATIO = 4
+
 # ----------
 
 
@@ -102,6 +122,7 @@ class ArenaCollection(object):
         length = small_request_threshold / WORD + 1
         self.page_for_size          = self._new_page_ptr_list(length)
         self.full_page_for_size     = self._new_page_ptr_list(length)
+        self.sparse_page_for_size   = self._new_page_ptr_list(length)
         self.old_page_for_size      = self._new_page_ptr_list(length)
         self.old_full_page_for_size = self._new_page_ptr_list(length)
         self.nblocks_for_size = lltype.malloc(rffi.CArray(lltype.Signed),
@@ -137,12 +158,24 @@ class ArenaCollection(object):
         # part of current_arena might still contain uninitialized pages
         self.num_uninitialized_pages = 0
         #
+        # the size classes between 1 and 'size_class_with_old_pages'
+        # (included) may still have pages to sweep, during an incremental
+        # mass_free().  -1 if we are not in an incremental mass_free().
+        self.size_class_with_old_pages = -1
+        #
         # the total memory used, counting every block in use, without
         # the additional bookkeeping stuff.
         self.total_memory_used = r_uint(0)
         self.peak_memory_used = r_uint(0)
         self.total_memory_alloced = r_uint(0)
         self.peak_memory_alloced = r_uint(0)
+        #
+        # if True, the free pages of arenas that are not entirely free
+        # are given back to the OS at the end of mass_free(); their
+        # total size is in 'released_memory'
+        self.release_free_pages = False
+        self.released_memory = r_uint(0)
+        self.os_page_size = 0     # computed lazily
 
 
     def _new_page_ptr_list(self, length):
@@ -197,6 +230,21 @@ class ArenaCollection(object):
     def allocate_new_page(self, size_class):
         """Allocate and return a new page for the given size_class."""
         #
+        # If we are in the middle of an incremental mass_free(), first
+        # try to get a page by sweeping some old pages of this size class.
+        if size_class <= self.size_class_with_old_pages:
+            page = self.lazy_sweep_pages(size_class)
+            if page != PAGE_NULL:
+                return page
+        #
+        # Reuse a sparse page if there is one.
+        page = self.sparse_page_for_size[size_class]
+        if page != PAGE_NULL:
+            self.sparse_page_for_size[size_class] = page.nextpage
+            page.nextpage = PAGE_NULL
+            self.page_for_size[size_class] = page
+            return page
+        #
         # Allocate a new arena if needed.
         if self.current_arena == ARENA_NULL:
             self.allocate_new_arena()
@@ -212,6 +260,11 @@ class ArenaCollection(object):
             llarena.arena_reset(result,
                                 llmemory.sizeof(llmemory.Address),
                                 0)
+            if arena.releasedpages > arena.nfreepages:
+                # 'result' was released to the OS; the OS gives us
+                # fresh memory as soon as we write to it
+                arena.releasedpages = arena.nfreepages
+                self.released_memory -= r_uint(self._released_page_size())
             #
         else:
             # The 'result' is part of the uninitialized pages.
@@ -316,6 +369,7 @@ class ArenaCollection(object):
         arena.nfreepages = 0        # they are all uninitialized pages
         arena.totalpages = npages
         arena.freepages = firstpage
+        arena.releasedpages = 0
         self.num_uninitialized_pages = npages
         self.current_arena = arena
         self.arenas_count += 1
@@ -323,10 +377,27 @@ class ArenaCollection(object):
     allocate_new_arena._dont_inline_ = True
 
 
-    def mass_free_prepare(self):
+    def lazy_sweep_pages(self, size_class):
+        """Sweep up to LAZY_SWEEP_MAX_PAGES old pages of the given
+        size_class, stopping as soon as one of them has room for more
+        objects.  Returns that page, or PAGE_NULL.
+        """
+        max_pages = LAZY_SWEEP_MAX_PAGES
+        while (self.page_for_size[size_class] == PAGE_NULL and max_pages > 0
+               and (self.old_full_page_for_size[size_class] != PAGE_NULL or
+                    self.old_page_for_size[size_class] != PAGE_NULL)):
+            self.mass_free_in_pages(size_class, self.ok_to_free_func, 1)
+            max_pages -= 1
+        return self.page_for_size[size_class]
+    lazy_sweep_pages._dont_inline_ = True
+
+
+    def mass_free_prepare(self, ok_to_free_func):
         """Prepare calls to mass_free_incremental(): moves the chained lists
-        into 'self.old_xxx'.
+        into 'self.old_xxx'.  Until the mass_free is complete, malloc() can
+        call 'ok_to_free_func' itself, to sweep old pages lazily.
         """
+        self.ok_to_free_func = ok_to_free_func
         self.peak_memory_used = max(self.peak_memory_used,
                                     self.total_memory_used)
         self.total_memory_used = r_uint(0)
@@ -335,6 +406,17 @@ class ArenaCollection(object):
         self.size_class_with_old_pages = size_class
         #
         while size_class >= 1:
+            # the sparse pages are swept together with the other
+            # partially-full pages: chain them in front of them
+            page = self.sparse_page_for_size[size_class]
+            if page != PAGE_NULL:
+                while page.nextpage != PAGE_NULL:
+                    page = page.nextpage
+                page.nextpage = self.page_for_size[size_class]
+                self.page_for_size[size_class] = (
+                            self.sparse_page_for_size[size_class])
+                self.sparse_page_for_size[size_class] = PAGE_NULL
+            #
             self.old_page_for_size[size_class]      = (
                             self.page_for_size[size_class])
             self.old_full_page_for_size[size_class] = (
@@ -347,7 +429,8 @@ class ArenaCollection(object):
     def mass_free_incremental(self, ok_to_free_func, max_pages):
         """For each object, if ok_to_free_func(obj) returns True, then free
         the object.  This returns True if complete, or False if the limit
-        'max_pages' is reached.
+        'max_pages' is reached.  'ok_to_free_func' must be the same as
+        the one given to mass_free_prepare().
         """
         size_class = self.size_class_with_old_pages
         #
@@ -369,6 +452,8 @@ class ArenaCollection(object):
         #
         if size_class >= 0:
             self._rehash_arenas_lists()
+            if self.release_free_pages:
+                self._release_free_pages()
             self.size_class_with_old_pages = -1
         #
         return True
@@ -378,7 +463,7 @@ class ArenaCollection(object):
         """For each object, if ok_to_free_func(obj) returns True, then free
         the object.
         """
-        self.mass_free_prepare()
+        self.mass_free_prepare(ok_to_free_func)
         #
         res = self.mass_free_incremental(ok_to_free_func, sys.maxint)
         ll_assert(res, "non-incremental mass_free_in_pages() returned False")
@@ -408,6 +493,8 @@ class ArenaCollection(object):
                     llarena.arena_reset(arena.base, self.arena_size, 4)
                     llarena.arena_free(arena.base)
                     self.total_memory_alloced -= self.arena_size
+                    self.released_memory -= r_uint(arena.releasedpages *
+                                                 self._released_page_size())
                     lltype.free(arena, flavor='raw', track_allocation=False)
                     self.arenas_count -= 1
                     #
@@ -425,11 +512,53 @@ class ArenaCollection(object):
         self.min_empty_nfreepages = 1
 
 
+    def _release_free_pages(self):
+        # Give back to the OS the memory of the free pages in arenas that
+        # are not entirely free (these ones are freed already).  The first
+        # word of each free page is used to chain the 'freepages' list,
+        # so we keep it; in practice, this means that the first OS page of
+        # each of our pages stays in memory.  Only the pages added to
+        # 'freepages' since the last call are released.
+        released_page_size = self._released_page_size()
+        if released_page_size == 0:
+            return     # madvise() would not release anything
+        i = 1
+        while i < self.max_pages_per_arena:
+            arena = self.arenas_lists[i]
+            while arena != ARENA_NULL:
+                count = arena.nfreepages - arena.releasedpages
+                pageaddr = arena.freepages
+                while count > 0:
+                    llarena.arena_reset(pageaddr + WORD, self.page_size - WORD,
+                                        4)
+                    self.released_memory += r_uint(released_page_size)
+                    pageaddr = pageaddr.address[0]
+                    count -= 1
+                arena.releasedpages = arena.nfreepages
+                arena = arena.nextarena
+            i += 1
+
+
+    def _released_page_size(self):
+        # madvise() only releases the whole OS pages of the range that
+        # follows the first word.  Our pages are aligned to 'page_size',
+        # so if that is a multiple of the OS page size, all the OS pages
+        # but the first one are released; otherwise none of them is.
+        os_page_size = self.os_page_size
+        if os_page_size == 0:
+            os_page_size = llarena.posixpagesize.get()
+            self.os_page_size = os_page_size
+        if self.page_size % os_page_size != 0:
+            return 0
+        return self.page_size - os_page_size
+
+
     def mass_free_in_pages(self, size_class, ok_to_free_func, max_pages):
         nblocks = self.nblocks_for_size[size_class]
         block_size = size_class * WORD
         remaining_partial_pages = self.page_for_size[size_class]
         remaining_full_pages = self.full_page_for_size[size_class]
+        sparse_pages = self.sparse_page_for_size[size_class]
         #
         step = 0
         while step < 2:
@@ -455,13 +584,20 @@ class ArenaCollection(object):
                     page.nextpage = remaining_full_pages
                     remaining_full_pages = page
                     #
-                elif surviving > 0:
+                elif surviving * SPARSE_PAGE_RATIO >= nblocks:
                     #
-                    # There is at least 1 object surviving.  Re-insert
+                    # There are enough objects surviving.  Re-insert
                     # the page in the 'remaining_partial_pages' chained list.
                     page.nextpage = remaining_partial_pages
                     remaining_partial_pages = page
                     #
+                elif surviving > 0:
+                    #
+                    # Only a few objects survive.  Insert the page in the
+                    # 'sparse_pages' chained list.
+                    page.nextpage = sparse_pages
+                    sparse_pages = page
+                    #
                 else:
                     # No object survives; free the page.
                     self.free_page(page)
@@ -485,6 +621,7 @@ class ArenaCollection(object):
         #
         self.page_for_size[size_class] = remaining_partial_pages
         self.full_page_for_size[size_class] = remaining_full_pages
+        self.sparse_page_for_size[size_class] = sparse_pages
         return max_pages
 
 
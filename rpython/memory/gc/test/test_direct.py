@@ -694,6 +694,111 @@ class TestIncrementalMiniMarkGCSimple(TestMiniMarkGCSimple):
         assert adr4 == adr3
         assert obj3.x == 456     # it is populated now
 
+    def test_visit_all_objects_step_pushes_back_unvisited(self):
+        # build a chain longer than MARK_PREFETCH_DISTANCE, plus a few
+        # siblings, and mark it with a tiny budget per step
+        n = incminimark.MARK_PREFETCH_DISTANCE * 3
+        head = self.malloc(S)
+        head.x = 0
+        self.stackroots.append(head)
+        for i in range(1, n):
+            obj = self.malloc(S)
+            obj.x = i
+            self.write(obj, 'next', self.stackroots[0])
+            self.stackroots[0] = obj
+            if i % 4 == 0:
+                self.stackroots.append(self.malloc(S))
+                self.stackroots[-1].x = -i
+        self.gc.debug_gc_step_until(incminimark.STATE_MARKING)
+        nobjects = self.gc.objects_to_trace.length()
+        assert nobjects > 1
+        self.gc.visit_all_objects_step(1)
+        # one object was visited, and none was lost
+        assert self.gc.objects_to_trace.length() >= nobjects - 1
+        self.gc.debug_gc_step_until(incminimark.STATE_SCANNING)
+        #
+        chain = self.stackroots[0]
+        seen = []
+        while chain:
+            seen.append(chain.x)
+            chain = chain.next
+        assert seen == range(n - 1, -1, -1)
+        for obj in self.stackroots[1:]:
+            assert obj.x < 0
+
+    def test_adaptive_nursery_size(self):
+        initial = self.gc.nursery_size
+        self.gc.nursery_size_min = initial
+        self.gc.nursery_size_max = initial * 4
+        # everything survives: the nursery grows up to the max
+        for i in range(200):
+            self.stackroots.append(self.malloc(S))
+        assert self.gc.nursery_size == initial * 4
+        self.gc.collect(0)
+        self.gc.debug_check_consistency()
+        # nothing survives: the nursery shrinks back to the min
+        del self.stackroots[:]
+        for i in range(200):
+            self.malloc(S)
+        assert self.gc.nursery_size == initial
+        # an explicit minor collection of a mostly empty nursery is
+        # not used to resize it
+        self.gc.collect(0)
+        self.gc.nursery_size_min = initial // 2
+        self.malloc(S)
+        self.gc.collect(0)
+        assert self.gc.nursery_size == initial
+
+    def test_pretenuring(self):
+        size = llmemory.sizeof(S) + self.gc.gcheaderbuilder.size_gc_header
+        size_of_S = llmemory.raw_malloc_usage(size)
+        typeid = self.get_type_id(S)
+        def malloc_pretenured():
+            # what the JIT calls for the types that were pretenured
+            gcref = self.gc.malloc_fixedsize_pretenured(typeid,
+                                                        llmemory.sizeof(S))
+            p = lltype.cast_opaque_ptr(lltype.Ptr(S), gcref)
+            zero_gc_pointers_inside(p, S)
+            return p
+        self.gc.pretenure_sample_interval = size_of_S
+        self.gc.pretenure_min_samples = 4
+        self.gc.collect(0)      # the new interval is used from now
+        nursery_objects = self.gc.nursery_size // size_of_S
+        for i in range(nursery_objects + 1):
+            self.malloc(S)    # the last one triggers a minor collection
+        assert not self.gc.must_pretenure(typeid)
+        #
+        # all the S objects survive: S is pretenured
+        for i in range(12):
+            self.stackroots.append(self.malloc(S))
+        self.gc.collect(0)
+        assert self.gc.must_pretenure(typeid)
+        #
+        # the normal malloc doesn't check, it always uses the nursery
+        p = self.malloc(S)
+        assert self.gc.is_in_nursery(llmemory.cast_ptr_to_adr(p))
+        #
+        # the next S objects from the JIT are old.  They may be initialized
+        # with pointers to young objects without write barrier.
+        p = malloc_pretenured()
+        assert not self.gc.is_in_nursery(llmemory.cast_ptr_to_adr(p))
+        q = self.malloc(VAR, 1)
+        q[0] = self.malloc(S)
+        q[0].x = 42
+        p.next = q[0]
+        self.stackroots.append(p)
+        self.gc.collect(0)
+        self.gc.debug_check_consistency()
+        p = self.stackroots[-1]
+        assert p.next.x == 42
+        #
+        # a major collection forgets about it, and the code compiled by
+        # the JIT while S was pretenured allocates in the nursery again
+        self.gc.collect()
+        assert not self.gc.must_pretenure(typeid)
+        p = malloc_pretenured()
+        assert self.gc.is_in_nursery(llmemory.cast_ptr_to_adr(p))
+
 
 class TestIncrementalMiniMarkGCFull(DirectGCTest):
     from rpython.memory.gc.incminimark import IncrementalMiniMarkGC as GCClass
@@ -10,6 +10,7 @@ class MyGcHooks(GcHooks):
         self._gc_minor_enabled = False
         self._gc_collect_step_enabled = False
         self._gc_collect_enabled = False
+        self.alloc_sample_interval = 0
         self.reset()
 
     def is_gc_minor_enabled(self):
@@ -21,11 +22,16 @@ class MyGcHooks(GcHooks):
     def is_gc_collect_enabled(self):
         return self._gc_collect_enabled
 
+    def get_alloc_sample_interval(self):
+        return self.alloc_sample_interval
+
     def reset(self):
         self.minors = []
         self.steps = []
         self.collects = []
         self.durations = []
+        self.samples = []
+        self.promoted = []
 
     def on_gc_minor(self, duration, total_memory_used, pinned_objects):
         self.durations.append(duration)
@@ -51,6 +57,12 @@ class MyGcHooks(GcHooks):
             'rawmalloc_bytes_before': rawmalloc_bytes_before,
             'rawmalloc_bytes_after': rawmalloc_bytes_after})
 
+    def on_gc_alloc_sample(self, sample_id, size):
+        self.samples.append((sample_id, size))
+
+    def on_gc_alloc_sample_promoted(self, sample_id):
+        self.promoted.append(sample_id)
+
 
 class TestIncMiniMarkHooks(BaseDirectGCTest):
     from rpython.memory.gc.incminimark import IncrementalMiniMarkGC as GCClass
@@ -123,3 +135,32 @@ class TestIncMiniMarkHooks(BaseDirectGCTest):
         assert self.gc.hooks.minors == []
         assert self.gc.hooks.steps == []
         assert self.gc.hooks.collects == []
+        assert self.gc.hooks.samples == []
+
+    def test_alloc_samples(self):
+        self.gc.hooks.alloc_sample_interval = 2 * self.size_of_S
+        self.gc._minor_collection()     # the new interval is used from now
+        nursery_objects = self.gc.nursery_size // self.size_of_S
+        for i in range(nursery_objects + 1):
+            self.malloc(S)    # the last one triggers a minor collection
+        assert self.gc.hooks.samples == []
+        #
+        # now a sample is taken every third object (one sampled object,
+        # then two objects in the interval)
+        for i in range(7):
+            p = self.malloc(S)
+            if i in (0, 6):
+                self.stackroots.append(p)
+        assert self.gc.hooks.samples == [(1, self.size_of_S),
+                                         (2, self.size_of_S),
+                                         (3, self.size_of_S)]
+        self.gc._minor_collection()
+        assert self.gc.hooks.promoted == [3, 1]
+        #
+        # disabling sampling
+        self.gc.hooks.alloc_sample_interval = 0
+        self.gc.hooks.reset()
+        self.gc._minor_collection()
+        for i in range(3 * nursery_objects):
+            self.malloc(S)
+        assert self.gc.hooks.samples == []
@@ -2,6 +2,7 @@ import py
 from rpython.memory.gc.minimarkpage import ArenaCollection
 from rpython.memory.gc.minimarkpage import PAGE_HEADER, PAGE_PTR
 from rpython.memory.gc.minimarkpage import PAGE_NULL, WORD
+from rpython.memory.gc.minimarkpage import ARENA_NULL
 from rpython.memory.gc.minimarkpage import _dummy_size
 from rpython.rtyper.lltypesystem import lltype, llmemory, llarena
 from rpython.rtyper.lltypesystem.llmemory import cast_ptr_to_adr
@@ -383,7 +384,9 @@ def test_mass_free_half_page_becomes_more_free():
                                hdrsize + 12*WORD: True}
     page = getpage(ac, 0)
     pageaddr = pagenum(ac, 0)
-    assert page == ac.page_for_size[2]
+    # only 2 blocks out of 12 are in use: the page is sparse
+    assert page == ac.sparse_page_for_size[2]
+    assert ac.page_for_size[2] == PAGE_NULL
     assert page.nextpage == PAGE_NULL
     assert ac._nuninitialized(page, 2) == 4
     assert page.nfree == 6
@@ -400,6 +403,94 @@ def test_mass_free_half_page_becomes_more_free():
     assert freepages(ac) == NULL
     assert ac.full_page_for_size[2] == PAGE_NULL
 
+def test_mass_free_sparse_page_used_last():
+    pagesize = hdrsize + 24*WORD
+    ac = arena_collection_for_test(pagesize, "## ", fill_with_objects=2)
+    def answer(addr):
+        ofs = addr - ac._startpageaddr
+        if ofs < pagesize:   # page 0: keep only the first object
+            return ofs != hdrsize
+        else:                # page 1: keep every second object
+            return (ofs - pagesize - hdrsize) % (4*WORD) != 0
+    ok_to_free = OkToFree(ac, answer)
+    ac.mass_free(ok_to_free)
+    assert len(ok_to_free.seen) == 24
+    assert ac.page_for_size[2] == getpage(ac, 1)
+    assert ac.sparse_page_for_size[2] == getpage(ac, 0)
+    assert getpage(ac, 0).nextpage == PAGE_NULL
+    #
+    # first fill the denser page 1, then reuse the sparse page 0, and
+    # only then take a fresh page
+    for i in range(6):
+        obj = ac.malloc(2*WORD)
+        chkob(ac, 1, (4*i + 2)*WORD, obj)
+    assert ac.full_page_for_size[2] == getpage(ac, 1)
+    obj = ac.malloc(2*WORD); chkob(ac, 0, 2*WORD, obj)
+    assert ac.page_for_size[2] == getpage(ac, 0)
+    assert ac.sparse_page_for_size[2] == PAGE_NULL
+    assert ac.num_uninitialized_pages == 1
+    #
+    # the sparse pages are swept again by the next mass_free()
+    ac.sparse_page_for_size[2] = ac.page_for_size[2]
+    ac.page_for_size[2] = PAGE_NULL
+    ok_to_free = OkToFree(ac, False)
+    ac.mass_free(ok_to_free)
+    assert len(ok_to_free.seen) == 12 + 2
+    assert ac.full_page_for_size[2] == getpage(ac, 1)
+    assert ac.sparse_page_for_size[2] == getpage(ac, 0)
+
+def test_mass_free_releases_free_pages():
+    pagesize = hdrsize + 7*WORD
+    ac = arena_collection_for_test(pagesize, "22#", fill_with_objects=2)
+    ac.release_free_pages = True
+    ac.os_page_size = WORD     # only the first word of a page is kept
+    released = pagesize - WORD
+    # move the arena, now fully used, away from 'current_arena'
+    arena = ac.current_arena
+    ac.current_arena = ARENA_NULL
+    arena.nextarena = ac.arenas_lists[0]
+    ac.arenas_lists[0] = arena
+    #
+    def answer(addr):    # free pages 0 and 1, keep page 2
+        return addr - ac._startpageaddr < 2 * pagesize
+    ac.mass_free(OkToFree(ac, answer))
+    assert arena.nfreepages == 2
+    assert arena.releasedpages == 2
+    assert ac.arenas_lists[2] == arena
+    assert ac.released_memory == 2 * released
+    #
+    # already-released pages are not counted twice
+    ac.mass_free(OkToFree(ac, False))
+    assert arena.releasedpages == 2
+    assert ac.released_memory == 2 * released
+    #
+    # reusing a released page
+    del ac.allocate_new_arena    # restore the one from the class
+    page = ac.allocate_new_page(5)
+    assert ac.current_arena == arena
+    assert arena.releasedpages == 1
+    assert ac.released_memory == released
+    #
+    # the same, but disabled
+    ac = arena_collection_for_test(pagesize, "22#", fill_with_objects=2)
+    assert not ac.release_free_pages
+    ac.mass_free(OkToFree(ac, True))
+    assert ac.released_memory == 0
+    #
+    # the same, but our pages are smaller than the OS pages: nothing
+    # can be released
+    ac = arena_collection_for_test(pagesize, "22#", fill_with_objects=2)
+    ac.release_free_pages = True
+    ac.os_page_size = 2 * pagesize
+    arena = ac.current_arena
+    ac.current_arena = ARENA_NULL
+    arena.nextarena = ac.arenas_lists[0]
+    ac.arenas_lists[0] = arena
+    ac.mass_free(OkToFree(ac, answer))
+    assert arena.nfreepages == 2
+    assert arena.releasedpages == 0
+    assert ac.released_memory == 0
+
 # ____________________________________________________________
 
 def test_random(incremental=False):
@@ -447,17 +538,15 @@ def test_random(incremental=False):
             ok_to_free = OkToFree(ac, lambda obj: random.random() < 0.5,
                                   multiarenas=True)
             live_objects_extra = {}
-            fresh_extra = 0
             if not incremental:
                 ac.mass_free(ok_to_free)
             else:
-                ac.mass_free_prepare()
+                ac.mass_free_prepare(ok_to_free)
                 while not ac.mass_free_incremental(ok_to_free,
                                                    random.randrange(1, 3)):
                     print '[]'
-                    prev = ac.total_memory_used
                     allocate_object(live_objects_extra)
-                    fresh_extra += ac.total_memory_used - prev
+            fresh_extra = sum(live_objects_extra.values())
             #
             # Check that we have seen all objects
             assert sorted(ok_to_free.seen) == sorted(live_objects)
@@ -477,3 +566,40 @@ def test_random(incremental=False):
 
 def test_random_incremental():
     test_random(incremental=True)
+
+
+def test_lazy_sweep_reuses_old_page():
+    pagesize = hdrsize + 9*WORD
+    ac = arena_collection_for_test(pagesize, "#", fill_with_objects=2)
+    ok_to_free = OkToFree(ac, 0.5)
+    ac.mass_free_prepare(ok_to_free)
+    assert ac.size_class_with_old_pages == 9
+    assert ac.page_for_size[2] == PAGE_NULL
+    #
+    # malloc() sweeps the old full page instead of taking a fresh one
+    obj = ac.malloc(2*WORD)
+    assert ok_to_free.seen == {hdrsize + 0*WORD: False,
+                               hdrsize + 2*WORD: True,
+                               hdrsize + 4*WORD: False,
+                               hdrsize + 6*WORD: True}
+    pageaddr = pagenum(ac, 0)
+    assert obj == pageaddr + hdrsize + 2*WORD
+    assert ac.page_for_size[2] == getpage(ac, 0)
+    assert ac.old_full_page_for_size[2] == PAGE_NULL
+    #
+    # the rest of the incremental mass_free has nothing more to do here
+    assert ac.mass_free_incremental(ok_to_free, 99)
+    assert len(ok_to_free.seen) == 4
+    assert ac.size_class_with_old_pages == -1
+    assert ac.total_memory_used == 3 * 2*WORD
+
+def test_lazy_sweep_not_outside_mass_free():
+    pagesize = hdrsize + 9*WORD
+    ac = arena_collection_for_test(pagesize, "# ", fill_with_objects=2)
+    ok_to_free = OkToFree(ac, False)
+    ac.mass_free(ok_to_free)
+    assert ac.size_class_with_old_pages == -1
+    assert len(ok_to_free.seen) == 4
+    obj = ac.malloc(2*WORD)
+    assert obj == pagenum(ac, 1) + hdrsize
+    assert len(ok_to_free.seen) == 4
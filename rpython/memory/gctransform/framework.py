@@ -423,6 +423,16 @@ class BaseFrameworkGCTransformer(GCTransformer):
             self.get_stats_ptr = getfn(get_stats, [annmodel.SomeInteger()],
                 annmodel.SomeInteger())
 
+        if getattr(GCClass, 'must_pretenure', False):
+            def must_pretenure(typeid):
+                return gcdata.gc.must_pretenure(typeid)
+            self.must_pretenure_ptr = getfn(must_pretenure, [s_typeid16],
+                annmodel.SomeBool())
+            self.malloc_pretenured_ptr = getfn(
+                GCClass.malloc_fixedsize_pretenured.im_func,
+                [s_gc, s_typeid16, annmodel.SomeInteger(nonneg=True)],
+                s_gcref, inline = False)
+
 
         self.identityhash_ptr = getfn(GCClass.identityhash.im_func,
                                       [s_gc, s_gcref],
@@ -877,6 +887,15 @@ class BaseFrameworkGCTransformer(GCTransformer):
         hop.genop("same_as", [rmodel.inputconst(lltype.Signed, 0)],
             resultvar=hop.spaceop.result)
 
+    def gct_gc_must_pretenure(self, hop):
+        # used by the JIT (see rpython.jit.backend.llsupport.gc)
+        if hasattr(self, 'must_pretenure_ptr'):
+            return hop.genop("direct_call",
+                [self.must_pretenure_ptr, hop.spaceop.args[0]],
+                resultvar=hop.spaceop.result)
+        hop.genop("same_as", [rmodel.inputconst(lltype.Bool, False)],
+            resultvar=hop.spaceop.result)
+
 
     def gct_gc__collect(self, hop):
         op = hop.spaceop
@@ -1030,9 +1049,29 @@ class BaseFrameworkGCTransformer(GCTransformer):
                   resultvar=op.result)
         self.pop_roots(hop, livevars)
 
+    def gct_do_malloc_fixedsize_pretenured(self, hop):
+        # used by the JIT (see rpython.jit.backend.llsupport.gc); the
+        # result is zero-filled like with do_malloc_fixedsize_clear
+        op = hop.spaceop
+        [v_typeid, v_size] = op.args
+        if hasattr(self, 'malloc_pretenured_ptr'):
+            args = [self.malloc_pretenured_ptr, self.c_const_gc,
+                    v_typeid, v_size]
+        else:
+            c_false = rmodel.inputconst(lltype.Bool, False)
+            args = [self.malloc_fixedsize_ptr, self.c_const_gc,
+                    v_typeid, v_size, c_false, c_false, c_false]
+        livevars = self.push_roots(hop)
+        hop.genop("direct_call", args, resultvar=op.result)
+        self.pop_roots(hop, livevars)
+        self._clear_fixedsize_malloc(hop)
+
     def gct_do_malloc_fixedsize_clear(self, hop):
         # used by the JIT (see rpython.jit.backend.llsupport.gc)
         self.gct_do_malloc_fixedsize(hop)
+        self._clear_fixedsize_malloc(hop)
+
+    def _clear_fixedsize_malloc(self, hop):
         if not self.malloc_zero_filled:
             op = hop.spaceop
             v_size = op.args[1]
@@ -543,12 +543,17 @@ ENABLE_ALL_OPTS = (
 
 PARAMETER_DOCS = {
     'threshold': 'number of times a loop has to run for it to become hot',
+    'baseline_threshold': 'number of times a loop has to run before it is compiled '
+                          'quickly, without unrolling; it is compiled again with all '
+                          'the optimizations after running "threshold" times (0=off)',
     'function_threshold': 'number of times a function must run for it to become traced from start',
     'trace_eagerness': 'number of times a guard has to fail before we start compiling a bridge',
     'decay': 'amount to regularly decay counters by (0=none, 1000=max)',
     'trace_limit': 'number of recorded operations before we abort tracing with ABORT_TOO_LONG',
     'inlining': 'inline python functions or not (1/0)',
     'loop_longevity': 'a parameter controlling how long loops will be kept before being freed, an estimate',
+    'loop_memory_limit': 'maximum size in KB of the machine code of the loops kept alive; '
+                         'the least used loops are freed first (0=no limit)',
     'retrace_limit': 'how many times we can try retracing before giving up',
     'max_retrace_guards': 'number of extra guards a retrace can cause',
     'max_unroll_loops': 'number of extra unrollings a loop can cause',
@@ -561,15 +566,19 @@ PARAMETER_DOCS = {
     'vec_cost': 'threshold for which traces to bail. Unpacking increases the counter,'\
                 ' vector operation decrease the cost',
     'vec_all': 'try to vectorize trace loops that occur outside of the numpypy library',
+    'deferred_compile': 'queue the traced loops instead of compiling them at once; '
+                        'they are compiled when they get hot again (1/0)',
 }
 
 PARAMETERS = {'threshold': 1039, # just above 1024, prime
+              'baseline_threshold': 0,
               'function_threshold': 1619, # slightly more than one above, also prime
               'trace_eagerness': 200,
               'decay': 40,
               'trace_limit': 6000,
               'inlining': 1,
               'loop_longevity': 1000,
+              'loop_memory_limit': 0,
               'retrace_limit': 0,
               'max_retrace_guards': 15,
               'max_unroll_loops': 0,
@@ -579,6 +588,7 @@ PARAMETERS = {'threshold': 1039, # just above 1024, prime
               'vec': 0,
               'vec_all': 0,
               'vec_cost': 0,
+              'deferred_compile': 0,
               }
 unroll_parameters = unrolling_iterable(PARAMETERS.items())
 
@@ -1324,6 +1334,9 @@ class Counters(object):
     ABORT_BAD_LOOP
     ABORT_ESCAPE
     ABORT_FORCE_QUASIIMMUT
+    DEFERRED_LOOPS
+    NOT_INLINED_TOO_LONG
+    BASELINE_LOOPS
     NVIRTUALS
     NVHOLES
     NVREUSED
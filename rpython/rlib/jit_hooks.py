@@ -4,7 +4,7 @@ from rpython.rlib.objectmodel import specialize
 from rpython.rtyper.annlowlevel import (cast_instance_to_base_ptr,
     cast_base_ptr_to_instance, llstr)
 from rpython.rtyper.extregistry import ExtRegistryEntry
-from rpython.rtyper.lltypesystem import llmemory, lltype
+from rpython.rtyper.lltypesystem import llmemory, lltype, rstr
 from rpython.flowspace.model import Constant
 from rpython.rtyper import rclass
 
@@ -129,6 +129,21 @@ LOOP_RUN_CONTAINER = lltype.GcArray(lltype.Struct('elem',
 def stats_get_loop_run_times(warmrunnerdesc):
     return warmrunnerdesc.metainterp_sd.cpu.get_all_loop_runs()
 
+GUARD_STATS_CONTAINER = lltype.GcArray(lltype.Struct('elem',
+                                            ('hash', lltype.Unsigned),
+                                            ('loop_no', lltype.Signed),
+                                            ('failures', lltype.Signed),
+                                            ('bridges', lltype.Signed),
+                                            ('location', lltype.Ptr(rstr.STR))))
+
+@register_helper(annmodel.s_None)
+def stats_set_guard_stats(warmrunnerdesc, flag):
+    warmrunnerdesc.guard_stats.set_enabled(flag)
+
+@register_helper(lltype.Ptr(GUARD_STATS_CONTAINER))
+def stats_get_guard_stats(warmrunnerdesc):
+    return warmrunnerdesc.guard_stats.get_container()
+
 @register_helper(annmodel.SomeInteger(unsigned=True))
 def stats_asmmemmgr_allocated(warmrunnerdesc):
     return warmrunnerdesc.metainterp_sd.cpu.asmmemmgr.get_stats()[0]
@@ -137,6 +152,26 @@ def stats_asmmemmgr_allocated(warmrunnerdesc):
 def stats_asmmemmgr_used(warmrunnerdesc):
     return warmrunnerdesc.metainterp_sd.cpu.asmmemmgr.get_stats()[1]
 
+@register_helper(annmodel.SomeInteger())
+def stats_memmgr_evicted_loops(warmrunnerdesc):
+    return warmrunnerdesc.memory_manager.evicted_loops
+
+@register_helper(annmodel.SomeInteger())
+def stats_memmgr_evicted_bytes(warmrunnerdesc):
+    return warmrunnerdesc.memory_manager.evicted_bytes
+
+# ------------------------- cpu interface -----------------------------
+
+@register_helper(annmodel.s_None)
+def cpu_prepare_for_fork(warmrunnerdesc):
+    warmrunnerdesc.metainterp_sd.cpu.prepare_for_fork()
+
+# ---------------------- metainterp interface -------------------------
+
+@register_helper(annmodel.s_None)
+def metainterp_compile_deferred_loops(warmrunnerdesc):
+    warmrunnerdesc.metainterp_sd.compile_deferred_loops()
+
 # ---------------------- jitcell interface ----------------------
 
 def _new_hook(name, resulttype):
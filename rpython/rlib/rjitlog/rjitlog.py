@@ -13,7 +13,7 @@ from rpython.jit.metainterp import resoperation as resoperations
 from rpython.jit.metainterp.resoperation import rop
 from rpython.jit.metainterp.history import ConstInt, ConstFloat
 from rpython.rlib.objectmodel import we_are_translated
-from rpython.rlib.rarithmetic import r_longlong
+from rpython.rlib.rarithmetic import r_longlong, intmask
 from rpython.rtyper.lltypesystem import lltype, llmemory, rffi
 from rpython.rlib.objectmodel import compute_unique_id, always_inline
 from rpython.rlib.objectmodel import we_are_translated, specialize
@@ -248,6 +248,9 @@ marks = [
     ('SOURCE_CODE',),
     ('REDIRECT_ASSEMBLER',),
     ('TMP_CALLBACK',),
+
+    # a decision of the JIT, only in the stream of record_decisions()
+    ('JIT_DECISION',),
 ]
 
 start = 0x11
@@ -331,6 +334,154 @@ def tmp_callback(looptoken):
         encode_le_64bit(looptoken.number)])
     jitlog_write_marked(mark_tmp_callback, len(mark_tmp_callback))
 
+# Decisions of the JIT, i.e. where it starts tracing, why it aborts, which
+# functions it stops inlining, etc.  They are written to a stream of their
+# own, which starts with the same header as the jitlog and is followed
+# only by MARK_JIT_DECISION entries.  Such a stream can be given back to
+# a later run, which then only traces the loops and only inlines the
+# functions like the run which recorded it.  This lets two versions of a
+# program be compared with the same behaviour of the JIT.
+
+DECISION_TRACE = 0          # a loop starts to be traced
+DECISION_BRIDGE = 1         # a bridge starts to be traced
+DECISION_ABORT = 2          # tracing aborted (detail: Counters reason)
+DECISION_DONT_INLINE = 3    # a function is not inlined any more
+DECISION_NOT_INLINED = 4    # a call is not inlined, the trace is too long
+DECISION_RETRACE = 5        # a loop is retraced
+DECISION_FREE_LOOP = 6      # the memmgr frees a loop (detail: loop number)
+
+def encode_decision(kind, detail, location):
+    return ''.join([MARK_JIT_DECISION, chr(kind), encode_le_64bit(detail),
+                    encode_str(location)])
+
+def decision_key(kind, detail, location):
+    return "%d:%d:%s" % (kind, detail, location)
+
+class JitDecisions(object):
+    def __init__(self):
+        self.record_fd = -1
+        self.replayed = None
+
+    def is_enabled(self):
+        return self.record_fd >= 0 or self.replayed is not None
+
+    def is_replaying(self):
+        return self.replayed is not None
+
+    def record(self, kind, detail, location):
+        if self.record_fd < 0:
+            return
+        content = encode_decision(kind, detail, location)
+        try:
+            while content:
+                count = os.write(self.record_fd, content)
+                content = content[count:]
+        except OSError:
+            self.record_fd = -1     # stop recording, don't crash the JIT
+
+    def was_recorded(self, kind, detail, location):
+        """When replaying, tell if the recorded run made the same decision.
+        """
+        assert self.replayed is not None
+        return decision_key(kind, detail, location) in self.replayed
+
+jit_decisions = JitDecisions()
+
+def record_decisions(fileno):
+    blob = MARK_JITLOG_HEADER + assemble_header()
+    try:
+        os.write(fileno, blob)
+    except OSError as e:
+        raise JitlogError("cannot write the decisions: %s" %
+                          os.strerror(e.errno))
+    jit_decisions.record_fd = fileno
+
+def replay_decisions(fileno):
+    chunks = []
+    try:
+        while True:
+            chunk = os.read(fileno, 65536)
+            if not chunk:
+                break
+            chunks.append(chunk)
+    except OSError as e:
+        raise JitlogError("cannot read the decisions: %s" %
+                          os.strerror(e.errno))
+    replayed = {}
+    for kind, detail, location in parse_decisions(''.join(chunks)):
+        replayed[decision_key(kind, detail, location)] = None
+    jit_decisions.replayed = replayed
+
+def stop_decisions():
+    jit_decisions.record_fd = -1
+    jit_decisions.replayed = None
+
+class DecisionReader(object):
+    def __init__(self, data):
+        self.data = data
+        self.pos = 0
+
+    def at_end(self):
+        return self.pos >= len(self.data)
+
+    def read(self, count):
+        start = self.pos
+        stop = start + count
+        if count < 0 or stop > len(self.data):
+            raise JitlogError("truncated decisions")
+        assert start >= 0 and stop >= 0
+        self.pos = stop
+        return self.data[start:stop]
+
+    def read_byte(self):
+        return ord(self.read(1)[0])
+
+    def read_le_16bit(self):
+        s = self.read(2)
+        return ord(s[0]) | (ord(s[1]) << 8)
+
+    def read_le_32bit(self):
+        s = self.read(4)
+        return (ord(s[0]) | (ord(s[1]) << 8) | (ord(s[2]) << 16) |
+                (ord(s[3]) << 24))
+
+    def read_le_64bit(self):
+        s = self.read(8)
+        val = r_longlong(0)
+        for i in range(7, -1, -1):
+            val = (val << 8) | ord(s[i])
+        return intmask(val)
+
+    def read_str(self):
+        return self.read(self.read_le_32bit())
+
+def parse_decisions(data):
+    """Return the list of (kind, detail, location) stored in 'data', a
+    stream written by record_decisions()."""
+    reader = DecisionReader(data)
+    if reader.read(1) != MARK_JITLOG_HEADER:
+        raise JitlogError("not a stream of jit decisions")
+    if reader.read(2) != JITLOG_VERSION_16BIT_LE:
+        raise JitlogError("the decisions were recorded by another version")
+    is_32bit = reader.read_byte() == 0x1
+    machine = reader.read_str()
+    if is_32bit != IS_32_BIT or machine != MACHINE_NAME:
+        raise JitlogError("the decisions were recorded on another machine")
+    if reader.read(1) != MARK_RESOP_META:
+        raise JitlogError("not a stream of jit decisions")
+    for i in range(reader.read_le_16bit()):
+        reader.read_le_16bit()
+        reader.read_str()
+    result = []
+    while not reader.at_end():
+        if reader.read(1) != MARK_JIT_DECISION:
+            raise JitlogError("not a stream of jit decisions")
+        kind = reader.read_byte()
+        detail = reader.read_le_64bit()
+        location = reader.read_str()
+        result.append((kind, detail, location))
+    return result
+
 class JitLogger(object):
     def __init__(self, cpu=None):
         self.cpu = cpu
@@ -146,3 +146,50 @@ class TestLogger(object):
               jl.encode_le_addr(newlooptoken._ll_function_addr)
         assert binary.endswith(end)
         
+
+    def test_record_and_replay_decisions(self, tmpdir):
+        file = tmpdir.join('decisions')
+        fd = file.open('wb')
+        try:
+            jl.record_decisions(fd.fileno())
+            jl.jit_decisions.record(jl.DECISION_TRACE, 0, 'loop at 12')
+            jl.jit_decisions.record(jl.DECISION_ABORT, 7, 'loop at 12')
+            jl.jit_decisions.record(jl.DECISION_FREE_LOOP, 2**40, '')
+        finally:
+            jl.stop_decisions()
+            fd.close()
+        binary = file.read('rb')
+        assert binary.startswith(jl.MARK_JITLOG_HEADER + jl.assemble_header())
+        assert binary.endswith(jl.MARK_JIT_DECISION + chr(jl.DECISION_ABORT) +
+                               jl.encode_le_64bit(7) +
+                               jl.encode_str('loop at 12') +
+                               jl.encode_decision(jl.DECISION_FREE_LOOP,
+                                                  2**40, ''))
+        assert jl.parse_decisions(binary) == [
+            (jl.DECISION_TRACE, 0, 'loop at 12'),
+            (jl.DECISION_ABORT, 7, 'loop at 12'),
+            (jl.DECISION_FREE_LOOP, 2**40, '')]
+        #
+        fd = file.open('rb')
+        try:
+            jl.replay_decisions(fd.fileno())
+            assert jl.jit_decisions.is_replaying()
+            assert jl.jit_decisions.was_recorded(jl.DECISION_TRACE, 0,
+                                                 'loop at 12')
+            assert not jl.jit_decisions.was_recorded(jl.DECISION_TRACE, 0,
+                                                     'loop at 13')
+        finally:
+            jl.stop_decisions()
+            fd.close()
+        assert not jl.jit_decisions.is_enabled()
+
+    def test_parse_bad_decisions(self):
+        header = jl.MARK_JITLOG_HEADER + jl.assemble_header()
+        decision = jl.encode_decision(jl.DECISION_TRACE, 0, 'loop')
+        py.test.raises(jl.JitlogError, jl.parse_decisions, '')
+        py.test.raises(jl.JitlogError, jl.parse_decisions, decision)
+        py.test.raises(jl.JitlogError, jl.parse_decisions,
+                       header + decision[:-1])
+        py.test.raises(jl.JitlogError, jl.parse_decisions,
+                       header + jl.MARK_TRACE + decision[1:])
+        assert jl.parse_decisions(header) == []
@@ -2,6 +2,7 @@ from rpython.rlib.objectmodel import specialize
 from rpython.rlib.rvmprof.rvmprof import _get_vmprof, VMProfError
 from rpython.rlib.rvmprof.rvmprof import vmprof_execute_code, MAX_FUNC_NAME
 from rpython.rlib.rvmprof.rvmprof import _was_registered
+from rpython.rlib.rvmprof.rvmprof import PERF_EVENT_NONE, PERF_EVENT_NAMES
 from rpython.rlib.rvmprof.cintf import VMProfPlatformUnsupported
 from rpython.rtyper.lltypesystem import rffi, lltype
 
@@ -32,8 +33,13 @@ def get_unique_id(code):
         return code._vmprof_unique_id
     return 0
 
-def enable(fileno, interval, memory=0, native=0, real_time=0):
-    _get_vmprof().enable(fileno, interval, memory, native, real_time)
+def enable(fileno, interval, memory=0, native=0, real_time=0,
+           perf_event=PERF_EVENT_NONE, perf_period=0):
+    _get_vmprof().enable(fileno, interval, memory, native, real_time,
+                         perf_event, perf_period)
+
+def get_perf_event():
+    return _get_vmprof().get_perf_event()
 
 def disable():
     _get_vmprof().disable()
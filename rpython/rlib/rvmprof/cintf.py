@@ -145,6 +145,11 @@ def setup():
     vmprof_start_sampling = rffi.llexternal("vmprof_start_sampling", [],
                                             lltype.Void, compilation_info=eci,
                                             _nowrapper=True)
+    vmprof_set_perf_event = rffi.llexternal("vmprof_set_perf_event",
+                                            [rffi.INT, rffi.LONG], rffi.INT,
+                                            compilation_info=eci)
+    vmprof_get_perf_event = rffi.llexternal("vmprof_get_perf_event", [],
+                                            rffi.INT, compilation_info=eci)
 
     return CInterface(locals())
 
@@ -14,9 +14,13 @@ class DummyVMProf(object):
     def register_code(self, code, full_name_func):
         pass
 
-    def enable(self, fileno, interval, memory=0, native=0, real_time=0):
+    def enable(self, fileno, interval, memory=0, native=0, real_time=0,
+               perf_event=0, perf_period=0):
         pass
 
+    def get_perf_event(self):
+        return 0
+
     def disable(self):
         pass
 
@@ -22,6 +22,13 @@ VMPROF_JITTED_TAG = 3
 VMPROF_JITTING_TAG = 4
 VMPROF_GC_TAG = 5
 
+# keep in sync with VMPROF_PERF_* in vmprof_common.h
+PERF_EVENT_NONE = 0
+PERF_EVENT_INSTRUCTIONS = 1
+PERF_EVENT_CACHE_MISSES = 2
+PERF_EVENT_BRANCH_MISSES = 3
+PERF_EVENT_NAMES = ['', 'instructions', 'cache-misses', 'branch-misses']
+
 class VMProfError(Exception):
     msg = ''   # annotation hack
     def __init__(self, msg):
@@ -129,10 +136,16 @@ class VMProf(object):
         self._gather_all_code_objs = gather_all_code_objs
 
     @jit.dont_look_inside
-    def enable(self, fileno, interval, memory=0, native=0, real_time=0):
+    def enable(self, fileno, interval, memory=0, native=0, real_time=0,
+               perf_event=PERF_EVENT_NONE, perf_period=0):
         """Enable vmprof.  Writes go to the given 'fileno'.
         The sampling interval is given by 'interval' as a number of
         seconds, as a float which must be smaller than 1.0.
+        If 'perf_event' is one of the PERF_EVENT_* values, a sample is
+        taken every 'perf_period' occurrences of this hardware event
+        instead (0 means a default period), and it is weighted by the
+        number of events since the previous sample.  If the event cannot
+        be counted, the timer is used; see get_perf_event().
         Raises VMProfError if something goes wrong.
         """
         assert fileno >= 0
@@ -143,6 +156,9 @@ class VMProf(object):
             native = 0 # force disabled on Windows
         lines = 0 # not supported on PyPy currently
 
+        if self.cintf.vmprof_set_perf_event(perf_event, perf_period) < 0:
+            raise VMProfError("bad value for 'perf_event' or 'perf_period'")
+
         p_error = self.cintf.vmprof_init(fileno, interval, lines, memory, "pypy", native, real_time)
         if p_error:
             raise VMProfError(rffi.charp2str(p_error))
@@ -166,6 +182,14 @@ class VMProf(object):
             raise VMProfError(os.strerror(rposix.get_saved_errno()))
 
 
+    def get_perf_event(self):
+        """Return the PERF_EVENT_* value of the hardware event which
+        triggers the samples, or PERF_EVENT_NONE if it is the timer.
+        """
+        if not self.is_enabled:
+            return PERF_EVENT_NONE
+        return rffi.cast(lltype.Signed, self.cintf.vmprof_get_perf_event())
+
     def _write_code_registration(self, uid, name):
         assert name.count(':') == 3 and len(name) <= MAX_FUNC_NAME, (
             "the name must be 'class:func_name:func_line:filename' "
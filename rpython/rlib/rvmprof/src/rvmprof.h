@@ -40,6 +40,8 @@ RPY_EXTERN intptr_t vmprof_get_traceback(void *, void *, void**, intptr_t);
 RPY_EXTERN long vmprof_get_profile_path(char *, long);
 RPY_EXTERN int vmprof_stop_sampling(void);
 RPY_EXTERN void vmprof_start_sampling(void);
+RPY_EXTERN int vmprof_set_perf_event(int kind, long period);
+RPY_EXTERN int vmprof_get_perf_event(void);
 
 long vmprof_write_header_for_jit_addr(intptr_t *result, long n,
                                       intptr_t addr, int max_depth);
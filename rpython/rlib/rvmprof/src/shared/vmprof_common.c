@@ -27,6 +27,9 @@ int get_stack_trace(PY_THREAD_STATE_T * current, void** result, int max_depth, i
 static volatile int is_enabled = 0;
 static long prepare_interval_usec = 0;
 static long profile_interval_usec = 0;
+static int perf_event_kind = VMPROF_PERF_NONE;
+static long perf_event_period = 0;
+static int perf_event_active = 0;
 
 #ifdef VMPROF_UNIX
 static int signal_type = SIGPROF;
@@ -74,6 +77,45 @@ void vmprof_set_profile_interval_usec(long value) {
     profile_interval_usec = value;
 }
 
+/* Ask vmprof_enable() to take a sample every 'period' occurrences of
+   the hardware event 'kind' (one of the VMPROF_PERF_* values), instead
+   of using the timer.  A 'period' of 0 selects a default.  If the event
+   cannot be counted (not Linux, no such hardware counter, not allowed by
+   /proc/sys/kernel/perf_event_paranoid...), vmprof_enable() silently
+   uses the timer. */
+int vmprof_set_perf_event(int kind, long period)
+{
+    if (kind < VMPROF_PERF_NONE || kind > VMPROF_PERF_BRANCH_MISSES ||
+            period < 0) {
+        return -1;
+    }
+    perf_event_kind = kind;
+    perf_event_period = period;
+    return 0;
+}
+
+/* the event which triggers the samples, or VMPROF_PERF_NONE if it is
+   the timer */
+int vmprof_get_perf_event(void)
+{
+    return perf_event_active ? perf_event_kind : VMPROF_PERF_NONE;
+}
+
+int vmprof_get_perf_event_kind(void)
+{
+    return perf_event_kind;
+}
+
+long vmprof_get_perf_event_period(void)
+{
+    return perf_event_period;
+}
+
+void vmprof_set_perf_event_active(int value)
+{
+    perf_event_active = value;
+}
+
 char *vmprof_init(int fd, double interval, int memory,
                   int proflines, const char *interp_name, int native, int real_time)
 {
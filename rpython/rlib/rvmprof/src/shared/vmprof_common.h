@@ -103,6 +103,19 @@ intptr_t vmprof_get_traceback(void *stack, void *ucontext,
                               void **result_p, intptr_t result_length);
 #endif
 
+/* hardware events which can trigger the samples instead of the timer,
+   see vmprof_set_perf_event() */
+#define VMPROF_PERF_NONE            0
+#define VMPROF_PERF_INSTRUCTIONS    1
+#define VMPROF_PERF_CACHE_MISSES    2
+#define VMPROF_PERF_BRANCH_MISSES   3
+
+RPY_EXTERN int vmprof_set_perf_event(int kind, long period);
+RPY_EXTERN int vmprof_get_perf_event(void);
+int vmprof_get_perf_event_kind(void);
+long vmprof_get_perf_event_period(void);
+void vmprof_set_perf_event_active(int value);
+
 int vmprof_get_signal_type(void);
 long vmprof_get_prepare_interval_usec(void);
 long vmprof_get_profile_interval_usec(void);
@@ -4,6 +4,8 @@
 
 #if VMPROF_LINUX
 #include <syscall.h>
+#include <sys/ioctl.h>
+#include <linux/perf_event.h>
 #endif
 
 
@@ -36,6 +38,10 @@ static char atfork_hook_installed = 0;
 static volatile int spinlock;
 static jmp_buf restore_point;
 static struct profbuf_s *volatile current_codes;
+#if VMPROF_LINUX
+static int perf_event_fd = -1;
+static long long perf_event_last_count = 0;
+#endif
 
 
 void vmprof_ignore_signals(int ignored)
@@ -91,7 +97,7 @@ int _vmprof_sample_stack(struct profbuf_s *p, PY_THREAD_STATE_T * tstate, uconte
     int depth;
     struct prof_stacktrace_s *st = (struct prof_stacktrace_s *)p->data;
     st->marker = MARKER_STACKTRACE;
-    st->count = 1;
+    st->count = perf_event_sample_count();
 #ifdef RPYTHON_VMPROF
     depth = get_stack_trace(get_vmprof_stack(), st->stack, MAX_STACK_DEPTH-1, (intptr_t)GetPC(uc));
 #else
@@ -176,6 +182,8 @@ void sigprof_handler(int sig_nr, siginfo_t* info, void *ucontext)
     PY_THREAD_STATE_T * tstate = NULL;
     void (*prevhandler)(int);
 
+    refresh_perf_event();
+
 #ifndef RPYTHON_VMPROF
 
     // Even though the docs say that this function call is for 'esoteric use'
@@ -308,9 +316,144 @@ int remove_sigprof_timer(void)
     return 0;
 }
 
+/* *************************************************************
+ * sampling on a hardware event instead of the timer (Linux only)
+ * *************************************************************
+ */
+
+int install_perf_event(void)
+{
+#if VMPROF_LINUX
+    struct perf_event_attr attr;
+    struct f_owner_ex owner;
+    long period = vmprof_get_perf_event_period();
+    int fd;
+
+    memset(&attr, 0, sizeof(attr));
+    attr.size = sizeof(attr);
+    attr.type = PERF_TYPE_HARDWARE;
+    switch (vmprof_get_perf_event_kind()) {
+    case VMPROF_PERF_INSTRUCTIONS:
+        attr.config = PERF_COUNT_HW_INSTRUCTIONS;
+        if (period == 0)
+            period = 10000000;
+        break;
+    case VMPROF_PERF_CACHE_MISSES:
+        attr.config = PERF_COUNT_HW_CACHE_MISSES;
+        if (period == 0)
+            period = 10000;
+        break;
+    case VMPROF_PERF_BRANCH_MISSES:
+        attr.config = PERF_COUNT_HW_BRANCH_MISSES;
+        if (period == 0)
+            period = 10000;
+        break;
+    default:
+        return -1;
+    }
+    /* the signal handler for the broadcast to the other threads expects
+       SIGALRM from the timer */
+    if (vmprof_get_signal_type() != SIGPROF)
+        return -1;
+    attr.sample_period = period;
+    attr.disabled = 1;
+    attr.exclude_kernel = 1;
+    attr.exclude_hv = 1;
+    attr.wakeup_events = 1;
+
+    /* count the events of the current thread only, and send the signal
+       to it when 'period' events occurred */
+    fd = syscall(__NR_perf_event_open, &attr, 0, -1, -1, 0);
+    if (fd == -1)
+        return -1;
+    owner.type = F_OWNER_TID;
+    owner.pid = syscall(__NR_gettid);
+    if (fcntl(fd, F_SETFL, O_ASYNC) == -1 ||
+            fcntl(fd, F_SETSIG, SIGPROF) == -1 ||
+            fcntl(fd, F_SETOWN_EX, &owner) == -1 ||
+            ioctl(fd, PERF_EVENT_IOC_RESET, 0) == -1) {
+        close(fd);
+        return -1;
+    }
+    perf_event_last_count = 0;
+    perf_event_fd = fd;
+    /* the counter stops after one overflow; the signal handler restarts
+       it by calling refresh_perf_event() */
+    if (ioctl(fd, PERF_EVENT_IOC_REFRESH, 1) == -1) {
+        perf_event_fd = -1;
+        close(fd);
+        return -1;
+    }
+    vmprof_set_perf_event_active(1);
+    return 0;
+#else
+    return -1;
+#endif
+}
+
+int remove_perf_event(void)
+{
+#if VMPROF_LINUX
+    int fd = perf_event_fd;
+    if (fd == -1)
+        return 0;
+    perf_event_fd = -1;
+    vmprof_set_perf_event_active(0);
+    ioctl(fd, PERF_EVENT_IOC_DISABLE, 0);
+    if (close(fd) == -1)
+        return -1;
+#endif
+    return 0;
+}
+
+void refresh_perf_event(void)
+{
+#if VMPROF_LINUX
+    if (perf_event_fd != -1) {
+        int saved_errno = errno;
+        ioctl(perf_event_fd, PERF_EVENT_IOC_REFRESH, 1);
+        errno = saved_errno;
+    }
+#endif
+}
+
+/* The weight of a sample: 1 with the timer, or the number of events
+   counted since the previous sample. */
+long perf_event_sample_count(void)
+{
+#if VMPROF_LINUX
+    long long count;
+    long delta;
+    if (perf_event_fd != -1 &&
+            read(perf_event_fd, &count, sizeof(count)) == sizeof(count)) {
+        /* the samples of the counter's thread are never concurrent */
+        delta = (long)(count - perf_event_last_count);
+        perf_event_last_count = count;
+        if (delta > 0)
+            return delta;
+    }
+#endif
+    return 1;
+}
+
+static const char *perf_event_name(int kind)
+{
+    switch (kind) {
+    case VMPROF_PERF_INSTRUCTIONS: return "instructions";
+    case VMPROF_PERF_CACHE_MISSES: return "cache-misses";
+    case VMPROF_PERF_BRANCH_MISSES: return "branch-misses";
+    default: return "none";
+    }
+}
+
 void atfork_disable_timer(void)
 {
     if (vmprof_get_profile_interval_usec() > 0) {
+#if VMPROF_LINUX
+        if (perf_event_fd != -1)
+            ioctl(perf_event_fd, PERF_EVENT_IOC_DISABLE, 0);
+        else
+#endif
         remove_sigprof_timer();
         vmprof_set_enabled(0);
     }
@@ -322,10 +465,23 @@ void atfork_close_profile_file(void)
     if (fd != -1)
         close(fd);
     vmp_set_profile_fileno(-1);
+#if VMPROF_LINUX
+    /* the counter belongs to the thread of the parent */
+    if (perf_event_fd != -1) {
+        close(perf_event_fd);
+        perf_event_fd = -1;
+        vmprof_set_perf_event_active(0);
+    }
+#endif
 }
 void atfork_enable_timer(void)
 {
     if (vmprof_get_profile_interval_usec() > 0) {
+#if VMPROF_LINUX
+        if (perf_event_fd != -1)
+            refresh_perf_event();
+        else
+#endif
         install_sigprof_timer();
         vmprof_set_enabled(1);
     }
@@ -366,7 +522,11 @@ int vmprof_enable(int memory, int native, int real_time)
         goto error;
     if (install_sigprof_handler() == -1)
         goto error;
-    if (install_sigprof_timer() == -1)
+    if (install_perf_event() == 0) {
+        vmp_write_meta("perf_event",
+                       perf_event_name(vmprof_get_perf_event_kind()));
+    }
+    else if (install_sigprof_timer() == -1)
         goto error;
     signal_handler_ignore = 0;
     return 0;
@@ -398,7 +558,12 @@ int vmprof_disable(void)
     disable_cpyprof();
 #endif
 
-    if (remove_sigprof_timer() == -1) {
+    if (vmprof_get_perf_event() != VMPROF_PERF_NONE) {
+        if (remove_perf_event() == -1) {
+            return -1;
+        }
+    }
+    else if (remove_sigprof_timer() == -1) {
         return -1;
     }
     if (remove_sigprof_handler() == -1) {
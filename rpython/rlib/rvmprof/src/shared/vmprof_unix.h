@@ -68,6 +68,10 @@ void atfork_disable_timer(void);
 void atfork_enable_timer(void);
 void atfork_close_profile_file(void);
 int install_pthread_atfork_hooks(void);
+int install_perf_event(void);
+int remove_perf_event(void);
+void refresh_perf_event(void);
+long perf_event_sample_count(void);
 
 #ifdef VMP_SUPPORTS_NATIVE_PROFILING
 void init_cpyprof(int native);
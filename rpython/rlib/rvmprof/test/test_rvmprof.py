@@ -140,6 +140,43 @@ class TestEnable(RVMProfSamplingTest):
         assert self.approx_equal(tree.count, 0.5/self.SAMPLING_INTERVAL)
 
 
+class TestPerfEvent(RVMProfSamplingTest):
+
+    @rvmprof.vmprof_execute_code("xcode1", lambda self, code, count: code)
+    def main(self, code, count):
+        s = 0
+        for i in range(count):
+            s += (i << 1)
+        return s
+
+    def entry_point(self, value, delta_t):
+        code = self.MyCode('py:code:52:test_hw_counter')
+        rvmprof.register_code(code, self.MyCode.get_name)
+        fd = os.open(self.tmpfilename, os.O_WRONLY | os.O_CREAT, 0666)
+        rvmprof.enable(fd, self.SAMPLING_INTERVAL,
+                       perf_event=rvmprof.rvmprof.PERF_EVENT_INSTRUCTIONS,
+                       perf_period=1000000)
+        perf_event = rvmprof.get_perf_event()
+        start = time.time()
+        while time.time() < start+delta_t:
+            self.main(code, value)
+        rvmprof.disable()
+        os.close(fd)
+        return perf_event
+
+    def test(self):
+        # without hardware counters (e.g. in a VM), the timer is used
+        res = self.rpy_entry_point(10**4, 0.5)
+        assert res in (rvmprof.PERF_EVENT_NONE,
+                       rvmprof.rvmprof.PERF_EVENT_INSTRUCTIONS)
+        assert self.tmpfile.check()
+        data = self.tmpfile.read('rb')
+        if res != rvmprof.PERF_EVENT_NONE:
+            assert 'perf_event' in data and 'instructions' in data
+        else:
+            assert 'perf_event' not in data
+
+
 class TestNative(RVMProfSamplingTest):
 
     @pytest.fixture
@@ -2,7 +2,7 @@ import re, py
 from rpython.rlib import rvmprof, jit
 from rpython.rlib.rvmprof import traceback
 from rpython.translator.interactive import Translation
-from rpython.rtyper.lltypesystem import lltype
+from rpython.rtyper.lltypesystem import lltype, rffi
 
 
 def test_direct():
@@ -34,6 +34,36 @@ def test_direct():
                     (code1, traceback.LOC_INTERPRETED, 42),
                     (code1, traceback.LOC_INTERPRETED, 42)]
 
+def test_fill_traceback():
+    class MyCode:
+        pass
+    def get_name(mycode):
+        raise NotImplementedError
+    rvmprof.register_code_object_class(MyCode, get_name)
+    #
+    @rvmprof.vmprof_execute_code("mycode", lambda code, level: code,
+                                 _hack_update_stack_untranslated=True)
+    def mainloop(code, level):
+        if level > 0:
+            mainloop(code, level - 1)
+        else:
+            p = lltype.malloc(rffi.SIGNEDP.TO, 5, flavor='raw')
+            length = traceback.fill_traceback(p, 5)
+            assert length <= 5    # truncated
+            traceback.walk_traceback(MyCode, my_callback, 42, p, length)
+            lltype.free(p, flavor='raw')
+    #
+    seen = []
+    def my_callback(code, loc, arg):
+        seen.append((code, loc, arg))
+    #
+    code1 = MyCode()
+    rvmprof.register_code(code1, "foo")
+    mainloop(code1, 2)
+    #
+    assert 0 < len(seen) < 3
+    assert seen == [(code1, traceback.LOC_INTERPRETED, 42)] * len(seen)
+
 def test_compiled():
     class MyCode:
         pass
@@ -15,14 +15,23 @@ def traceback(estimate_number_of_entries):
     """
     if not cintf.IS_SUPPORTED:
         return (None, 0)
-    _cintf = rvmprof._get_vmprof().cintf
     size = estimate_number_of_entries * 2 + 4
-    stack = cintf.get_rvmprof_stack()
     array_p = lltype.malloc(rffi.SIGNEDP.TO, size, flavor='raw')
-    NULL = llmemory.NULL
-    array_length = _cintf.vmprof_get_traceback(stack, NULL, array_p, size)
+    array_length = fill_traceback(array_p, size)
     return (array_p, array_length)
 
+def fill_traceback(array_p, size):
+    """Like traceback(), but write the traceback into the existing raw
+    array 'array_p' of 'size' items, and return the number of items used.
+    This doesn't allocate anything, so it can be called from GC hooks.
+    """
+    if not cintf.IS_SUPPORTED:
+        return 0
+    _cintf = rvmprof._get_vmprof().cintf
+    stack = cintf.get_rvmprof_stack()
+    NULL = llmemory.NULL
+    return _cintf.vmprof_get_traceback(stack, NULL, array_p, size)
+
 
 LOC_INTERPRETED    = 0
 LOC_JITTED         = 1
@@ -745,6 +745,9 @@ class LLFrame(object):
     def op_gc_get_stats(self, obj):
         raise NotImplementedError("gc_get_stats")
 
+    def op_gc_must_pretenure(self, typeid):
+        return False
+
     def op_gc_writebarrier_before_copy(self, source, dest,
                                        source_start, dest_start, length):
         if hasattr(self.heap, 'writebarrier_before_copy'):
@@ -991,6 +994,8 @@ class LLFrame(object):
         raise NotImplementedError("do_malloc_fixedsize")
     def op_do_malloc_fixedsize_clear(self):
         raise NotImplementedError("do_malloc_fixedsize_clear")
+    def op_do_malloc_fixedsize_pretenured(self):
+        raise NotImplementedError("do_malloc_fixedsize_pretenured")
     def op_do_malloc_varsize(self):
         raise NotImplementedError("do_malloc_varsize")
     def op_do_malloc_varsize_clear(self):
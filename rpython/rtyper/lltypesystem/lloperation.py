@@ -397,6 +397,7 @@ LL_OPERATIONS = {
     'raw_memset':           LLOp(revdb_protect=True),
     'raw_memcopy':          LLOp(revdb_protect=True),
     'raw_memmove':          LLOp(revdb_protect=True),
+    'raw_prefetch':         LLOp(canrun=True),
     'raw_load':             LLOp(revdb_protect=True, sideeffects=False,
                                                      canrun=True),
     'raw_store':            LLOp(revdb_protect=True, canrun=True),
@@ -445,6 +446,7 @@ LL_OPERATIONS = {
     'get_exc_value_addr':   LLOp(),
     'do_malloc_fixedsize':LLOp(canmallocgc=True),
     'do_malloc_fixedsize_clear': LLOp(canmallocgc=True),
+    'do_malloc_fixedsize_pretenured': LLOp(canmallocgc=True),
     'do_malloc_varsize':  LLOp(canmallocgc=True),
     'do_malloc_varsize_clear':  LLOp(canmallocgc=True),
     'get_write_barrier_failing_case': LLOp(sideeffects=False),
@@ -497,6 +499,7 @@ LL_OPERATIONS = {
     'gc_gcflag_extra'     : LLOp(),
     'gc_add_memory_pressure': LLOp(),
     'gc_get_stats'        : LLOp(),
+    'gc_must_pretenure'   : LLOp(),
     'gc_fq_next_dead'     : LLOp(),
     'gc_fq_register'      : LLOp(),
     'gc_ignore_finalizer' : LLOp(canrun=True),
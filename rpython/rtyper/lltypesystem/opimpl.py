@@ -607,6 +607,9 @@ def op_have_debug_prints_for(prefix):
 def op_debug_nonnull_pointer(x):
     assert x
 
+def op_raw_prefetch(addr):
+    pass       # only a hint for the C compiler
+
 def op_gc_stack_bottom():
     pass       # marker for trackgcroot.py
 
@@ -266,3 +266,16 @@ def test_gcarray_length():
     fc = compile(f, [])
     res = fc()
     assert res == 117
+
+def test_raw_prefetch():
+    from rpython.rtyper.lltypesystem.lloperation import llop
+    def f(value):
+        addr = raw_malloc(16)
+        addr.signed[0] = value
+        llop.raw_prefetch(lltype.Void, addr)
+        result = addr.signed[0]
+        raw_free(addr)
+        return result
+    fc = compile(f, [int])
+    res = fc(42)
+    assert res == 42
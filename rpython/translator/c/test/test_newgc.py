@@ -1912,6 +1912,22 @@ class TestIncrementalMiniMarkGC(TestMiniMarkGC):
     def test_total_gc_time(self):
         res = self.run("total_gc_time")
         assert res > 0 # should take a few microseconds
+
+    def define_released_arena_memory(cls):
+        class A(object):
+            pass
+        def f():
+            l = [A() for i in range(300000)]
+            rgc.collect()     # move all these objects to the arenas
+            l = [l[i] for i in range(0, len(l), 1000)]
+            rgc.collect()
+            keepalive_until_here(l)
+            return rgc.get_stats(rgc.RELEASED_ARENA_MEMORY)
+        return f
+
+    def test_released_arena_memory(self):
+        res = self.run("released_arena_memory")
+        assert res > 0
 # ____________________________________________________________________
 
 class TaggedPointersTest(object):